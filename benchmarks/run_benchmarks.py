@@ -0,0 +1,203 @@
+"""Benchmark the optimizer operators on synthetic CAD-like scenes
+
+Runs offline in a background Blender:
+
+    blender --background --factory-startup --python benchmarks/run_benchmarks.py -- --scales small
+    blender --background --factory-startup --python benchmarks/run_benchmarks.py -- --update-baseline
+
+Each operator runs on a freshly built scene of every kind and scale (see
+scenes.py); the best of --repeat runs is kept. Results are compared with the
+baseline file: a run slower than --threshold times the baseline (and by more
+than --min-delta seconds), or one whose triangle count drifted by more than
+--triangle-tolerance, is a regression and makes the script exit with 1. A
+missing baseline file, or a benchmark without a baseline entry, exits with 2
+unless --update-baseline records it.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+
+import bpy
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ADDON_DIR = os.path.dirname(BENCHMARK_DIR)
+
+sys.path.insert(0, BENCHMARK_DIR)
+import scenes  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+
+OPERATORS = ("smart_vertex_merge", "auto_decimate", "dual_uv_unwrap", "combine_meshes", "generate_lods",
+             "batch_optimize")
+
+EXIT_OK = 0
+EXIT_REGRESSION = 1
+EXIT_NO_BASELINE = 2
+
+
+def parse_args(argv):
+    """Parse the arguments given after '--' on the Blender command line"""
+    parser = argparse.ArgumentParser(
+        prog="blender -b --python benchmarks/run_benchmarks.py --",
+        description="Benchmark the Asset Optimizer operators against a stored baseline"
+    )
+    parser.add_argument("--scales", default="small",
+                        help="Comma-separated scales to run: " + ",".join(scenes.SCALES))
+    parser.add_argument("--scenes", default=",".join(scenes.SCALES['small']),
+                        help="Comma-separated scene kinds to run")
+    parser.add_argument("--operators", default=",".join(OPERATORS),
+                        help="Comma-separated operators to time")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark, the fastest counts")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store these results as the new baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Slowdown factor that counts as a regression (default: 1.25)")
+    parser.add_argument("--min-delta", type=float, default=0.05,
+                        help="Ignore slowdowns smaller than this many seconds (default: 0.05)")
+    parser.add_argument("--triangle-tolerance", type=float, default=0.01,
+                        help="Relative triangle count change that counts as a regression (default: 0.01)")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    return parser.parse_args(argv)
+
+
+def load_addon():
+    """Register the addon the same way the headless entry point does"""
+    sys.path.insert(0, ADDON_DIR)
+    cli = importlib.import_module("cli")
+    return cli.load_addon()
+
+
+def operator_arguments(addon, name):
+    """Arguments each operator is benchmarked with"""
+    if name == "batch_optimize":
+        presets = importlib.import_module(addon + ".operators.batch_optimizer").PRESET_SETTINGS
+        return {"optimization_preset": 'GAME_ASSET', **presets['GAME_ASSET']}
+    return {}
+
+
+def scene_triangles(addon):
+    """Triangles of all meshes in use in the file"""
+    mesh_arrays = importlib.import_module(addon + ".utils.mesh_arrays")
+    return sum(mesh_arrays.count_triangles(mesh) for mesh in bpy.data.meshes if mesh.users)
+
+
+def run_benchmark(addon, scene_kind, scale, operator, repeat):
+    """Time one operator on one scene, returns the result of the fastest run"""
+    best = None
+    for _ in range(max(1, repeat)):
+        objects = scenes.build_scene(scene_kind, scale)
+        triangles_before = scene_triangles(addon)
+
+        start_time = time.perf_counter()
+        result = getattr(bpy.ops.mesh, operator)('EXEC_DEFAULT', **operator_arguments(addon, operator))
+        seconds = time.perf_counter() - start_time
+
+        run = {
+            "seconds": round(seconds, 4),
+            "objects": len(objects),
+            "triangles_before": triangles_before,
+            "triangles_after": scene_triangles(addon),
+            "status": sorted(result)[0],
+        }
+        if best is None or run["seconds"] < best["seconds"]:
+            best = run
+
+    return best
+
+
+def compare(results, baseline, args):
+    """List of regression messages of results against the baseline"""
+    regressions = []
+    for key, result in sorted(results.items()):
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+
+        slowdown = result["seconds"] - reference["seconds"]
+        if result["seconds"] > reference["seconds"] * args.threshold and slowdown > args.min_delta:
+            regressions.append(f"{key}: {result['seconds']:.3f}s vs {reference['seconds']:.3f}s baseline "
+                               f"({result['seconds'] / max(reference['seconds'], 1e-9):.2f}x)")
+
+        expected = reference["triangles_after"]
+        drift = abs(result["triangles_after"] - expected) / max(expected, 1)
+        if drift > args.triangle_tolerance:
+            regressions.append(f"{key}: {result['triangles_after']} triangles vs {expected} baseline "
+                               f"({drift * 100:.1f}% drift)")
+
+        if result["status"] != reference["status"]:
+            regressions.append(f"{key}: status {result['status']} vs {reference['status']} baseline")
+
+    return regressions
+
+
+def main():
+    """Run the selected benchmarks and compare or store the baseline"""
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    args = parse_args(argv)
+    addon = load_addon()
+
+    results = {}
+    for scale in args.scales.split(","):
+        for scene_kind in args.scenes.split(","):
+            for operator in args.operators.split(","):
+                key = f"{scale}/{scene_kind}/{operator}"
+                result = run_benchmark(addon, scene_kind, scale, operator, args.repeat)
+                results[key] = result
+                print(f"{key:<50} {result['seconds']:>9.3f}s  "
+                      f"{result['triangles_before']:>9} -> {result['triangles_after']:<9} {result['status']}",
+                      flush=True)
+
+    report = {
+        "blender": bpy.app.version_string,
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+
+    if args.update_baseline:
+        # Keep entries of benchmarks that were not part of this run
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as baseline_file:
+                baseline = json.load(baseline_file)
+        baseline.setdefault("results", {}).update(results)
+        baseline["blender"] = report["blender"]
+        baseline["platform"] = report["platform"]
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        print(f"Baseline updated: {args.baseline}")
+        return EXIT_OK
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --update-baseline to create one")
+        return EXIT_NO_BASELINE
+
+    with open(args.baseline, "r", encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file).get("results", {})
+
+    regressions = compare(results, baseline, args)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+
+    # A benchmark without a reference would otherwise pass unchecked
+    missing = sorted(key for key in results if key not in baseline)
+    for key in missing:
+        print(f"NO BASELINE {key}")
+
+    print(f"{len(results)} benchmarks, {len(regressions)} regressions, {len(missing)} without baseline")
+    if regressions:
+        return EXIT_REGRESSION
+    return EXIT_NO_BASELINE if missing else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
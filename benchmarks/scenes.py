@@ -0,0 +1,128 @@
+"""Parametric CAD-like benchmark scenes
+
+Every scene is built straight from bmesh with a fixed random seed, so the
+same kind and scale always produce the same geometry.
+"""
+import math
+import random
+
+import bmesh
+import bpy
+
+
+# Parameters of each scene kind per scale
+SCALES = {
+    'small': {
+        "small_parts": {"parts": 200},
+        "huge_meshes": {"meshes": 2, "segments": 128},
+        "cad_export": {"parts": 50, "segments": 32},
+        "linked_instances": {"meshes": 10, "instances": 20},
+    },
+    'medium': {
+        "small_parts": {"parts": 1000},
+        "huge_meshes": {"meshes": 4, "segments": 256},
+        "cad_export": {"parts": 200, "segments": 32},
+        "linked_instances": {"meshes": 20, "instances": 50},
+    },
+    'large': {
+        "small_parts": {"parts": 5000},
+        "huge_meshes": {"meshes": 8, "segments": 512},
+        "cad_export": {"parts": 1000, "segments": 32},
+        "linked_instances": {"meshes": 50, "instances": 100},
+    },
+}
+
+SEED = 1234
+
+
+def clear_scene():
+    """Remove every object, mesh and collection left over from a previous run"""
+    bpy.data.batch_remove(list(bpy.data.objects))
+    bpy.data.batch_remove(list(bpy.data.meshes))
+    bpy.data.batch_remove(list(bpy.data.collections))
+
+
+def _mesh_from_bmesh(name, bm):
+    """Turn a bmesh into a new mesh datablock"""
+    mesh = bpy.data.meshes.new(name)
+    bm.to_mesh(mesh)
+    bm.free()
+    return mesh
+
+
+def _part_mesh(name, rng):
+    """A small machined part: a cylinder or a box"""
+    bm = bmesh.new()
+    if rng.random() < 0.5:
+        bmesh.ops.create_cone(bm, cap_ends=True, segments=rng.choice((12, 16, 24)),
+                              radius1=rng.uniform(0.05, 0.3), radius2=rng.uniform(0.05, 0.3),
+                              depth=rng.uniform(0.1, 1.0))
+    else:
+        bmesh.ops.create_cube(bm, size=rng.uniform(0.1, 1.0))
+        bmesh.ops.subdivide_edges(bm, edges=bm.edges[:], cuts=rng.randint(1, 4), use_grid_fill=True)
+    return _mesh_from_bmesh(name, bm)
+
+
+def _sphere_mesh(name, segments):
+    """A UV sphere with segments x segments/2 faces"""
+    bm = bmesh.new()
+    bmesh.ops.create_uvsphere(bm, u_segments=segments, v_segments=segments // 2, radius=1.0)
+    return _mesh_from_bmesh(name, bm)
+
+
+def _split_mesh(name, segments, rng):
+    """A sphere as CAD exporters write it: every face with its own vertices, slightly jittered"""
+    bm = bmesh.new()
+    bmesh.ops.create_uvsphere(bm, u_segments=segments, v_segments=segments // 2, radius=rng.uniform(0.2, 1.0))
+    bmesh.ops.split_edges(bm, edges=bm.edges[:])
+    for vert in bm.verts:
+        vert.co.x += rng.uniform(-1e-6, 1e-6)
+        vert.co.y += rng.uniform(-1e-6, 1e-6)
+        vert.co.z += rng.uniform(-1e-6, 1e-6)
+    return _mesh_from_bmesh(name, bm)
+
+
+def _add_object(name, mesh, rng, spread):
+    """Link an object with a random placement into the scene"""
+    obj = bpy.data.objects.new(name, mesh)
+    obj.location = (rng.uniform(-spread, spread), rng.uniform(-spread, spread), rng.uniform(0.0, spread * 0.2))
+    obj.rotation_euler = (0.0, 0.0, rng.uniform(0.0, 2.0 * math.pi))
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
+
+def build_scene(kind, scale):
+    """Clear the file and build one benchmark scene, returns its objects"""
+    clear_scene()
+    params = SCALES[scale][kind]
+    rng = random.Random(SEED)
+    objects = []
+
+    if kind == "small_parts":
+        for index in range(params["parts"]):
+            objects.append(_add_object(f"Part_{index:05d}", _part_mesh(f"Part_{index:05d}", rng), rng, 20.0))
+
+    elif kind == "huge_meshes":
+        for index in range(params["meshes"]):
+            objects.append(_add_object(f"Hull_{index:02d}", _sphere_mesh(f"Hull_{index:02d}", params["segments"]), rng, 10.0))
+
+    elif kind == "cad_export":
+        for index in range(params["parts"]):
+            mesh = _split_mesh(f"Export_{index:05d}", params["segments"], rng)
+            objects.append(_add_object(f"Export_{index:05d}", mesh, rng, 20.0))
+
+    elif kind == "linked_instances":
+        for index in range(params["meshes"]):
+            mesh = _part_mesh(f"Fastener_{index:03d}", rng)
+            for instance in range(params["instances"]):
+                objects.append(_add_object(f"Fastener_{index:03d}_{instance:03d}", mesh, rng, 30.0))
+
+    else:
+        raise ValueError(f"Unknown scene kind: {kind}")
+
+    view_layer = bpy.context.view_layer
+    view_layer.update()
+    for obj in objects:
+        obj.select_set(True)
+    view_layer.objects.active = objects[0]
+    return objects
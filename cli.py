@@ -0,0 +1,59 @@
+"""Command-line launcher for the headless batch pipeline
+
+    blender -b scene.blend --factory-startup --python cli.py -- --preset VR_OPTIMIZED --lods 4
+    blender -b --factory-startup --python cli.py -- library ASSETS/ --preset VR_OPTIMIZED
+
+Registers the addon (the installed copy if there is one, otherwise straight
+from this directory), runs headless.main(), or library.main() when the first
+argument is "library", and exits Blender with its status. See headless.py
+and library.py for all arguments.
+"""
+import importlib
+import os
+import sys
+
+import addon_utils
+import bpy
+
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def find_installed_module():
+    """Name of the installed addon module that lives in this directory, if any"""
+    for module in addon_utils.modules():
+        module_file = getattr(module, "__file__", None)
+        if module_file and os.path.dirname(os.path.abspath(module_file)) == ADDON_DIR:
+            return module.__name__
+    return None
+
+
+def load_addon():
+    """Register the addon and return its module name"""
+    module_name = find_installed_module()
+
+    if module_name:
+        if module_name not in bpy.context.preferences.addons:
+            addon_utils.enable(module_name, default_set=False)
+        return module_name
+
+    # Not installed (e.g. --factory-startup): import it from the parent directory
+    sys.path.insert(0, os.path.dirname(ADDON_DIR))
+    module_name = os.path.basename(ADDON_DIR)
+    importlib.import_module(module_name).register()
+    return module_name
+
+
+def main():
+    """Run the headless pipeline with the arguments after '--'"""
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    module_name = load_addon()
+    if argv[:1] == ["library"]:
+        library = importlib.import_module(module_name + ".library")
+        sys.exit(library.main(argv[1:]))
+    headless = importlib.import_module(module_name + ".headless")
+    sys.exit(headless.main(argv))
+
+
+if __name__ == "__main__":
+    main()
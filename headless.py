@@ -0,0 +1,252 @@
+"""Headless batch pipeline for asset farms
+
+Runs the same step sequence as MESH_OT_batch_optimize on a .blend opened in
+background mode, without any dialog, and prints one machine-readable status
+line. Started through cli.py:
+
+    blender -b scene.blend --factory-startup --python cli.py -- --preset VR_OPTIMIZED --lods 4
+
+Exit codes: 0 success, 1 pipeline failure, 2 invalid arguments, 3 no mesh objects.
+Invalid arguments are reported in the status line too.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import bpy
+from .operators.batch_optimizer import PRESET_SETTINGS
+from .utils import profiler
+
+
+STATUS_PREFIX = "ASSET_OPTIMIZER_STATUS "
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_INVALID_ARGUMENTS = 2
+EXIT_NOTHING_TO_DO = 3
+
+STEP_SETTINGS = {
+    "merge": "enable_vertex_merge",
+    "decimate": "enable_decimation",
+    "uv": "enable_dual_uv",
+    "combine": "enable_mesh_combine",
+    "export": "enable_export",
+    "lods": "enable_lod_generation",
+}
+
+
+class InvalidArguments(ValueError):
+    """Command-line arguments the pipeline cannot run with"""
+
+
+class ArgumentParser(argparse.ArgumentParser):
+    """Parser that raises InvalidArguments instead of exiting, so the status line is still printed"""
+
+    def error(self, message):
+        self.print_usage(sys.stderr)
+        raise InvalidArguments(message)
+
+
+def add_pipeline_arguments(parser):
+    """Arguments that select the pipeline settings, shared with the library mode"""
+    parser.add_argument("--preset", default='CAD_IMPORT',
+                        choices=sorted(PRESET_SETTINGS) + ['CUSTOM'],
+                        help="Optimization preset (default: CAD_IMPORT)")
+    parser.add_argument("--steps",
+                        help="Comma-separated steps to run, overriding the preset: "
+                             + ",".join(STEP_SETTINGS))
+    parser.add_argument("--lods", type=int, help="Number of LOD levels (enables LOD generation)")
+    parser.add_argument("--lod-pixel-error", type=float,
+                        help="Derive LOD levels and transitions from screen size at this pixel error")
+    parser.add_argument("--merge-distance", type=float, help="Vertex merge distance")
+    parser.add_argument("--adaptive-merge", action="store_true",
+                        help="Derive each object's merge distance from its size and edge lengths")
+    parser.add_argument("--decimate-ratio", type=float, help="Target poly count ratio")
+    parser.add_argument("--triangle-budget", type=int,
+                        help="Total triangles of all objects after decimation (replaces the ratio)")
+    parser.add_argument("--max-object-triangles", type=int,
+                        help="Triangle limit of any single object (replaces the ratio)")
+    parser.add_argument("--engine", choices=['UNITY', 'UNREAL'], help="Target game engine")
+    parser.add_argument("--export-dir",
+                        help="Export the LOD groups to this directory (enables the export step)")
+    parser.add_argument("--export-format", choices=['FBX', 'GLB'], help="Export file format (default: FBX)")
+    parser.add_argument("--export-combined", action="store_true",
+                        help="Export all LOD groups into one file instead of one file per group")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Optimize in this many parallel background workers (default: in-process)")
+    parser.add_argument("--cache", action="store_true",
+                        help="Reuse optimized geometry of unchanged meshes from earlier runs")
+    parser.add_argument("--cache-size", type=int, help="Cache size limit in MB")
+    parser.add_argument("--no-undo", action="store_true",
+                        help="Record no undo history during the run to save memory on huge scenes")
+
+
+def parse_args(argv):
+    """Parse the arguments given after '--' on the Blender command line"""
+    parser = ArgumentParser(
+        prog="blender -b FILE --python cli.py --",
+        description="Run the Asset Optimizer batch pipeline without the UI"
+    )
+    add_pipeline_arguments(parser)
+    parser.add_argument("--objects", nargs="+", help="Objects to optimize (default: every mesh in the scene)")
+    parser.add_argument("--output", help="Output .blend (default: <input>_optimized.blend)")
+    parser.add_argument("--status-file", help="Also write the status JSON to this file")
+    parser.add_argument("--profile", help="Write a timing profile of the run to this .json or .csv file")
+    return parser.parse_args(argv)
+
+
+def build_settings(args):
+    """Resolve the preset and command-line overrides into batch operator settings"""
+    settings = {"optimization_preset": args.preset}
+    settings.update(PRESET_SETTINGS.get(args.preset, {}))
+
+    if args.steps is not None:
+        steps = {step.strip() for step in args.steps.split(",") if step.strip()}
+        unknown = steps - set(STEP_SETTINGS)
+        if unknown:
+            raise InvalidArguments(f"Unknown steps: {', '.join(sorted(unknown))}")
+        for step, name in STEP_SETTINGS.items():
+            settings[name] = step in steps
+
+    if args.lods is not None:
+        settings["lod_count"] = args.lods
+        settings["enable_lod_generation"] = True
+    if args.lod_pixel_error is not None:
+        settings["lod_pixel_error"] = args.lod_pixel_error
+    if args.merge_distance is not None:
+        settings["merge_distance"] = args.merge_distance
+    if args.adaptive_merge:
+        settings["merge_distance_mode"] = 'ADAPTIVE'
+    if args.decimate_ratio is not None:
+        settings["decimate_ratio"] = args.decimate_ratio
+    if args.triangle_budget is not None or args.max_object_triangles is not None:
+        settings["decimate_target"] = 'BUDGET'
+        settings["triangle_budget"] = args.triangle_budget or 0
+        settings["max_object_triangles"] = args.max_object_triangles or 0
+    if args.engine is not None:
+        settings["target_engine"] = args.engine
+    if args.export_dir is not None:
+        settings["export_directory"] = os.path.abspath(args.export_dir)
+        settings["enable_export"] = True
+    if args.export_format is not None:
+        settings["export_format"] = args.export_format
+    if args.export_combined:
+        settings["export_mode"] = 'COMBINED'
+    if args.cache:
+        settings["use_cache"] = True
+    if args.cache_size is not None:
+        settings["cache_size_mb"] = args.cache_size
+    if args.workers > 0:
+        settings["use_parallel"] = True
+        settings["worker_count"] = args.workers
+    if args.no_undo:
+        settings["undo_mode"] = 'NONE'
+
+    return settings
+
+
+def default_output_path():
+    """Output path next to the input file"""
+    root, ext = os.path.splitext(bpy.data.filepath or os.path.join(os.getcwd(), "untitled.blend"))
+    return f"{root}_optimized{ext or '.blend'}"
+
+
+def optimize(settings, mesh_objects, profiling=False):
+    """Run the batch operator on mesh_objects, returns its result and the optimized objects"""
+    view_layer = bpy.context.view_layer
+    for obj in view_layer.objects:
+        obj.select_set(False)
+    for obj in mesh_objects:
+        obj.select_set(True)
+    view_layer.objects.active = mesh_objects[0]
+
+    props = bpy.context.scene.vr_asset_optimizer
+    was_profiling = props.enable_profiling
+    props.enable_profiling = was_profiling or profiling
+
+    # EXEC_DEFAULT skips invoke() and its props dialog, without undo the run itself pushes no step either
+    try:
+        result = bpy.ops.mesh.batch_optimize('EXEC_DEFAULT', settings.get("undo_mode") != 'NONE', **settings)
+    finally:
+        props.enable_profiling = was_profiling
+
+    # Parallel mode and combining replace the originals, the results are left selected
+    if settings.get("use_parallel") or settings.get("enable_mesh_combine"):
+        optimized = [obj for obj in bpy.context.selected_objects if obj.type == 'MESH']
+    else:
+        optimized = mesh_objects
+    return result, optimized
+
+
+def run(args):
+    """Run the pipeline on the open file and return the status dictionary"""
+    start_time = time.perf_counter()
+    view_layer = bpy.context.view_layer
+    settings = build_settings(args)
+
+    if args.objects:
+        mesh_objects = [bpy.data.objects[name] for name in args.objects
+                        if name in bpy.data.objects and bpy.data.objects[name].type == 'MESH']
+    else:
+        mesh_objects = [obj for obj in view_layer.objects if obj.type == 'MESH']
+
+    status = {
+        "input": bpy.data.filepath,
+        "output": None,
+        "objects": len(mesh_objects),
+    }
+
+    if not mesh_objects:
+        status["status"] = "NOTHING_TO_DO"
+        return status, EXIT_NOTHING_TO_DO
+
+    status["settings"] = settings
+    status["polygons_before"] = sum(len(obj.data.polygons) for obj in mesh_objects)
+
+    result, optimized = optimize(settings, mesh_objects, profiling=bool(args.profile))
+
+    if args.profile and profiler.last_session():
+        profile_path = os.path.abspath(args.profile)
+        if profile_path.lower().endswith(".csv"):
+            profiler.export_csv(profiler.last_session(), profile_path)
+        else:
+            profiler.export_json(profiler.last_session(), profile_path)
+        status["profile"] = profile_path
+
+    if 'FINISHED' not in result:
+        status["status"] = "FAILED"
+        status["error"] = f"batch_optimize returned {sorted(result)}"
+        return status, EXIT_FAILED
+
+    status["polygons_after"] = sum(len(obj.data.polygons) for obj in optimized)
+
+    output_path = os.path.abspath(args.output or default_output_path())
+    bpy.ops.wm.save_as_mainfile(filepath=output_path, copy=True)
+
+    status["output"] = output_path
+    status["seconds"] = round(time.perf_counter() - start_time, 3)
+    status["status"] = "OK"
+    return status, EXIT_OK
+
+
+def main(argv):
+    """Command-line entry point, returns the process exit code"""
+    args = None
+    try:
+        args = parse_args(argv)
+        status, exit_code = run(args)
+    except InvalidArguments as e:
+        status, exit_code = {"status": "INVALID_ARGUMENTS", "error": str(e)}, EXIT_INVALID_ARGUMENTS
+    except Exception as e:
+        status, exit_code = {"status": "FAILED", "error": str(e)}, EXIT_FAILED
+
+    line = json.dumps(status)
+    print(STATUS_PREFIX + line, flush=True)
+
+    if args and args.status_file:
+        with open(args.status_file, "w", encoding="utf-8") as status_file:
+            status_file.write(line + "\n")
+
+    return exit_code
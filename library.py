@@ -0,0 +1,396 @@
+"""Streaming optimizer for directories of asset files
+
+Walks a directory and sends every .blend, .fbx, .obj, .glb and .gltf file
+through import, the batch pipeline and export, one file at a time:
+
+    blender -b --factory-startup --python cli.py -- library ASSETS/ --output-dir OPTIMIZED/ --preset VR_OPTIMIZED
+
+Only one file is loaded at a time and orphan datablocks are purged after
+every file, so memory stays flat over any number of files. With --jobs N,
+N files are optimized at once, each in its own background Blender that
+exits afterwards. Every finished file is appended to manifest.jsonl in the
+output directory; running the same command again skips files already in
+the manifest unless the file or the settings changed since.
+
+Exit codes: 0 success, 1 some files failed, 2 invalid arguments, 3 no files found.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import bpy
+from . import headless
+
+
+MANIFEST_NAME = "manifest.jsonl"
+
+# Import operator (bpy.ops path) of every supported input format, .blend files are opened
+IMPORTERS = {
+    ".fbx": "import_scene.fbx",
+    ".obj": "wm.obj_import",
+    ".glb": "import_scene.gltf",
+    ".gltf": "import_scene.gltf",
+}
+
+INPUT_EXTENSIONS = (".blend",) + tuple(IMPORTERS)
+
+# Output extension of every export format ('SAME' keeps the input format, .gltf becomes .glb)
+EXPORT_EXTENSIONS = {'BLEND': ".blend", 'FBX': ".fbx", 'GLB': ".glb", 'OBJ': ".obj"}
+
+# Statuses that count as done when resuming
+DONE_STATUSES = {"OK", "NOTHING_TO_DO"}
+
+# Seconds between checks on running worker processes
+POLL_INTERVAL = 0.1
+
+
+def parse_args(argv):
+    """Parse the arguments given after '-- library' on the Blender command line"""
+    parser = headless.ArgumentParser(
+        prog="blender -b --python cli.py -- library",
+        description="Optimize every asset file in a directory with the Asset Optimizer pipeline"
+    )
+    parser.add_argument("directory", nargs="?", help="Directory to optimize, searched recursively")
+    parser.add_argument("--output-dir", help="Where optimized files and the manifest go "
+                                             "(default: <directory>_optimized)")
+    parser.add_argument("--format", default='SAME', choices=['SAME'] + sorted(EXPORT_EXTENSIONS),
+                        help="Output file format (default: same as the input, .gltf becomes .glb)")
+    parser.add_argument("--jobs", type=int, default=0,
+                        help="Optimize this many files at once in separate background Blenders "
+                             "(default: one at a time in this process)")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Process files again that failed in an earlier run")
+    parser.add_argument("--limit", type=int, help="Stop after this many files (for trial runs)")
+    parser.add_argument("--status-file", help="Also write the summary status JSON to this file")
+    parser.add_argument("--job", help=argparse.SUPPRESS)
+    headless.add_pipeline_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if not args.job and not args.directory:
+        parser.error("the directory argument is required")
+    return args
+
+
+def find_asset_files(directory, exclude=None):
+    """Paths of all supported files below directory, relative to it and sorted
+
+    The exclude directory (the output, when it lies inside) is not searched.
+    """
+    found = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(name for name in dirs if os.path.join(root, name) != exclude)
+        for name in sorted(files):
+            if name.lower().endswith(INPUT_EXTENSIONS):
+                found.append(os.path.relpath(os.path.join(root, name), directory))
+    return found
+
+
+def settings_hash(settings):
+    """Short fingerprint of the pipeline settings, stored with every manifest record"""
+    return hashlib.blake2b(json.dumps(settings, sort_keys=True).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def file_fingerprint(path):
+    """Size and modification time, which change when a file is edited"""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def read_manifest(manifest_path):
+    """Latest record of every file in the manifest, {relative path: record}
+
+    A line cut short by an interruption is ignored, its file is simply
+    processed again.
+    """
+    records = {}
+    if not os.path.exists(manifest_path):
+        return records
+
+    with open(manifest_path, "r", encoding="utf-8") as manifest_file:
+        for line in manifest_file:
+            try:
+                record = json.loads(line)
+                records[record["file"]] = record
+            except (ValueError, KeyError):
+                continue
+    return records
+
+
+def append_manifest(manifest_path, record):
+    """Append one record and make sure it reached the disk before moving on"""
+    with open(manifest_path, "a", encoding="utf-8") as manifest_file:
+        manifest_file.write(json.dumps(record) + "\n")
+        manifest_file.flush()
+        os.fsync(manifest_file.fileno())
+
+
+def is_done(record, fingerprint, fingerprint_settings, retry_failed):
+    """Whether a manifest record means the file needs no processing"""
+    if record is None:
+        return False
+    if record.get("size") != fingerprint[0] or record.get("mtime_ns") != fingerprint[1]:
+        return False
+    if record.get("settings_hash") != fingerprint_settings:
+        return False
+    return record["status"] in DONE_STATUSES or not retry_failed
+
+
+def output_path_for(output_dir, relative_path, export_format):
+    """Output path mirroring the input's place in the directory tree"""
+    root, extension = os.path.splitext(relative_path)
+    if export_format == 'SAME':
+        extension = ".glb" if extension.lower() == ".gltf" else extension.lower()
+    else:
+        extension = EXPORT_EXTENSIONS[export_format]
+    return os.path.join(output_dir, root + extension)
+
+
+def load_file(path):
+    """Replace everything in memory with the contents of one asset file"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".blend":
+        bpy.ops.wm.open_mainfile(filepath=path, load_ui=False)
+        return
+
+    bpy.ops.wm.read_homefile(use_empty=True)
+    module_name, operator_name = IMPORTERS[extension].split(".")
+    getattr(getattr(bpy.ops, module_name), operator_name)(filepath=path)
+
+
+def export_file(path):
+    """Write the whole scene to path in the format its extension names"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".blend":
+        bpy.ops.wm.save_as_mainfile(filepath=path, copy=True, compress=True)
+    elif extension == ".fbx":
+        bpy.ops.export_scene.fbx(filepath=path, use_custom_props=True)
+    elif extension == ".glb":
+        bpy.ops.export_scene.gltf(filepath=path, export_format='GLB', export_extras=True)
+    else:  # .obj
+        bpy.ops.wm.obj_export(filepath=path)
+
+
+def purge_orphans():
+    """Remove every datablock nothing uses anymore, returns how many were removed"""
+    return bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
+
+
+def process_file(input_path, output_path, settings):
+    """Import, optimize and export one file in this process, returns the result fields"""
+    start_time = time.perf_counter()
+    load_file(input_path)
+
+    mesh_objects = [obj for obj in bpy.context.view_layer.objects if obj.type == 'MESH']
+    result = {"objects": len(mesh_objects)}
+    if not mesh_objects:
+        result["status"] = "NOTHING_TO_DO"
+        return result
+
+    result["polygons_before"] = sum(len(obj.data.polygons) for obj in mesh_objects)
+    operator_result, optimized = headless.optimize(settings, mesh_objects)
+    if 'FINISHED' not in operator_result:
+        result["status"] = "FAILED"
+        result["error"] = f"batch_optimize returned {sorted(operator_result)}"
+        return result
+
+    result["polygons_after"] = sum(len(obj.data.polygons) for obj in optimized)
+
+    # Meshes replaced by the pipeline would otherwise end up in the output and stay in memory
+    result["purged"] = purge_orphans()
+    export_file(output_path)
+
+    result["output"] = output_path
+    result["seconds"] = round(time.perf_counter() - start_time, 3)
+    result["status"] = "OK"
+    return result
+
+
+def safe_process_file(input_path, output_path, settings):
+    """process_file() that turns any error into a FAILED result"""
+    try:
+        return process_file(input_path, output_path, settings)
+    except Exception as e:
+        return {"status": "FAILED", "error": str(e)}
+
+
+def run_job(job_path):
+    """Worker side of --jobs: process the file a job describes and write its result"""
+    with open(job_path, "r", encoding="utf-8") as job_file:
+        job = json.load(job_file)
+
+    result = safe_process_file(job["input"], job["output"], job["settings"])
+    with open(job["result"], "w", encoding="utf-8") as result_file:
+        json.dump(result, result_file)
+    return headless.EXIT_OK if result["status"] in DONE_STATUSES else headless.EXIT_FAILED
+
+
+def log_tail(log_path, lines=5):
+    """Last lines of a worker log, to explain a worker that died"""
+    try:
+        with open(log_path, "r", encoding="utf-8", errors="replace") as log_file:
+            return " | ".join(line.strip() for line in log_file.readlines()[-lines:])
+    except OSError:
+        return ""
+
+
+class WorkerPool:
+    """Background Blender processes, each optimizing one file and exiting"""
+
+    def __init__(self, size, work_dir):
+        self.size = max(1, size)
+        self.work_dir = work_dir
+        self.running = []
+        self.started = 0
+
+    def has_room(self):
+        """Whether another worker may start"""
+        return len(self.running) < self.size
+
+    def start(self, relative_path, input_path, output_path, settings):
+        """Launch a worker for one file"""
+        self.started += 1
+        base = os.path.join(self.work_dir, f"job_{self.started}")
+        job = {"input": input_path, "output": output_path, "settings": settings, "result": base + ".result.json"}
+        with open(base + ".json", "w", encoding="utf-8") as job_file:
+            json.dump(job, job_file)
+
+        log_file = open(base + ".log", "w", encoding="utf-8")
+        process = subprocess.Popen(
+            [bpy.app.binary_path, "--background", "--factory-startup",
+             "--python", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cli.py"),
+             "--", "library", "--job", base + ".json"],
+            stdout=log_file,
+            stderr=subprocess.STDOUT
+        )
+        self.running.append((relative_path, job, process, log_file, base + ".log", time.perf_counter()))
+
+    def finished(self):
+        """Results of workers that exited since the last call, as (relative path, result)"""
+        done = []
+        for entry in list(self.running):
+            relative_path, job, process, log_file, log_path, start_time = entry
+            if process.poll() is None:
+                continue
+
+            self.running.remove(entry)
+            log_file.close()
+            try:
+                with open(job["result"], "r", encoding="utf-8") as result_file:
+                    result = json.load(result_file)
+            except (OSError, ValueError):
+                result = {"status": "FAILED",
+                          "error": f"worker exited with code {process.returncode}: {log_tail(log_path)}"}
+            result["seconds"] = round(time.perf_counter() - start_time, 3)
+            done.append((relative_path, result))
+        return done
+
+
+def run(args):
+    """Optimize the directory and return the summary status dictionary"""
+    directory = os.path.abspath(args.directory)
+    output_dir = os.path.abspath(args.output_dir or directory.rstrip(os.sep) + "_optimized")
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    settings = headless.build_settings(args)
+    fingerprint_settings = settings_hash(dict(settings, output_format=args.format))
+
+    status = {"directory": directory, "output_dir": output_dir, "manifest": manifest_path}
+
+    files = find_asset_files(directory, exclude=output_dir)
+    if not files:
+        status["status"] = "NOTHING_TO_DO"
+        return status, headless.EXIT_NOTHING_TO_DO
+
+    os.makedirs(output_dir, exist_ok=True)
+    records = read_manifest(manifest_path)
+
+    pending = []
+    for relative_path in files:
+        fingerprint = file_fingerprint(os.path.join(directory, relative_path))
+        if not is_done(records.get(relative_path), fingerprint, fingerprint_settings, args.retry_failed):
+            pending.append((relative_path, fingerprint))
+    if args.limit is not None:
+        pending = pending[:args.limit]
+
+    counts = {"OK": 0, "NOTHING_TO_DO": 0, "FAILED": 0}
+    start_time = time.perf_counter()
+
+    def record_result(relative_path, fingerprint, result):
+        """Add one file's result to the manifest and the counters, and log it"""
+        record = {"file": relative_path, "size": fingerprint[0], "mtime_ns": fingerprint[1],
+                  "settings_hash": fingerprint_settings, **result}
+        append_manifest(manifest_path, record)
+        counts[record["status"]] = counts.get(record["status"], 0) + 1
+        print(f"[{sum(counts.values())}/{len(pending)}] {relative_path}: {record['status']}"
+              + (f" ({record['error']})" if record.get("error") else ""), flush=True)
+
+    if args.jobs > 0:
+        work_dir = tempfile.mkdtemp(prefix="asset_optimizer_library_")
+        pool = WorkerPool(args.jobs, work_dir)
+        fingerprints = dict(pending)
+        queue = list(reversed(pending))
+        try:
+            while queue or pool.running:
+                while queue and pool.has_room():
+                    relative_path, _ = queue.pop()
+                    pool.start(relative_path, os.path.join(directory, relative_path),
+                               output_path_for(output_dir, relative_path, args.format), settings)
+                for relative_path, result in pool.finished():
+                    record_result(relative_path, fingerprints[relative_path], result)
+                time.sleep(POLL_INTERVAL)
+        finally:
+            for _, _, process, log_file, _, _ in pool.running:
+                process.kill()
+                log_file.close()
+            shutil.rmtree(work_dir, ignore_errors=True)
+    else:
+        for relative_path, fingerprint in pending:
+            result = safe_process_file(os.path.join(directory, relative_path),
+                                       output_path_for(output_dir, relative_path, args.format), settings)
+            record_result(relative_path, fingerprint, result)
+
+    # Leave an empty file behind instead of the last asset
+    bpy.ops.wm.read_homefile(use_empty=True)
+
+    status.update({
+        "files": len(files),
+        "skipped": len(files) - len(pending),
+        "processed": len(pending),
+        "ok": counts["OK"],
+        "empty": counts["NOTHING_TO_DO"],
+        "failed": counts["FAILED"],
+        "seconds": round(time.perf_counter() - start_time, 3),
+        "status": "FAILED" if counts["FAILED"] else "OK",
+    })
+    return status, headless.EXIT_FAILED if counts["FAILED"] else headless.EXIT_OK
+
+
+def main(argv):
+    """Command-line entry point, returns the process exit code"""
+    try:
+        args = parse_args(argv)
+    except headless.InvalidArguments as e:
+        status = {"status": "INVALID_ARGUMENTS", "error": str(e)}
+        print(headless.STATUS_PREFIX + json.dumps(status), flush=True)
+        return headless.EXIT_INVALID_ARGUMENTS
+    if args.job:
+        return run_job(args.job)
+
+    try:
+        status, exit_code = run(args)
+    except headless.InvalidArguments as e:
+        status, exit_code = {"status": "INVALID_ARGUMENTS", "error": str(e)}, headless.EXIT_INVALID_ARGUMENTS
+    except Exception as e:
+        status, exit_code = {"status": "FAILED", "error": str(e)}, headless.EXIT_FAILED
+
+    print(headless.STATUS_PREFIX + json.dumps(status), flush=True)
+    if args.status_file:
+        with open(args.status_file, "w", encoding="utf-8") as status_file:
+            status_file.write(json.dumps(status) + "\n")
+    return exit_code
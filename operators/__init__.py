@@ -1,21 +1,30 @@
 from . import mesh_decimation
 from . import lod_generator
+from . import lod_export
 from . import dual_uv_unwrap
 from . import vertex_merge
+from . import mesh_combine
 from . import batch_optimizer
+from . import profile_export
 
 def register():
     """Register all operators"""
     mesh_decimation.register()
     lod_generator.register()
+    lod_export.register()
     dual_uv_unwrap.register()
     vertex_merge.register()
+    mesh_combine.register()
     batch_optimizer.register()
+    profile_export.register()
 
 def unregister():
     """Unregister all operators"""
+    profile_export.unregister()
     batch_optimizer.unregister()
+    mesh_combine.unregister()
     vertex_merge.unregister()
     dual_uv_unwrap.unregister()
+    lod_export.unregister()
     lod_generator.unregister()
     mesh_decimation.unregister()
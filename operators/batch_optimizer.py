@@ -1,6 +1,165 @@
 import bpy
+import functools
+import json
+import os
+import shutil
+import tempfile
+import time
 from bpy.types import Operator
-from bpy.props import BoolProperty, FloatProperty, EnumProperty, IntProperty
+from bpy.props import BoolProperty, FloatProperty, EnumProperty, IntProperty, StringProperty
+from ..utils import budget, helpers, mesh_arrays, mesh_cache, mesh_snapshot, profiler
+
+
+# Root module of the addon, enabled by the background workers
+ADDON_MODULE = __package__.rpartition('.')[0]
+
+# Directory the workers import the addon from when it is not installed (cli.py with --factory-startup)
+ADDON_PATH = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(__file__), "batch_worker.py")
+
+# Datablocks every shard file carries a copy of, appended copies are mapped back onto the local ones
+SHARED_DATA = ("materials", "node_groups", "images", "textures")
+
+# Operator, progress message and failure message of each pipeline step
+PIPELINE_STEPS = {
+    'MERGE': ("smart_vertex_merge", "Step 1/6: Merging vertices...", "Vertex merge failed"),
+    'DECIMATE': ("auto_decimate", "Step 2/6: Decimating mesh...", "Decimation failed"),
+    'UV': ("dual_uv_unwrap", "Step 3/6: Generating dual UV maps...", "UV unwrap failed"),
+    'COMBINE': ("combine_meshes", "Step 4/6: Combining small meshes...", "Mesh combining failed"),
+    'LOD': ("generate_lods", "Step 5/6: Generating LOD levels...", "LOD generation failed"),
+    'EXPORT': ("export_lod_groups", "Step 6/6: Exporting LOD groups...", "Export failed"),
+}
+
+# Steps that work on the whole selection at once instead of mesh by mesh: combine
+# clusters and combined export files span the selection, and the UV step unwraps
+# every mesh in one Edit Mode session (timed chunks would vary it from run to run)
+WHOLE_SELECTION_STEPS = {'UV', 'COMBINE', 'EXPORT'}
+
+# Seconds of work per timer event in modal mode, the UI redraws in between
+TIME_SLICE = 0.25
+
+# Settings applied by each preset (CUSTOM keeps whatever is set)
+PRESET_SETTINGS = {
+    'CAD_IMPORT': {
+        "enable_vertex_merge": True,
+        "enable_decimation": True,
+        "enable_dual_uv": True,
+        "enable_mesh_combine": False,
+        "enable_lod_generation": False,
+        "merge_distance": 0.0001,
+        "decimate_ratio": 0.6,
+    },
+    'GAME_ASSET': {
+        "enable_vertex_merge": True,
+        "enable_decimation": True,
+        "enable_dual_uv": True,
+        "enable_mesh_combine": False,
+        "enable_lod_generation": True,
+        "merge_distance": 0.0001,
+        "decimate_ratio": 0.5,
+        "lod_count": 3,
+    },
+    'VR_OPTIMIZED': {
+        "enable_vertex_merge": True,
+        "enable_decimation": True,
+        "enable_dual_uv": True,
+        "enable_mesh_combine": True,
+        "enable_lod_generation": True,
+        "merge_distance": 0.0001,
+        "decimate_ratio": 0.3,
+        "lod_count": 4,
+    },
+}
+
+
+def restore_global_undo(enabled):
+    """Timer callback that turns global undo back on after a run with undo off"""
+    bpy.context.preferences.edit.use_global_undo = enabled
+    return None
+
+
+def shard_objects(objects, shard_count):
+    """Split objects into shards of roughly equal polygon count
+
+    Linked duplicates always land in the same shard, so their mesh is only
+    optimized once and comes back still shared.
+    """
+    groups = list(helpers.group_by_mesh(objects).values())
+    shards = [[] for _ in range(max(1, min(shard_count, len(groups))))]
+    loads = [0] * len(shards)
+    
+    # Largest meshes first, each onto the currently lightest shard
+    for instances in sorted(groups, key=lambda group: len(group[0].data.polygons), reverse=True):
+        index = loads.index(min(loads))
+        shards[index].extend(instances)
+        loads[index] += len(instances[0].data.polygons)
+    
+    return [shard for shard in shards if shard]
+
+
+class BatchRollback:
+    """State needed to undo a cancelled modal batch run
+
+    Keeps an untouched copy of every unique mesh datablock, which carries all
+    of its data (attributes, vertex weights, seams, UV layer flags), plus the
+    name, collections, parent, transform and modifiers of every object, and
+    which objects, meshes and collections existed before the run (by pointer,
+    since LOD generation renames the originals).
+    """
+
+    def __init__(self, objects):
+        self.objects = [(obj, obj.name, list(obj.users_collection), obj.parent, obj.matrix_world.copy(),
+                         {modifier.name for modifier in obj.modifiers})
+                        for obj in objects]
+        self.existing = {id_data.as_pointer()
+                         for id_data in (*bpy.data.objects, *bpy.data.meshes, *bpy.data.collections)}
+        self.meshes = [(instances, instances[0].data, instances[0].data.name, instances[0].data.copy())
+                       for instances in helpers.group_by_mesh(objects).values()]
+
+    def release(self):
+        """Drop the mesh copies once the run can no longer be cancelled"""
+        bpy.data.batch_remove([copy for _, _, _, copy in self.meshes])
+        self.meshes = []
+
+    def restore(self):
+        """Remove everything the run created and put the original objects back"""
+        for obj in [obj for obj in bpy.data.objects if obj.as_pointer() not in self.existing]:
+            bpy.data.objects.remove(obj, do_unlink=True)
+        
+        for instances, mesh, name, copy in self.meshes:
+            try:
+                # Every user gets the copy back, also linked duplicates outside the selection
+                mesh_snapshot.discard(mesh)
+                mesh.user_remap(copy)
+                bpy.data.meshes.remove(mesh)
+            except ReferenceError:
+                # Baking modifiers already replaced and removed the mesh
+                pass
+            for obj in instances:
+                obj.data = copy
+            copy.name = name
+        self.meshes = []
+        
+        for obj, name, collections, parent, matrix, modifier_names in self.objects:
+            obj.name = name
+            for collection in collections:
+                if obj.name not in collection.objects:
+                    collection.objects.link(obj)
+            for collection in list(obj.users_collection):
+                if collection not in collections:
+                    collection.objects.unlink(obj)
+            obj.parent = parent
+            obj.matrix_world = matrix
+            for modifier in [modifier for modifier in obj.modifiers if modifier.name not in modifier_names]:
+                obj.modifiers.remove(modifier)
+        
+        for collection in [collection for collection in bpy.data.collections
+                           if collection.as_pointer() not in self.existing]:
+            bpy.data.collections.remove(collection)
+        for mesh in [mesh for mesh in bpy.data.meshes
+                     if mesh.as_pointer() not in self.existing and not mesh.users]:
+            bpy.data.meshes.remove(mesh)
 
 
 class MESH_OT_batch_optimize(Operator):
@@ -42,13 +201,35 @@ class MESH_OT_batch_optimize(Operator):
         default=True
     )
     
+    enable_mesh_combine: BoolProperty(
+        name="Combine Small Meshes",
+        description="Join nearby small meshes sharing materials to reduce draw calls",
+        default=False
+    )
+    
     enable_lod_generation: BoolProperty(
         name="Generate LODs",
         description="Generate LOD levels",
         default=False
     )
     
+    enable_export: BoolProperty(
+        name="Export LOD Groups",
+        description="Write the LOD groups to FBX or glTF files at the end",
+        default=False
+    )
+    
     # Quick settings
+    merge_distance_mode: EnumProperty(
+        name="Merge Distance Mode",
+        description="How the merge distance of each object is chosen",
+        items=[
+            ('FIXED', "Fixed", "Use the same merge distance for every object"),
+            ('ADAPTIVE', "Adaptive", "Derive each object's merge distance from its size, edge lengths and scale")
+        ],
+        default='FIXED'
+    )
+    
     merge_distance: FloatProperty(
         name="Merge Distance",
         description="Vertex merge distance",
@@ -66,6 +247,39 @@ class MESH_OT_batch_optimize(Operator):
         max=1.0
     )
     
+    decimate_target: EnumProperty(
+        name="Decimate Target",
+        description="How much geometry each mesh keeps",
+        items=[
+            ('RATIO', "Fixed Ratio", "Keep the decimate ratio on every mesh"),
+            ('BUDGET', "Triangle Budget", "Distribute a triangle budget over the selection by screen size")
+        ],
+        default='RATIO'
+    )
+    
+    triangle_budget: IntProperty(
+        name="Triangle Budget",
+        description="Total triangles of the selection after decimation, every linked duplicate counts (0 = no total limit)",
+        default=100000,
+        min=0
+    )
+    
+    max_object_triangles: IntProperty(
+        name="Max Triangles per Object",
+        description="Upper limit of triangles for any single object (0 = no limit)",
+        default=0,
+        min=0
+    )
+    
+    combine_cluster_size: FloatProperty(
+        name="Combine Cluster Size",
+        description="Edge length of the world grid cells small meshes are joined within",
+        default=5.0,
+        min=0.01,
+        max=10000.0,
+        subtype='DISTANCE'
+    )
+    
     lod_count: IntProperty(
         name="LOD Count",
         description="Number of LOD levels",
@@ -74,6 +288,15 @@ class MESH_OT_batch_optimize(Operator):
         max=8
     )
     
+    lod_pixel_error: FloatProperty(
+        name="LOD Pixel Error",
+        description="Derive LOD count, ratios and transitions from each object's screen size at this "
+                    "pixel error, LOD Count becomes the maximum (0 = fixed progressive ratios)",
+        default=0.0,
+        min=0.0,
+        max=32.0
+    )
+    
     target_engine: EnumProperty(
         name="Target Engine",
         description="Target game engine",
@@ -83,6 +306,75 @@ class MESH_OT_batch_optimize(Operator):
         ],
         default='UNITY'
     )
+    
+    # Export
+    export_directory: StringProperty(
+        name="Export Directory",
+        description="Folder the LOD groups are exported to",
+        default="//exports/",
+        subtype='DIR_PATH'
+    )
+    
+    export_format: EnumProperty(
+        name="Export Format",
+        description="File format of the exported LOD groups",
+        items=[
+            ('FBX', "FBX", "FBX with LodGroup nodes"),
+            ('GLB', "glTF Binary", "GLB with the LOD properties as extras")
+        ],
+        default='FBX'
+    )
+    
+    export_mode: EnumProperty(
+        name="Export Files",
+        description="How LOD groups are split into files",
+        items=[
+            ('PER_GROUP', "One per LOD Group", "Write every LOD group to its own file"),
+            ('COMBINED', "Single File", "Write all LOD groups into one file")
+        ],
+        default='PER_GROUP'
+    )
+    
+    # Result cache
+    use_cache: BoolProperty(
+        name="Use Result Cache",
+        description="Reuse optimized geometry from earlier runs for meshes that have not changed",
+        default=False
+    )
+    
+    cache_size_mb: IntProperty(
+        name="Cache Size (MB)",
+        description="Maximum disk space for cached meshes, least recently used entries are evicted first",
+        default=1024,
+        min=16,
+        max=65536
+    )
+    
+    # Parallel processing
+    use_parallel: BoolProperty(
+        name="Parallel Workers",
+        description="Split objects into shards and optimize each shard in a background Blender process",
+        default=False
+    )
+    
+    worker_count: IntProperty(
+        name="Workers",
+        description="Number of background Blender processes to run at once",
+        default=4,
+        min=1,
+        max=64
+    )
+    
+    # Undo
+    undo_mode: EnumProperty(
+        name="Undo",
+        description="How much undo history the run records",
+        items=[
+            ('SINGLE', "Single Step", "Record the whole run as one undo step"),
+            ('NONE', "Off", "Turn global undo off for the run, so not even its own undo step is recorded (lowest memory, the run cannot be undone)")
+        ],
+        default='SINGLE'
+    )
 
     @classmethod
     def poll(cls, context):
@@ -92,32 +384,157 @@ class MESH_OT_batch_optimize(Operator):
 
     def apply_preset(self):
         """Apply preset values"""
-        if self.optimization_preset == 'CAD_IMPORT':
-            self.enable_vertex_merge = True
-            self.enable_decimation = True
-            self.enable_dual_uv = True
-            self.enable_lod_generation = False
-            self.merge_distance = 0.0001
-            self.decimate_ratio = 0.6
-            
-        elif self.optimization_preset == 'GAME_ASSET':
-            self.enable_vertex_merge = True
-            self.enable_decimation = True
-            self.enable_dual_uv = True
-            self.enable_lod_generation = True
-            self.merge_distance = 0.0001
-            self.decimate_ratio = 0.5
-            self.lod_count = 3
+        for name, value in PRESET_SETTINGS.get(self.optimization_preset, {}).items():
+            setattr(self, name, value)
+
+    def allocate_budget(self, mesh_objects):
+        """Split the triangle budget over all meshes once, before any step runs"""
+        self.budget_targets = {}
+        if self.enable_decimation and self.decimate_target == 'BUDGET':
+            self.budget_targets = budget.budget_targets(helpers.group_by_mesh(mesh_objects), self.triangle_budget,
+                                                        self.max_object_triangles)
+
+    def subset_budget(self, objects):
+        """Share of the triangle budget that belongs to some of the objects"""
+        total = sum(self.budget_targets.get(mesh, 0.0) for mesh in helpers.group_by_mesh(objects))
+        # 0 would mean no limit at all
+        return max(1, int(total))
+
+    def step_arguments(self, step, objects=None):
+        """Operator arguments used for a pipeline step
+
+        With a triangle budget, the decimation of objects only gets their
+        share of it, so steps may run on parts of the selection.
+        """
+        if step == 'MERGE':
+            return {
+                "distance_mode": self.merge_distance_mode,
+                "merge_distance": self.merge_distance,
+                "use_sharp_edge_from_normals": True,
+                "remove_doubles": True,
+                "dissolve_degenerate": True,
+                "delete_loose": True,
+                "recalculate_normals": True,
+            }
+        elif step == 'DECIMATE':
+            arguments = {
+                "ratio": self.decimate_ratio,
+                "use_weighted_normals": True,
+                "use_auto_smooth": True,
+                "apply_modifiers": True,
+            }
+            if self.decimate_target == 'BUDGET':
+                arguments.update({
+                    "target_mode": 'BUDGET',
+                    "triangle_budget": self.subset_budget(objects) if objects else self.triangle_budget,
+                    "max_object_triangles": self.max_object_triangles,
+                    "budget_weighting": 'SCREEN_SIZE',
+                })
+            return arguments
+        elif step == 'UV':
+            return {
+                "uv0_enabled": True,
+                "uv0_method": 'SMART',
+                "uv0_pack_islands": True,
+                "uv1_enabled": True,
+                "uv1_method": 'ATLAS',
+                "multi_object_mode": True,
+            }
+        elif step == 'COMBINE':
+            return {
+                "cluster_size": self.combine_cluster_size,
+                "rebuild_lightmap": True,
+                # A modal run keeps the originals until it cannot be rolled back anymore
+                "remove_originals": getattr(self, "rollback", None) is None,
+            }
+        elif step == 'EXPORT':
+            return {
+                "directory": self.export_directory,
+                "file_format": self.export_format,
+                "export_mode": self.export_mode,
+                "target_engine": self.target_engine,
+            }
+        else:  # LOD
+            arguments = {
+                "lod_count": self.lod_count,
+                "target_engine": self.target_engine,
+                "use_progressive": True,
+                "use_weighted_normals": True,
+                "create_collection": True,
+            }
+            if self.lod_pixel_error > 0:
+                arguments["use_screen_size"] = True
+                arguments["pixel_error"] = self.lod_pixel_error
+            return arguments
+
+    def select_objects(self, context, objects):
+        """Select exactly these objects, which the next sub-operator will process"""
+        for obj in context.selected_objects:
+            obj.select_set(False)
+        for obj in objects:
+            obj.select_set(True)
+        if objects:
+            context.view_layer.objects.active = objects[0]
+
+    def run_step(self, context, step, objects, announce=True):
+        """Run one pipeline step on objects, returns whether it finished"""
+        operator_name, message, failure = PIPELINE_STEPS[step]
+        if announce:
+            self.report({'INFO'}, message)
+        
+        # Sub-operators change the selection, so restore it before every step
+        self.select_objects(context, objects)
+        
+        try:
+            with profiler.record(self.bl_idname, step, objects):
+                result = getattr(bpy.ops.mesh, operator_name)('EXEC_DEFAULT', **self.step_arguments(step, objects))
+        except Exception as e:
+            self.report({'WARNING'}, f"{failure}: {str(e)}")
+            return False
+        
+        return 'FINISHED' in result
+
+    def load_from_cache(self, mesh_objects):
+        """Restore cached results, returning the cache, entries to store and objects still to optimize"""
+        cache = mesh_cache.MeshCache(mesh_cache.cache_directory(), self.cache_size_mb * 1024 * 1024)
+        
+        # Only the geometry steps are cached, LODs are always generated
+        settings = {
+            step: self.step_arguments(step)
+            for step, enabled in (('MERGE', self.enable_vertex_merge),
+                                  ('DECIMATE', self.enable_decimation),
+                                  ('UV', self.enable_dual_uv))
+            if enabled
+        }
+        
+        pending_objects = []
+        pending_entries = []
+        uncached_count = 0
+        for instances in helpers.group_by_mesh(mesh_objects).values():
+            # An entry only holds read_geometry() data, a hit would strip anything else
+            if any(mesh_arrays.has_unread_data(obj) for obj in instances):
+                pending_objects.extend(instances)
+                uncached_count += 1
+                continue
             
-        elif self.optimization_preset == 'VR_OPTIMIZED':
-            self.enable_vertex_merge = True
-            self.enable_decimation = True
-            self.enable_dual_uv = True
-            self.enable_lod_generation = True
-            self.merge_distance = 0.0001
-            self.decimate_ratio = 0.3
-            self.lod_count = 4
+            mesh_settings = settings
+            if 'DECIMATE' in settings and self.budget_targets:
+                # A budgeted mesh's result depends on its share, not on the whole budget
+                mesh_settings = dict(mesh_settings, DECIMATE=self.step_arguments('DECIMATE', instances))
+            if 'MERGE' in settings and self.merge_distance_mode == 'ADAPTIVE':
+                # The adaptive distance floor is converted through the scale of the merged instance
+                scale = [round(axis, 6) for axis in instances[0].matrix_world.to_scale()]
+                mesh_settings = dict(mesh_settings, MERGE=dict(settings['MERGE'], world_scale=scale))
+            key = mesh_cache.mesh_hash(instances[0].data, mesh_settings)
+            if not cache.load(key, instances[0].data):
+                pending_objects.extend(instances)
+                pending_entries.append((instances[0], key))
+        
+        if uncached_count:
+            self.report({'INFO'}, f"{uncached_count} meshes with vertex groups, seams or custom attributes bypass the cache")
+        return cache, pending_entries, pending_objects
 
+    @profiler.profiled
     def execute(self, context):
         """Execute the batch optimization"""
         mesh_objects = [obj for obj in context.selected_objects if obj.type == 'MESH']
@@ -126,68 +543,451 @@ class MESH_OT_batch_optimize(Operator):
             self.report({'WARNING'}, "No mesh objects selected")
             return {'CANCELLED'}
         
-        self.report({'INFO'}, f"Batch optimizing {len(mesh_objects)} objects with preset: {self.optimization_preset}")
+        unique_count = len(helpers.group_by_mesh(mesh_objects))
+        self.report({'INFO'}, f"Batch optimizing {len(mesh_objects)} objects ({unique_count} unique meshes) with preset: {self.optimization_preset}")
         
-        # Step 1: Merge vertices
-        if self.enable_vertex_merge:
-            self.report({'INFO'}, "Step 1/4: Merging vertices...")
+        self.allocate_budget(mesh_objects)
+        self.begin_undo_suspension(context)
+        
+        if self.use_parallel:
             try:
-                bpy.ops.mesh.smart_vertex_merge('EXEC_DEFAULT',
-                    merge_distance=self.merge_distance,
-                    use_sharp_edge_from_normals=True,
-                    remove_doubles=True,
-                    dissolve_degenerate=True,
-                    delete_loose=True,
-                    recalculate_normals=True
-                )
-            except Exception as e:
-                self.report({'WARNING'}, f"Vertex merge failed: {str(e)}")
+                return self.execute_parallel(context, mesh_objects)
+            finally:
+                self.end_undo_suspension(context)
+        
+        # Started from the UI: snapshot for rollback before the cache touches any mesh
+        rollback = None
+        if getattr(self, "interactive", False) and context.window:
+            rollback = BatchRollback(mesh_objects)
+        
+        # Steps share one snapshot of every mesh instead of each reading it again
+        mesh_snapshot.begin_shared()
+        try:
+            # Meshes found in the cache skip the geometry steps entirely
+            cache = None
+            pending_entries = []
+            pending_objects = mesh_objects
+            if self.use_cache:
+                cache, pending_entries, pending_objects = self.load_from_cache(mesh_objects)
+            
+            if rollback is not None:
+                return self.start_modal(context, mesh_objects, rollback, cache, pending_entries, pending_objects)
+            
+            return self.run_steps(context, mesh_objects, cache, pending_entries, pending_objects)
+        
+        finally:
+            # A modal run keeps sharing and undo suspended until end_modal()
+            if rollback is None:
+                mesh_snapshot.end_shared()
+                self.end_undo_suspension(context)
+
+    def begin_undo_suspension(self, context):
+        """Measure the memory before the run and turn global undo off for undo_mode NONE"""
+        self.memory_before = profiler.current_memory()
+        self.global_undo = None
+        
+        if self.undo_mode == 'NONE':
+            edit_preferences = context.preferences.edit
+            self.global_undo = edit_preferences.use_global_undo
+            edit_preferences.use_global_undo = False
+
+    def end_undo_suspension(self, context):
+        """Schedule global undo to come back and report the memory measured around the run"""
+        if self.global_undo is not None:
+            if bpy.app.background:
+                # No event loop runs timers here, headless runs call the operator without an undo push instead
+                context.preferences.edit.use_global_undo = self.global_undo
+            else:
+                # Blender pushes the operator's undo step after it returns, global undo must still be off then
+                bpy.app.timers.register(functools.partial(restore_global_undo, self.global_undo), first_interval=0.0)
+            self.global_undo = None
+        
+        megabyte = 1024 * 1024
+        before = self.memory_before / megabyte
+        after = profiler.current_memory() / megabyte
+        peak = profiler.peak_memory() / megabyte
+        undo = "off" if self.undo_mode == 'NONE' else "single step"
+        if after:
+            # The undo step itself is pushed after the operator returns, so it is not part of "after"
+            self.report({'INFO'}, f"Resident memory {before:.0f} MB -> {after:.0f} MB "
+                                  f"({after - before:+.0f} MB), process peak {peak:.0f} MB, undo {undo}")
+        elif peak:
+            self.report({'INFO'}, f"Process peak memory {peak:.0f} MB, undo {undo}")
+
+    def run_steps(self, context, mesh_objects, cache, pending_entries, pending_objects):
+        """Run the enabled pipeline steps one after another"""
+        completed = True
+        
+        # Step 1: Merge vertices
+        if self.enable_vertex_merge and pending_objects:
+            completed &= self.run_step(context, 'MERGE', pending_objects)
         
         # Step 2: Decimate mesh
-        if self.enable_decimation:
-            self.report({'INFO'}, "Step 2/4: Decimating mesh...")
-            try:
-                bpy.ops.mesh.auto_decimate('EXEC_DEFAULT',
-                    ratio=self.decimate_ratio,
-                    use_weighted_normals=True,
-                    use_auto_smooth=True,
-                    apply_modifiers=True
-                )
-            except Exception as e:
-                self.report({'WARNING'}, f"Decimation failed: {str(e)}")
+        if self.enable_decimation and pending_objects:
+            completed &= self.run_step(context, 'DECIMATE', pending_objects)
         
         # Step 3: Generate dual UV maps
-        if self.enable_dual_uv:
-            self.report({'INFO'}, "Step 3/4: Generating dual UV maps...")
-            try:
-                bpy.ops.mesh.dual_uv_unwrap('EXEC_DEFAULT',
-                    uv0_enabled=True,
-                    uv0_method='SMART',
-                    uv0_pack_islands=True,
-                    uv1_enabled=True,
-                    uv1_method='LIGHTMAP',
-                    multi_object_mode=True
-                )
-            except Exception as e:
-                self.report({'WARNING'}, f"UV unwrap failed: {str(e)}")
+        if self.enable_dual_uv and pending_objects:
+            completed &= self.run_step(context, 'UV', pending_objects)
+        
+        if cache:
+            self.store_in_cache(cache, pending_entries, completed)
         
-        # Step 4: Generate LODs
+        # Step 4: Combine small meshes, LODs are made for what comes out of it
+        if self.enable_mesh_combine:
+            self.run_step(context, 'COMBINE', mesh_objects)
+            mesh_objects = [obj for obj in context.selected_objects if obj.type == 'MESH']
+        
+        # Step 5: Generate LODs
         if self.enable_lod_generation:
-            self.report({'INFO'}, "Step 4/4: Generating LOD levels...")
+            self.run_step(context, 'LOD', mesh_objects)
+        
+        # Step 6: Export LOD groups
+        if self.enable_export:
+            self.run_step(context, 'EXPORT', mesh_objects)
+        
+        self.select_objects(context, [obj for obj in mesh_objects if obj.name in context.view_layer.objects])
+        self.report({'INFO'}, f"SUCCESS: Batch optimization complete!")
+        return {'FINISHED'}
+
+    def store_in_cache(self, cache, pending_entries, completed):
+        """Store the freshly optimized meshes and report the cache statistics"""
+        # Never cache the result of a step that did not finish
+        if completed:
+            for obj, key in pending_entries:
+                cache.store(key, obj.data)
+            cache.evict()
+        self.report({'INFO'}, cache.summary())
+
+    def start_modal(self, context, mesh_objects, rollback, cache, pending_entries, pending_objects):
+        """Run the pipeline from timer events in time-sliced chunks of meshes
+
+        Every step works through its meshes in chunks sized to take about
+        TIME_SLICE seconds, so the UI keeps redrawing and ESC can cancel the
+        run, which rolls all changes back.
+        """
+        steps = [(step, objects)
+                 for step, enabled, objects in (('MERGE', self.enable_vertex_merge, pending_objects),
+                                                ('DECIMATE', self.enable_decimation, pending_objects),
+                                                ('UV', self.enable_dual_uv, pending_objects),
+                                                ('COMBINE', self.enable_mesh_combine, mesh_objects),
+                                                ('LOD', self.enable_lod_generation, mesh_objects),
+                                                ('EXPORT', self.enable_export, mesh_objects))
+                 if enabled and objects]
+        
+        # Linked duplicates stay in one chunk so their mesh is processed once
+        self.steps = [(step, list(helpers.group_by_mesh(objects).values())) for step, objects in steps]
+        self.mesh_objects = mesh_objects
+        self.output_objects = mesh_objects
+        self.cache = cache
+        self.pending_entries = pending_entries
+        self.completed = True
+        self.rollback = rollback
+        
+        self.step_index = 0
+        self.group_index = 0
+        self.chunk_size = 1
+        self.step_stats = None
+        self.done = 0
+        self.total = sum(len(groups) for _, groups in self.steps)
+        
+        if self.steps:
+            self.begin_step(self.steps[0][0])
+        
+        wm = context.window_manager
+        wm.progress_begin(0, max(1, self.total))
+        self.timer = wm.event_timer_add(0.01, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def begin_step(self, step):
+        """Announce a step and reset its throughput counters"""
+        self.report({'INFO'}, PIPELINE_STEPS[step][1])
+        self.step_stats = {"objects": 0, "triangles": 0, "seconds": 0.0}
+        self.chunk_size = 1
+        
+        # The cache holds the geometry steps' results, which are final once combining, LODs or export start
+        if step in ('COMBINE', 'LOD', 'EXPORT') and self.cache:
+            self.store_in_cache(self.cache, self.pending_entries, self.completed)
+            self.cache = None
+        
+        # Combining replaced objects, LODs are made for and exported from the combined ones
+        if step in ('LOD', 'EXPORT') and self.output_objects is not self.mesh_objects:
+            groups = list(helpers.group_by_mesh(self.output_objects).values())
+            self.total += len(groups) - len(self.steps[self.step_index][1])
+            self.steps[self.step_index] = (step, groups)
+
+    def end_step(self, step):
+        """Report the throughput of a finished step"""
+        stats = self.step_stats
+        seconds = max(stats["seconds"], 1e-6)
+        self.report({'INFO'}, f"  {step}: {stats['objects']} objects in {stats['seconds']:.1f}s "
+                              f"({stats['objects'] / seconds:.1f} objects/s, "
+                              f"{stats['triangles'] / seconds:,.0f} triangles/s)")
+
+    def process_chunk(self, context):
+        """Run the current step on the next chunk of meshes, returns False once all steps are done"""
+        if self.step_index >= len(self.steps):
+            return False
+        
+        step, groups = self.steps[self.step_index]
+        chunk_size = len(groups) if step in WHOLE_SELECTION_STEPS else self.chunk_size
+        chunk = groups[self.group_index:self.group_index + chunk_size]
+        objects = [obj for instances in chunk for obj in instances]
+        triangles = sum(mesh_snapshot.get(instances[0].data).triangle_count for instances in chunk)
+        
+        start_time = time.perf_counter()
+        finished = self.run_step(context, step, objects, announce=False)
+        elapsed = time.perf_counter() - start_time
+        
+        if step == 'COMBINE':
+            self.output_objects = [obj for obj in context.selected_objects if obj.type == 'MESH']
+        elif step in ('MERGE', 'DECIMATE', 'UV'):
+            self.completed &= finished
+        
+        self.step_stats["objects"] += len(objects)
+        self.step_stats["triangles"] += triangles
+        self.step_stats["seconds"] += elapsed
+        
+        # Size the next chunk to fill one time slice at the measured speed
+        per_group = elapsed / len(chunk)
+        self.chunk_size = max(1, int(TIME_SLICE / max(per_group, 1e-4)))
+        
+        self.group_index += len(chunk)
+        self.done += len(chunk)
+        
+        if self.group_index >= len(groups):
+            self.end_step(step)
+            self.step_index += 1
+            self.group_index = 0
+            if self.step_index < len(self.steps):
+                self.begin_step(self.steps[self.step_index][0])
+        
+        return True
+
+    def update_status(self, context):
+        """Show progress and the current step's throughput in the status bar"""
+        context.window_manager.progress_update(self.done)
+        
+        if self.step_index >= len(self.steps):
+            return
+        
+        step = self.steps[self.step_index][0]
+        stats = self.step_stats
+        seconds = max(stats["seconds"], 1e-6)
+        context.workspace.status_text_set(
+            f"{PIPELINE_STEPS[step][1]} {self.done}/{self.total} meshes, "
+            f"{stats['objects'] / seconds:.1f} objects/s, {stats['triangles'] / seconds:,.0f} triangles/s "
+            f"(Esc to cancel)"
+        )
+
+    def end_modal(self, context):
+        """Remove the timer, progress bar and status text"""
+        wm = context.window_manager
+        wm.event_timer_remove(self.timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+        
+        # The profiling session, shared snapshots and undo suspension stayed open while the run was modal
+        profiler.end_session()
+        mesh_snapshot.end_shared()
+        self.end_undo_suspension(context)
+
+    def remove_combined_originals(self):
+        """Delete the objects combining only unlinked, now that the run cannot be cancelled anymore"""
+        originals = [obj for obj in self.mesh_objects if not obj.users_collection]
+        meshes = {obj.data for obj in originals}
+        bpy.data.batch_remove(originals)
+        bpy.data.batch_remove([mesh for mesh in meshes if not mesh.users])
+
+    def modal(self, context, event):
+        """Process chunks on timer events until done or cancelled"""
+        if event.type == 'ESC':
+            self.end_modal(context)
+            self.rollback.restore()
+            self.select_objects(context, self.mesh_objects)
+            self.report({'WARNING'}, "Batch optimization cancelled, all changes rolled back")
+            return {'CANCELLED'}
+        
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+        
+        deadline = time.perf_counter() + TIME_SLICE
+        while time.perf_counter() < deadline:
             try:
-                bpy.ops.mesh.generate_lods('EXEC_DEFAULT',
-                    lod_count=self.lod_count,
-                    target_engine=self.target_engine,
-                    use_progressive=True,
-                    use_weighted_normals=True,
-                    create_collection=True
-                )
+                more = self.process_chunk(context)
             except Exception as e:
-                self.report({'WARNING'}, f"LOD generation failed: {str(e)}")
+                self.end_modal(context)
+                self.rollback.restore()
+                self.report({'ERROR'}, f"Batch optimization failed, changes rolled back: {str(e)}")
+                return {'CANCELLED'}
+            
+            if not more:
+                if self.cache:
+                    self.store_in_cache(self.cache, self.pending_entries, self.completed)
+                self.end_modal(context)
+                self.rollback.release()
+                self.remove_combined_originals()
+                self.select_objects(context, [obj for obj in self.output_objects if obj.name in context.view_layer.objects])
+                self.report({'INFO'}, f"SUCCESS: Batch optimization complete!")
+                return {'FINISHED'}
         
-        self.report({'INFO'}, f"SUCCESS: Batch optimization complete!")
+        self.update_status(context)
+        return {'RUNNING_MODAL'}
+
+    def execute_parallel(self, context, mesh_objects):
+        """Optimize shards of objects in background workers and append the results"""
+        shards = shard_objects(mesh_objects, self.worker_count)
+        settings = self.as_keywords(ignore=("use_parallel", "worker_count"))
+        # Shards would overwrite each other's combined files, so export runs here after merging
+        settings["enable_export"] = False
+        # Shards are not spatial, neighbours in different shards would never be joined, so combining
+        # (and the LODs made from its results) runs here after merging as well
+        combine_here = self.enable_mesh_combine
+        if combine_here:
+            settings["enable_mesh_combine"] = False
+            settings["enable_lod_generation"] = False
+        # Nobody undoes inside a worker
+        settings["undo_mode"] = 'NONE'
+        work_dir = tempfile.mkdtemp(prefix="asset_optimizer_")
+        jobs = []
+        
+        try:
+            # Workers start from a snapshot of the current file
+            source_path = os.path.join(work_dir, "source.blend")
+            bpy.ops.wm.save_as_mainfile(filepath=source_path, copy=True, compress=False)
+            
+            self.report({'INFO'}, f"Starting {len(shards)} workers...")
+            
+            for index, shard in enumerate(shards):
+                job = {
+                    "addon": ADDON_MODULE,
+                    "addon_path": ADDON_PATH,
+                    "objects": [obj.name for obj in shard],
+                    "settings": dict(settings, triangle_budget=self.subset_budget(shard)) if self.budget_targets else settings,
+                    "output": os.path.join(work_dir, f"shard_{index}.blend"),
+                    "result": os.path.join(work_dir, f"shard_{index}.json"),
+                }
+                job_path = os.path.join(work_dir, f"job_{index}.json")
+                with open(job_path, "w", encoding="utf-8") as job_file:
+                    json.dump(job, job_file)
+                
+                process, log_file = helpers.start_worker(source_path, WORKER_SCRIPT, job_path,
+                                                         os.path.join(work_dir, f"shard_{index}.log"))
+                jobs.append((job, process, log_file))
+            
+            processed_count = 0
+            for job, process, log_file in jobs:
+                process.wait()
+                log_file.close()
+                
+                try:
+                    with open(job["result"], "r", encoding="utf-8") as result_file:
+                        result = json.load(result_file)
+                except (OSError, ValueError):
+                    result = {"status": "FAILED", "error": f"worker exited with code {process.returncode}"}
+                
+                if result["status"] != "OK":
+                    self.report({'WARNING'}, f"Worker failed on {len(job['objects'])} objects: {result['error']}")
+                    continue
+                
+                try:
+                    self.merge_shard_result(context, job, result)
+                except Exception as e:
+                    self.report({'WARNING'}, f"Could not merge the results of {len(job['objects'])} objects: {str(e)}")
+                    continue
+                processed_count += len(job["objects"])
+        
+        except Exception as e:
+            self.report({'ERROR'}, f"Parallel batch failed: {str(e)}")
+            return {'CANCELLED'}
+        
+        finally:
+            # Workers still running after a failure are stopped before their files go away
+            helpers.stop_workers((process, log_file) for _, process, log_file in jobs)
+            shutil.rmtree(work_dir, ignore_errors=True)
+        
+        merged_objects = [obj for obj in context.selected_objects if obj.type == 'MESH']
+        if combine_here:
+            self.run_step(context, 'COMBINE', merged_objects)
+            merged_objects = [obj for obj in context.selected_objects if obj.type == 'MESH']
+            if self.enable_lod_generation:
+                self.run_step(context, 'LOD', merged_objects)
+        
+        if self.enable_export:
+            self.run_step(context, 'EXPORT', merged_objects)
+        
+        self.report({'INFO'}, f"SUCCESS: Batch optimization complete! ({processed_count}/{len(mesh_objects)} objects, {len(shards)} workers)")
         return {'FINISHED'}
 
+    def merge_shard_result(self, context, job, result):
+        """Replace the shard's original objects with the optimized ones from the worker file
+
+        The file is appended before anything is removed, so a failing load
+        leaves the originals in place.
+        """
+        # Remember where the originals lived
+        originals = []
+        original_collections = {}
+        for name in job["objects"]:
+            obj = bpy.data.objects.get(name)
+            if obj:
+                # Combined originals no longer exist in the worker's result
+                if name in result["objects"]:
+                    original_collections[result["objects"][name]] = list(obj.users_collection)
+                originals.append(obj)
+        
+        # Move the originals and the shared local data out of the way, so appended datablocks keep their names
+        local_data = {attribute: {id_data.name: id_data for id_data in getattr(bpy.data, attribute)
+                                  if id_data.library is None}
+                      for attribute in SHARED_DATA}
+        shared = [id_data for by_name in local_data.values() for id_data in by_name.values()]
+        renamed = [(id_data, id_data.name) for id_data in (*originals, *shared)]
+        for index, (id_data, _) in enumerate(renamed):
+            id_data.name = f"asset_optimizer_merge_{index}"
+        
+        wanted_objects = set(result["objects"].values()) | set(result["new_objects"])
+        wanted_collections = set(result["new_collections"])
+        
+        try:
+            with bpy.data.libraries.load(job["output"], link=False) as (data_from, data_to):
+                data_to.collections = [name for name in data_from.collections if name in wanted_collections]
+                data_to.objects = [name for name in data_from.objects if name in wanted_objects]
+        except Exception:
+            for id_data, name in renamed:
+                id_data.name = name
+            raise
+        
+        # Appended copies of local materials, node groups and images are replaced by the local ones
+        duplicates = []
+        for attribute, by_name in local_data.items():
+            for id_data in getattr(bpy.data, attribute):
+                local = by_name.get(id_data.name)
+                if local is not None and id_data.library is None:
+                    id_data.user_remap(local)
+                    duplicates.append(id_data)
+        bpy.data.batch_remove(duplicates)
+        for id_data, name in renamed[len(originals):]:
+            id_data.name = name
+        
+        # The originals go only now, with meshes that no one else uses
+        original_meshes = {obj.data for obj in originals}
+        bpy.data.batch_remove(originals)
+        bpy.data.batch_remove([mesh for mesh in original_meshes if not mesh.users])
+        
+        for collection in data_to.collections:
+            if collection and collection.name not in context.scene.collection.children:
+                context.scene.collection.children.link(collection)
+        
+        # Objects that did not come in with a collection go back where the original was
+        for obj in data_to.objects:
+            if obj is None:
+                continue
+            if not obj.users_collection:
+                for collection in original_collections.get(obj.name, [context.scene.collection]):
+                    collection.objects.link(obj)
+            obj.select_set(True)
+
     def draw(self, context):
         """Draw the operator properties in the UI"""
         layout = self.layout
@@ -208,7 +1008,9 @@ class MESH_OT_batch_optimize(Operator):
         box.prop(self, "enable_vertex_merge")
         box.prop(self, "enable_decimation")
         box.prop(self, "enable_dual_uv")
+        box.prop(self, "enable_mesh_combine")
         box.prop(self, "enable_lod_generation")
+        box.prop(self, "enable_export")
         
         layout.separator()
         
@@ -218,19 +1020,64 @@ class MESH_OT_batch_optimize(Operator):
             box.label(text="Quick Settings", icon='SETTINGS')
             
             if self.enable_vertex_merge:
-                box.prop(self, "merge_distance")
+                box.prop(self, "merge_distance_mode")
+                if self.merge_distance_mode == 'FIXED':
+                    box.prop(self, "merge_distance")
             
             if self.enable_decimation:
-                box.prop(self, "decimate_ratio", slider=True)
+                box.prop(self, "decimate_target")
+                if self.decimate_target == 'BUDGET':
+                    box.prop(self, "triangle_budget")
+                    box.prop(self, "max_object_triangles")
+                else:
+                    box.prop(self, "decimate_ratio", slider=True)
+            
+            if self.enable_mesh_combine:
+                box.prop(self, "combine_cluster_size")
             
             if self.enable_lod_generation:
                 box.prop(self, "lod_count")
+                box.prop(self, "lod_pixel_error")
+                box.prop(self, "target_engine")
+        
+        # Export
+        if self.enable_export:
+            box = layout.box()
+            box.label(text="Export", icon='EXPORT')
+            box.prop(self, "export_directory")
+            box.prop(self, "export_format")
+            box.prop(self, "export_mode")
+            if not self.enable_lod_generation or self.optimization_preset != 'CUSTOM':
                 box.prop(self, "target_engine")
+        
+        # Result cache
+        box = layout.box()
+        box.label(text="Result Cache", icon='FILE_CACHE')
+        box.prop(self, "use_cache")
+        
+        if self.use_cache:
+            box.prop(self, "cache_size_mb")
+        
+        # Parallel processing
+        box = layout.box()
+        box.label(text="Parallel Processing", icon='SYSTEM')
+        box.prop(self, "use_parallel")
+        
+        if self.use_parallel:
+            box.prop(self, "worker_count")
+        
+        # Undo
+        box = layout.box()
+        box.label(text="Undo", icon='LOOP_BACK')
+        box.prop(self, "undo_mode", expand=True)
 
     def invoke(self, context, event):
         """Show dialog before executing"""
         # Apply preset defaults
         self.apply_preset()
+        
+        # Started from the UI: run modal with progress instead of blocking (redo and scripts stay synchronous)
+        self.interactive = True
         return context.window_manager.invoke_props_dialog(self, width=400)
 
 
@@ -0,0 +1,98 @@
+"""Background worker for parallel batch optimization
+
+MESH_OT_batch_optimize starts one of these per shard of objects:
+
+    blender --background source.blend --python batch_worker.py -- job.json
+
+The job file names the addon module and the directory it is imported from,
+the objects of the shard, the batch settings and where to write the
+optimized .blend and the result summary.
+"""
+import importlib
+import json
+import sys
+import traceback
+
+import bpy
+
+
+def existing_name(obj):
+    """Current name of an object, or None when it was removed"""
+    try:
+        return obj.name
+    except ReferenceError:
+        return None
+
+
+def run_job(job):
+    """Optimize the objects of one shard and save them for the main file to append"""
+    view_layer = bpy.context.view_layer
+    shard_names = set(job["objects"])
+    shard = [bpy.data.objects[name] for name in job["objects"] if name in bpy.data.objects]
+
+    if not shard:
+        raise RuntimeError("None of the shard objects exist in the source file")
+
+    existing_objects = set(bpy.data.objects.keys())
+    existing_collections = set(bpy.data.collections.keys())
+
+    # Select only this shard so the batch operator processes nothing else
+    for obj in view_layer.objects:
+        obj.select_set(obj.name in shard_names)
+    view_layer.objects.active = shard[0]
+
+    bpy.ops.mesh.batch_optimize('EXEC_DEFAULT', **job["settings"], use_parallel=False)
+
+    # Operators may rename objects (LOD0 naming) or join them away, so report the final names
+    result = {
+        "objects": {name: final_name for name, final_name in zip(job["objects"], map(existing_name, shard))
+                    if final_name is not None},
+        "new_objects": [name for name in bpy.data.objects.keys() if name not in existing_objects],
+        "new_collections": [name for name in bpy.data.collections.keys() if name not in existing_collections],
+    }
+
+    bpy.ops.wm.save_as_mainfile(filepath=job["output"], copy=True, compress=False)
+    return result
+
+
+def load_addon(job):
+    """Enable the addon, the installed copy if there is one, otherwise imported from the job's path"""
+    import addon_utils
+    if job["addon"] in bpy.context.preferences.addons:
+        return
+
+    if any(module.__name__ == job["addon"] for module in addon_utils.modules()):
+        addon_utils.enable(job["addon"], default_set=False)
+        return
+
+    # Not installed (the main process ran with --factory-startup): import it like cli.load_addon()
+    sys.path.insert(0, job["addon_path"])
+    importlib.import_module(job["addon"]).register()
+
+
+def main():
+    """Load the job file given after '--', enable the addon and run the job"""
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if not argv:
+        print("batch_worker: missing job file argument")
+        sys.exit(2)
+
+    with open(argv[0], "r", encoding="utf-8") as job_file:
+        job = json.load(job_file)
+
+    try:
+        load_addon(job)
+        result = run_job(job)
+        result["status"] = "OK"
+    except Exception as e:
+        traceback.print_exc()
+        result = {"status": "FAILED", "error": str(e)}
+
+    with open(job["result"], "w", encoding="utf-8") as result_file:
+        json.dump(result, result_file)
+
+    sys.exit(0 if result["status"] == "OK" else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,15 @@
 import bpy
 from bpy.types import Operator
-from bpy.props import FloatProperty, BoolProperty, EnumProperty
+from bpy.props import FloatProperty, BoolProperty, EnumProperty, IntProperty
+from ..utils import helpers
+from ..utils import mesh_snapshot
+from ..utils import profiler
+from ..utils import uv_layers
+from ..utils import uv_pack
+
+
+# Atlas size UV0 margins are converted to pixels at when UV0 is packed per mesh
+UV0_PACK_RESOLUTION = 1024
 
 
 class MESH_OT_dual_uv_unwrap(Operator):
@@ -78,10 +87,27 @@ class MESH_OT_dual_uv_unwrap(Operator):
         name="UV1 Method",
         description="Unwrapping method for UV1 (lightmaps need non-overlapping UVs)",
         items=[
+            ('ATLAS', "Chart Packer", "Smart UV charts packed per mesh at the lightmap resolution (recommended for lightmaps)"),
             ('SMART', "Smart UV Project", "Smart UV projection"),
-            ('LIGHTMAP', "Lightmap Pack", "Lightmap packing (recommended for lightmaps)"),
+            ('LIGHTMAP', "Lightmap Pack", "Blender's lightmap packing"),
         ],
-        default='LIGHTMAP'
+        default='ATLAS'
+    )
+    
+    uv1_resolution: IntProperty(
+        name="Lightmap Resolution",
+        description="Lightmap size in pixels the UV1 charts are packed for",
+        default=1024,
+        min=64,
+        max=8192
+    )
+    
+    uv1_padding: IntProperty(
+        name="Lightmap Padding",
+        description="Minimum gap in pixels between UV1 charts and to the lightmap border",
+        default=4,
+        min=0,
+        max=64
     )
     
     uv1_margin: FloatProperty(
@@ -116,9 +142,15 @@ class MESH_OT_dual_uv_unwrap(Operator):
         max=1.0
     )
     
+    remove_stray_uv_layers: BoolProperty(
+        name="Remove Extra UV Layers",
+        description="Delete UV layers other than UVMap and UVMap_Lightmap to keep memory and export size down",
+        default=True
+    )
+    
     multi_object_mode: BoolProperty(
         name="Multi-Object Mode",
-        description="Process multiple objects, each with its own UV space",
+        description="Unwrap all objects in one multi-object Edit Mode session, then pack each object into its own UV space",
         default=True
     )
 
@@ -128,36 +160,23 @@ class MESH_OT_dual_uv_unwrap(Operator):
         return (context.selected_objects and
                 any(obj.type == 'MESH' for obj in context.selected_objects))
 
-    def create_or_get_uv_layer(self, obj, layer_name, index):
-        """Create or get UV layer at specific index"""
-        # Check if UV layer exists
-        uv_layer = obj.data.uv_layers.get(layer_name)
-        
-        if uv_layer:
-            # Set as active
-            obj.data.uv_layers.active_index = obj.data.uv_layers.find(layer_name)
-        else:
-            # Create new UV layer
-            uv_layer = obj.data.uv_layers.new(name=layer_name)
-            
-            # Move to correct index if possible
-            if len(obj.data.uv_layers) > 1:
-                # Move to target index
-                current_index = len(obj.data.uv_layers) - 1
-                while current_index > index and current_index > 0:
-                    obj.data.uv_layers.active_index = current_index
-                    bpy.ops.mesh.uv_texture_add()
-                    obj.data.uv_layers.active_index = current_index - 1
-                    current_index -= 1
-            
-            obj.data.uv_layers.active_index = index
+    def prepare_uv_layers(self, obj):
+        """Put UVMap at index 0 and UVMap_Lightmap at index 1 of the object's mesh"""
+        mesh = obj.data
+        names = [uv_layers.TEXTURE_LAYER]
+        if self.uv1_enabled or uv_layers.LIGHTMAP_LAYER in mesh.uv_layers:
+            names.append(uv_layers.LIGHTMAP_LAYER)
         
-        return uv_layer
+        removed = uv_layers.ensure_uv_layers(mesh, names, prune=self.remove_stray_uv_layers)
+        if removed:
+            self.report({'INFO'}, f"  {obj.name}: removed stray UV layers {', '.join(removed)}")
 
-    def unwrap_uv_layer(self, obj, method, angle_limit, margin, pack, pack_margin, rotate, area_weight):
-        """Unwrap current UV layer with specified method"""
-        # Enter edit mode
-        bpy.ops.object.mode_set(mode='EDIT')
+    def unwrap_uv_layer(self, method, angle_limit, margin, pack, pack_margin, rotate, area_weight):
+        """Unwrap the active UV layer of every mesh in Edit Mode with specified method
+
+        Expects Edit Mode to be entered by the caller, so several layers or
+        objects can share one edit session.
+        """
         bpy.ops.mesh.select_all(action='SELECT')
         
         if method == 'SMART':
@@ -180,7 +199,7 @@ class MESH_OT_dual_uv_unwrap(Operator):
                 PREF_PACK_IN_ONE=True,
                 PREF_NEW_UVLAYER=False,
                 PREF_APPLY_IMAGE=False,
-                PREF_IMG_PX_SIZE=1024,
+                PREF_IMG_PX_SIZE=self.uv1_resolution,
                 PREF_BOX_DIV=48,
                 PREF_MARGIN_DIV=margin
             )
@@ -199,10 +218,118 @@ class MESH_OT_dual_uv_unwrap(Operator):
             bpy.ops.uv.sphere_project(correct_aspect=self.correct_aspect)
             if pack:
                 bpy.ops.uv.pack_islands(margin=pack_margin, rotate=rotate)
+
+    def unwrap_uv0(self, pack=True):
+        """Unwrap the active layer with the UV0 (texturing) settings
+
+        Without pack, islands are left for pack_texture_uvs() to pack per mesh.
+        """
+        self.unwrap_uv_layer(
+            self.uv0_method,
+            self.uv0_angle_limit,
+            self.uv0_island_margin,
+            self.uv0_pack_islands and pack,
+            self.uv0_pack_margin,
+            self.uv0_rotate,
+            self.area_weight
+        )
+
+    def unwrap_uv1(self):
+        """Unwrap the active layer with the UV1 (lightmapping) settings
+
+        The chart packer only projects here; the charts are packed by
+        pack_lightmaps() once back in Object Mode.
+        """
+        if self.uv1_method == 'ATLAS':
+            self.unwrap_uv_layer('SMART', self.uv1_angle_limit, 0.0, False, 0.0, False, self.area_weight)
+            return
+        
+        self.unwrap_uv_layer(
+            self.uv1_method,
+            self.uv1_angle_limit,
+            self.uv1_margin,
+            False,  # Don't pack lightmaps separately
+            0.0,
+            False,
+            self.area_weight
+        )
+
+    def shares_uv0_space(self):
+        """Whether a multi-object UV0 unwrap lays the islands of all meshes out in one UV space"""
+        return self.uv0_method in {'SMART', 'LIGHTMAP'} or self.uv0_pack_islands
+
+    def pack_texture_uvs(self, objects):
+        """Pack the UV0 islands of every mesh into its own 0-1 space"""
+        padding = round(self.uv0_pack_margin * UV0_PACK_RESOLUTION)
+        for obj in objects:
+            # The unwrap just rewrote the UVs in Edit Mode
+            mesh_snapshot.discard(obj.data)
+            with profiler.record(self.bl_idname, "uv0_pack", obj=obj):
+                uv_pack.pack_mesh_lightmap(obj.data, uv_layers.TEXTURE_LAYER, UV0_PACK_RESOLUTION, padding,
+                                           rotate=self.uv0_rotate)
+
+    def pack_lightmaps(self, objects, per_mesh=False):
+        """Pack the UV1 charts of every mesh into its own lightmap and report the atlas usage
+
+        Only the chart packer packs here, unless per_mesh asks to separate the
+        meshes of a multi-object unwrap for any method.
+        """
+        if self.uv1_method != 'ATLAS' and not per_mesh:
+            return
         
-        # Return to object mode
-        bpy.ops.object.mode_set(mode='OBJECT')
+        for obj in objects:
+            # The unwrap just rewrote the UVs in Edit Mode
+            mesh_snapshot.discard(obj.data)
+            with profiler.record(self.bl_idname, "lightmap_pack", obj=obj):
+                utilization = uv_pack.pack_mesh_lightmap(obj.data, uv_layers.LIGHTMAP_LAYER, self.uv1_resolution, self.uv1_padding)
+            self.report({'INFO'}, f"  {obj.name}: lightmap atlas {utilization * 100:.1f}% used")
+
+    def unwrap_objects_together(self, context, objects):
+        """Unwrap all objects in one multi-object edit session per UV layer
 
+        UV layers can only be created and switched in Object Mode, so every mesh
+        gets its layers up front and the active layer is switched on all of them
+        between the two edit sessions. The projections lay out the islands of
+        all meshes in one UV space, so both layers are packed per mesh in
+        Object Mode afterwards.
+        """
+        for obj in objects:
+            self.prepare_uv_layers(obj)
+        
+        bpy.ops.object.select_all(action='DESELECT')
+        for obj in objects:
+            obj.select_set(True)
+        context.view_layer.objects.active = objects[0]
+        
+        # Generate UV0 (Texturing), packed per mesh so every object keeps its own UV space
+        if self.uv0_enabled:
+            for obj in objects:
+                obj.data.uv_layers.active = obj.data.uv_layers[uv_layers.TEXTURE_LAYER]
+            with profiler.record(self.bl_idname, "uv0", objects):
+                bpy.ops.object.mode_set(mode='EDIT')
+                self.unwrap_uv0(pack=False)
+                bpy.ops.object.mode_set(mode='OBJECT')
+            if self.shares_uv0_space():
+                self.pack_texture_uvs(objects)
+            self.report({'INFO'}, f"  UV0 generated for {len(objects)} meshes ({self.uv0_method})")
+        
+        # Generate UV1 (Lightmapping)
+        if self.uv1_enabled:
+            for obj in objects:
+                obj.data.uv_layers.active = obj.data.uv_layers[uv_layers.LIGHTMAP_LAYER]
+            with profiler.record(self.bl_idname, "uv1", objects):
+                bpy.ops.object.mode_set(mode='EDIT')
+                self.unwrap_uv1()
+                bpy.ops.object.mode_set(mode='OBJECT')
+            self.pack_lightmaps(objects, per_mesh=True)
+            self.report({'INFO'}, f"  UV1 generated for {len(objects)} meshes ({self.uv1_method})")
+        
+        # Set UV0 as active by default
+        if self.uv0_enabled:
+            for obj in objects:
+                obj.data.uv_layers.active_index = 0
+
+    @profiler.profiled
     def execute(self, context):
         """Execute the dual UV unwrapping operation"""
         original_active = context.active_object
@@ -223,81 +350,88 @@ class MESH_OT_dual_uv_unwrap(Operator):
         processed_count = 0
         failed_objects = []
         
-        self.report({'INFO'}, f"Processing {len(mesh_objects)} objects...")
+        # UV layers belong to the mesh, so linked duplicates are unwrapped once
+        unique_objects = [instances[0] for instances in helpers.group_by_mesh(mesh_objects).values()]
+        
+        self.report({'INFO'}, f"Processing {len(mesh_objects)} objects ({len(unique_objects)} unique meshes)...")
         
         try:
             # Ensure we're in Object mode
             if context.mode != 'OBJECT':
                 bpy.ops.object.mode_set(mode='OBJECT')
             
-            # Process each mesh object
-            for obj in mesh_objects:
-                try:
-                    # Verify object has geometry
-                    if len(obj.data.polygons) == 0:
-                        continue
-                    
-                    # Select only this object
-                    bpy.ops.object.select_all(action='DESELECT')
-                    obj.select_set(True)
-                    context.view_layer.objects.active = obj
-                    
-                    # Generate UV0 (Texturing)
-                    if self.uv0_enabled:
-                        uv0_layer = self.create_or_get_uv_layer(obj, "UVMap", 0)
-                        obj.data.uv_layers.active = uv0_layer
-                        
-                        self.unwrap_uv_layer(
-                            obj,
-                            self.uv0_method,
-                            self.uv0_angle_limit,
-                            self.uv0_island_margin,
-                            self.uv0_pack_islands,
-                            self.uv0_pack_margin,
-                            self.uv0_rotate,
-                            self.area_weight
-                        )
-                        
-                        self.report({'INFO'}, f"  {obj.name}: UV0 generated ({self.uv0_method})")
-                    
-                    # Generate UV1 (Lightmapping)
-                    if self.uv1_enabled:
-                        uv1_layer = self.create_or_get_uv_layer(obj, "UVMap_Lightmap", 1)
-                        obj.data.uv_layers.active = uv1_layer
-                        
-                        self.unwrap_uv_layer(
-                            obj,
-                            self.uv1_method,
-                            self.uv1_angle_limit,
-                            self.uv1_margin,
-                            False,  # Don't pack lightmaps separately
-                            0.0,
-                            False,
-                            self.area_weight
-                        )
-                        
-                        self.report({'INFO'}, f"  {obj.name}: UV1 generated ({self.uv1_method})")
-                    
-                    # Set UV0 as active by default
-                    if self.uv0_enabled and len(obj.data.uv_layers) > 0:
-                        obj.data.uv_layers.active_index = 0
-                    
-                    processed_count += 1
-                    
-                except Exception as obj_error:
-                    failed_objects.append(f"{obj.name}: {str(obj_error)}")
+            if self.multi_object_mode:
+                # One edit session per UV layer for all meshes together
+                objects = [obj for obj in unique_objects if len(obj.data.polygons) > 0]
+                if objects:
                     try:
+                        self.unwrap_objects_together(context, objects)
+                        processed_count = len(objects)
+                    except Exception as batch_error:
+                        failed_objects.extend(f"{obj.name}: {str(batch_error)}" for obj in objects)
                         if context.mode != 'OBJECT':
                             bpy.ops.object.mode_set(mode='OBJECT')
-                    except:
-                        pass
-                    continue
-        
+            else:
+                # Process each unique mesh on its own
+                for obj in unique_objects:
+                    try:
+                        # Verify object has geometry
+                        if len(obj.data.polygons) == 0:
+                            continue
+                        
+                        with profiler.record(self.bl_idname, "unwrap", obj=obj):
+                            # Select only this object
+                            bpy.ops.object.select_all(action='DESELECT')
+                            obj.select_set(True)
+                            context.view_layer.objects.active = obj
+                            
+                            self.prepare_uv_layers(obj)
+                            
+                            # Generate UV0 (Texturing)
+                            if self.uv0_enabled:
+                                obj.data.uv_layers.active = obj.data.uv_layers[uv_layers.TEXTURE_LAYER]
+                                
+                                bpy.ops.object.mode_set(mode='EDIT')
+                                self.unwrap_uv0()
+                                bpy.ops.object.mode_set(mode='OBJECT')
+                                
+                                self.report({'INFO'}, f"  {obj.name}: UV0 generated ({self.uv0_method})")
+                            
+                            # Generate UV1 (Lightmapping)
+                            if self.uv1_enabled:
+                                obj.data.uv_layers.active = obj.data.uv_layers[uv_layers.LIGHTMAP_LAYER]
+                                
+                                bpy.ops.object.mode_set(mode='EDIT')
+                                self.unwrap_uv1()
+                                bpy.ops.object.mode_set(mode='OBJECT')
+                                self.pack_lightmaps([obj])
+                                
+                                self.report({'INFO'}, f"  {obj.name}: UV1 generated ({self.uv1_method})")
+                            
+                            # Set UV0 as active by default
+                            if self.uv0_enabled and len(obj.data.uv_layers) > 0:
+                                obj.data.uv_layers.active_index = 0
+                        
+                        processed_count += 1
+                        
+                    except Exception as obj_error:
+                        failed_objects.append(f"{obj.name}: {str(obj_error)}")
+                        try:
+                            if context.mode != 'OBJECT':
+                                bpy.ops.object.mode_set(mode='OBJECT')
+                        except:
+                            pass
+                        continue
+            
         except Exception as e:
             self.report({'ERROR'}, f"Critical error: {str(e)}")
             return {'CANCELLED'}
         
         finally:
+            # Edit Mode rewrote the meshes, later steps must read them again
+            for obj in unique_objects:
+                mesh_snapshot.discard(obj.data)
+            
             # Restore original state
             try:
                 if context.mode != 'OBJECT':
@@ -317,9 +451,9 @@ class MESH_OT_dual_uv_unwrap(Operator):
         
         # Final report
         if failed_objects:
-            self.report({'WARNING'}, f"Completed: {processed_count}/{len(mesh_objects)} objects processed")
+            self.report({'WARNING'}, f"Completed: {processed_count}/{len(unique_objects)} meshes processed")
         else:
-            self.report({'INFO'}, f"SUCCESS: Dual UV unwrap completed for {processed_count} objects!")
+            self.report({'INFO'}, f"SUCCESS: Dual UV unwrap completed for {processed_count} meshes!")
         
         return {'FINISHED'}
 
@@ -358,9 +492,14 @@ class MESH_OT_dual_uv_unwrap(Operator):
         if self.uv1_enabled:
             col = box.column()
             col.prop(self, "uv1_method")
-            col.prop(self, "uv1_margin")
             
-            if self.uv1_method == 'SMART':
+            if self.uv1_method == 'ATLAS':
+                col.prop(self, "uv1_resolution")
+                col.prop(self, "uv1_padding")
+            else:
+                col.prop(self, "uv1_margin")
+            
+            if self.uv1_method in {'SMART', 'ATLAS'}:
                 col.prop(self, "uv1_angle_limit")
         
         layout.separator()
@@ -370,6 +509,7 @@ class MESH_OT_dual_uv_unwrap(Operator):
         box.label(text="General Settings", icon='SETTINGS')
         box.prop(self, "correct_aspect")
         box.prop(self, "area_weight")
+        box.prop(self, "remove_stray_uv_layers")
 
     def invoke(self, context, event):
         """Show dialog before executing"""
@@ -0,0 +1,78 @@
+"""Background worker for LOD group export
+
+MESH_OT_export_lod_groups starts one of these per share of the files:
+
+    blender --background source.blend --python export_worker.py -- job.json
+
+The job file names the addon module and the directory it is imported from,
+the files to write with the objects of every LOD group in them, the format
+and target engine, and where to write the result summary.
+"""
+import importlib
+import json
+import sys
+import traceback
+
+import bpy
+
+
+def run_job(job):
+    """Export the job's files, returns the written paths and per-file errors"""
+    lod_groups = importlib.import_module(job["addon"] + ".utils.lod_groups")
+    written = []
+    errors = []
+
+    for entry in job["files"]:
+        try:
+            groups = {name: [bpy.data.objects[object_name] for object_name in object_names]
+                      for name, object_names in entry["groups"].items()}
+            lod_groups.export_groups(bpy.context, groups, entry["path"], job["file_format"], job["target_engine"])
+            written.append(entry["path"])
+        except Exception as e:
+            traceback.print_exc()
+            errors.append(f"{entry['path']}: {str(e)}")
+
+    return {"written": written, "errors": errors}
+
+
+def load_addon(job):
+    """Enable the addon, the installed copy if there is one, otherwise imported from the job's path"""
+    import addon_utils
+    if job["addon"] in bpy.context.preferences.addons:
+        return
+
+    if any(module.__name__ == job["addon"] for module in addon_utils.modules()):
+        addon_utils.enable(job["addon"], default_set=False)
+        return
+
+    # Not installed (the main process ran with --factory-startup): import it like cli.load_addon()
+    sys.path.insert(0, job["addon_path"])
+    importlib.import_module(job["addon"]).register()
+
+
+def main():
+    """Load the job file given after '--', enable the addon and run the job"""
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if not argv:
+        print("export_worker: missing job file argument")
+        sys.exit(2)
+
+    with open(argv[0], "r", encoding="utf-8") as job_file:
+        job = json.load(job_file)
+
+    try:
+        load_addon(job)
+        result = run_job(job)
+        result["status"] = "OK"
+    except Exception as e:
+        traceback.print_exc()
+        result = {"status": "FAILED", "error": str(e)}
+
+    with open(job["result"], "w", encoding="utf-8") as result_file:
+        json.dump(result, result_file)
+
+    sys.exit(0 if result["status"] == "OK" else 1)
+
+
+if __name__ == "__main__":
+    main()
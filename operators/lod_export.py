@@ -0,0 +1,239 @@
+import bpy
+import json
+import os
+import shutil
+import tempfile
+from bpy.types import Operator
+from bpy.props import BoolProperty, EnumProperty, IntProperty, StringProperty
+from ..utils import helpers, lod_groups, profiler
+
+
+# Root module of the addon, enabled by the background workers
+ADDON_MODULE = __package__.rpartition('.')[0]
+
+# Directory the workers import the addon from when it is not installed (cli.py with --factory-startup)
+ADDON_PATH = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(__file__), "export_worker.py")
+
+
+class MESH_OT_export_lod_groups(Operator):
+    """Export LOD groups to FBX or glTF for Unity and Unreal Engine"""
+    bl_idname = "mesh.export_lod_groups"
+    bl_label = "Export LOD Groups"
+    bl_description = "Write every LOD group of the selection to its own file, or all into one, in background jobs"
+    bl_options = {'REGISTER'}
+    
+    directory: StringProperty(
+        name="Directory",
+        description="Folder the exported files are written to",
+        subtype='DIR_PATH'
+    )
+    
+    filter_folder: BoolProperty(
+        default=True,
+        options={'HIDDEN'}
+    )
+    
+    file_format: EnumProperty(
+        name="Format",
+        description="File format to export",
+        items=[
+            ('FBX', "FBX", "FBX with LodGroup nodes, imported as LODs by Unity and Unreal"),
+            ('GLB', "glTF Binary", "GLB with the LOD properties as extras")
+        ],
+        default='FBX'
+    )
+    
+    export_mode: EnumProperty(
+        name="Files",
+        description="How LOD groups are split into files",
+        items=[
+            ('PER_GROUP', "One per LOD Group", "Write every LOD group to its own file, named after the group"),
+            ('COMBINED', "Single File", "Write all LOD groups into one file")
+        ],
+        default='PER_GROUP'
+    )
+    
+    combined_name: StringProperty(
+        name="File Name",
+        description="Name of the combined file (default: the .blend file name)",
+        default=""
+    )
+    
+    target_engine: EnumProperty(
+        name="Target Engine",
+        description="Engine the FBX axis, scale and smoothing settings are chosen for",
+        items=[
+            ('UNITY', "Unity", "Unity"),
+            ('UNREAL', "Unreal", "Unreal Engine")
+        ],
+        default='UNITY'
+    )
+    
+    use_background_jobs: BoolProperty(
+        name="Background Jobs",
+        description="Export in background Blender processes working on a copy of the file",
+        default=True
+    )
+    
+    job_count: IntProperty(
+        name="Jobs",
+        description="Number of background Blender processes to export with at once",
+        default=4,
+        min=1,
+        max=64
+    )
+
+    @classmethod
+    def poll(cls, context):
+        """Check if the operator can be executed"""
+        return (context.selected_objects and
+                any(obj.type == 'MESH' for obj in context.selected_objects))
+
+    def plan_files(self, groups, directory):
+        """Files to write, as (path, {group name: objects}) pairs"""
+        extension = lod_groups.FORMAT_EXTENSIONS[self.file_format]
+        if self.export_mode == 'COMBINED':
+            name = self.combined_name or bpy.path.display_name_from_filepath(bpy.data.filepath) or "lod_groups"
+            return [(os.path.join(directory, bpy.path.clean_name(name) + extension), groups)]
+        return [(os.path.join(directory, bpy.path.clean_name(name) + extension), {name: members})
+                for name, members in groups.items()]
+
+    def export_here(self, context, files):
+        """Export the files one after another in this Blender, returns written paths and errors"""
+        written = []
+        errors = []
+        for path, groups in files:
+            try:
+                with profiler.record(self.bl_idname, "export", [obj for members in groups.values() for obj in members]):
+                    lod_groups.export_groups(context, groups, path, self.file_format, self.target_engine)
+                written.append(path)
+            except Exception as e:
+                errors.append(f"{path}: {str(e)}")
+        return written, errors
+
+    def export_in_background(self, context, files):
+        """Export the files in background jobs on a copy of this file, returns written paths and errors"""
+        job_count = min(self.job_count, len(files))
+        work_dir = tempfile.mkdtemp(prefix="asset_optimizer_export_")
+        written = []
+        errors = []
+        jobs = []
+        
+        try:
+            # Jobs start from a snapshot of the current file, so they may change it freely
+            source_path = os.path.join(work_dir, "source.blend")
+            bpy.ops.wm.save_as_mainfile(filepath=source_path, copy=True, compress=False)
+            
+            for index in range(job_count):
+                job = {
+                    "addon": ADDON_MODULE,
+                    "addon_path": ADDON_PATH,
+                    "files": [{"path": path, "groups": {name: [obj.name for obj in members]
+                                                        for name, members in groups.items()}}
+                              for path, groups in files[index::job_count]],
+                    "file_format": self.file_format,
+                    "target_engine": self.target_engine,
+                    "result": os.path.join(work_dir, f"export_{index}.json"),
+                }
+                job_path = os.path.join(work_dir, f"job_{index}.json")
+                with open(job_path, "w", encoding="utf-8") as job_file:
+                    json.dump(job, job_file)
+                
+                process, log_file = helpers.start_worker(source_path, WORKER_SCRIPT, job_path,
+                                                         os.path.join(work_dir, f"export_{index}.log"))
+                jobs.append((job, process, log_file))
+            
+            for job, process, log_file in jobs:
+                process.wait()
+                log_file.close()
+                
+                try:
+                    with open(job["result"], "r", encoding="utf-8") as result_file:
+                        result = json.load(result_file)
+                except (OSError, ValueError):
+                    result = {"status": "FAILED", "error": f"export job exited with code {process.returncode}"}
+                
+                if result["status"] != "OK":
+                    errors.append(f"{len(job['files'])} files: {result['error']}")
+                    continue
+                
+                written.extend(result["written"])
+                errors.extend(result["errors"])
+        
+        finally:
+            # Jobs still running after a failure are stopped before their files go away
+            helpers.stop_workers((process, log_file) for _, process, log_file in jobs)
+            shutil.rmtree(work_dir, ignore_errors=True)
+        
+        return written, errors
+
+    @profiler.profiled
+    def execute(self, context):
+        """Execute the LOD group export"""
+        groups = lod_groups.find_lod_groups(context.view_layer, context.selected_objects)
+        
+        if not groups:
+            self.report({'WARNING'}, "No mesh objects selected")
+            return {'CANCELLED'}
+        
+        directory = bpy.path.abspath(self.directory)
+        if not directory:
+            self.report({'ERROR'}, "No export directory set")
+            return {'CANCELLED'}
+        os.makedirs(directory, exist_ok=True)
+        
+        files = self.plan_files(groups, directory)
+        self.report({'INFO'}, f"Exporting {len(groups)} LOD groups to {len(files)} {self.file_format} files...")
+        
+        if self.use_background_jobs and len(files) > 1:
+            written, errors = self.export_in_background(context, files)
+        else:
+            written, errors = self.export_here(context, files)
+        
+        for error in errors:
+            self.report({'WARNING'}, f"Export failed: {error}")
+        
+        if not written:
+            self.report({'ERROR'}, "No files were exported")
+            return {'CANCELLED'}
+        
+        self.report({'INFO'}, f"SUCCESS: Exported {len(written)} files to {directory}")
+        return {'FINISHED'}
+
+    def draw(self, context):
+        """Draw the operator properties in the UI"""
+        layout = self.layout
+        
+        box = layout.box()
+        box.label(text="Export", icon='EXPORT')
+        box.prop(self, "target_engine", expand=True)
+        box.prop(self, "file_format")
+        box.prop(self, "export_mode")
+        
+        if self.export_mode == 'COMBINED':
+            box.prop(self, "combined_name")
+        
+        box = layout.box()
+        box.label(text="Background Jobs", icon='SYSTEM')
+        box.prop(self, "use_background_jobs")
+        
+        if self.use_background_jobs:
+            box.prop(self, "job_count")
+
+    def invoke(self, context, event):
+        """Pick the export folder, starting from the scene's target engine"""
+        self.target_engine = context.scene.vr_asset_optimizer.target_engine
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+
+def register():
+    """Register the operator"""
+    bpy.utils.register_class(MESH_OT_export_lod_groups)
+
+
+def unregister():
+    """Unregister the operator"""
+    bpy.utils.unregister_class(MESH_OT_export_lod_groups)
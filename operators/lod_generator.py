@@ -1,6 +1,7 @@
 import bpy
 from bpy.types import Operator
 from bpy.props import IntProperty, FloatProperty, BoolProperty, EnumProperty
+from ..utils import helpers, lod_groups, mesh_snapshot, profiler, qem, screen_lod
 
 
 class MESH_OT_generate_lods(Operator):
@@ -86,6 +87,53 @@ class MESH_OT_generate_lods(Operator):
         max=0.9
     )
     
+    # Screen size
+    use_screen_size: BoolProperty(
+        name="Screen Size LODs",
+        description="Derive the LOD count, ratios and transition heights of every object from its size "
+                    "and a target pixel error (LOD Levels becomes the maximum)",
+        default=False
+    )
+    
+    pixel_error: FloatProperty(
+        name="Pixel Error",
+        description="Largest on-screen edge length in pixels a level may show before the previous one is used",
+        default=1.0,
+        min=0.1,
+        max=32.0
+    )
+    
+    screen_resolution: IntProperty(
+        name="Screen Height",
+        description="Vertical resolution of the target display in pixels (per eye for VR)",
+        default=1080,
+        min=240,
+        max=8192
+    )
+    
+    vertical_fov: FloatProperty(
+        name="Vertical FOV",
+        description="Vertical field of view, used to turn transition heights into camera distances",
+        default=1.5708,  # 90 degrees
+        min=0.1,
+        max=3.0,
+        subtype='ANGLE'
+    )
+    
+    min_screen_height: FloatProperty(
+        name="Cull Height",
+        description="Screen height below which the object is culled, no level is made for smaller sizes",
+        default=0.01,
+        min=0.001,
+        max=0.5
+    )
+    
+    use_cascade: BoolProperty(
+        name="Cascade LODs",
+        description="Decimate each LOD from the previous level instead of the full-resolution original",
+        default=False
+    )
+    
     # Modifiers
     use_weighted_normals: BoolProperty(
         name="Add Weighted Normals",
@@ -106,7 +154,8 @@ class MESH_OT_generate_lods(Operator):
         items=[
             ('COLLAPSE', "Collapse", "Merge vertices together (best for organic)"),
             ('UNSUBDIV', "Un-Subdivide", "Remove subdivision levels"),
-            ('DISSOLVE', "Planar", "Dissolve geometry based on planar angle (best for CAD)")
+            ('DISSOLVE', "Planar", "Dissolve geometry based on planar angle (best for CAD)"),
+            ('QEM', "Quadric (Native)", "Built-in quadric error simplifier, all LODs from one collapse sequence. Runs in Python, for small meshes only; drops vertex groups, seams and color attributes")
         ],
         default='COLLAPSE'
     )
@@ -172,6 +221,7 @@ class MESH_OT_generate_lods(Operator):
         else:  # CUSTOM
             return f"{base_name}.LOD{lod_level}"
 
+    @profiler.profiled
     def execute(self, context):
         """Execute the LOD generation"""
         # Filter out non-mesh objects (ignore empties, cameras, lights, etc.)
@@ -188,149 +238,206 @@ class MESH_OT_generate_lods(Operator):
         
         processed_count = 0
         
+        # LOD meshes per source mesh, so linked duplicates reuse them instead of decimating again
+        shared_lod_meshes = {}
+        
+        # Full resolution meshes an LOD0 replaced, removed at the end once nothing uses them
+        replaced_meshes = set()
+        
         for original_obj in mesh_objects:
             try:
-                # Store original selection
-                original_poly_count = len(original_obj.data.polygons)
-                base_name = original_obj.name
-                
-                # Create collection for this object's LODs if requested
-                if self.create_collection:
-                    collection_name = f"{base_name}_LODs"
-                    if collection_name in bpy.data.collections:
-                        lod_collection = bpy.data.collections[collection_name]
-                    else:
-                        lod_collection = bpy.data.collections.new(collection_name)
-                        context.scene.collection.children.link(lod_collection)
-                
-                # For Unity, rename original object first to free up the base name
-                if self.target_engine == 'UNITY':
-                    original_obj.name = f"{base_name}_temp"
-                
-                # Create root empty for Unity LOD Group (only for Unity)
-                lod_root = None
-                if self.target_engine == 'UNITY':
-                    lod_root = bpy.data.objects.new(base_name, None)
-                    lod_root.empty_display_type = 'PLAIN_AXES'
-                    lod_root.empty_display_size = 1.0
+                with profiler.record(self.bl_idname, "lods", obj=original_obj):
+                    # Store original selection
+                    original_poly_count = len(original_obj.data.polygons)
+                    base_name = original_obj.name
+                    source_mesh = original_obj.data
+                    
+                    # Screen size LODs depend on the object's world size, so every object gets its own plan
+                    plan = None
+                    ratios = lod_ratios
+                    if self.use_screen_size:
+                        plan = screen_lod.plan_lods(original_obj, self.lod_count, self.progressive_factor,
+                                                    self.screen_resolution, self.pixel_error,
+                                                    self.min_screen_height)
+                        ratios = plan.ratios
                     
+                    shared_key = (source_mesh, tuple(ratios))
+                    shared_lods = shared_lod_meshes.get(shared_key)
+                    
+                    # Create collection for this object's LODs if requested
                     if self.create_collection:
-                        lod_collection.objects.link(lod_root)
-                    else:
-                        context.collection.objects.link(lod_root)
+                        collection_name = f"{base_name}_LODs"
+                        if collection_name in bpy.data.collections:
+                            lod_collection = bpy.data.collections[collection_name]
+                        else:
+                            lod_collection = bpy.data.collections.new(collection_name)
+                            context.scene.collection.children.link(lod_collection)
                     
-                    # Copy original transform
-                    lod_root.location = original_obj.location
-                    lod_root.rotation_euler = original_obj.rotation_euler
-                    lod_root.scale = original_obj.scale
-                
-                lod_objects = []
-                lod0_object = None
-                
-                # Generate each LOD level
-                for lod_level in range(self.lod_count):
-                    ratio = lod_ratios[lod_level]
+                    # For Unity, rename original object first to free up the base name
+                    if self.target_engine == 'UNITY':
+                        original_obj.name = f"{base_name}_temp"
                     
-                    # For LOD0, rename original or duplicate
-                    if lod_level == 0 and ratio >= 0.99:
-                        # Rename original as LOD0
-                        lod_obj = original_obj
-                        lod_obj.name = self.get_lod_name(base_name, lod_level)
-                    else:
-                        # Duplicate the original object
-                        lod_obj = original_obj.copy()
-                        lod_obj.data = original_obj.data.copy()
-                        lod_obj.name = self.get_lod_name(base_name, lod_level)
-                        context.collection.objects.link(lod_obj)
+                    # Create root empty for Unity LOD Group (only for Unity)
+                    lod_root = None
+                    if self.target_engine == 'UNITY':
+                        lod_root = bpy.data.objects.new(base_name, None)
+                        lod_root.empty_display_type = 'PLAIN_AXES'
+                        lod_root.empty_display_size = 1.0
+                        
+                        if self.create_collection:
+                            lod_collection.objects.link(lod_root)
+                        else:
+                            context.collection.objects.link(lod_root)
+                        
+                        # Copy original transform
+                        lod_root.location = original_obj.location
+                        lod_root.rotation_euler = original_obj.rotation_euler
+                        lod_root.scale = original_obj.scale
                     
-                    # Store LOD0 as parent reference
-                    if lod_level == 0:
-                        lod0_object = lod_obj
+                    # One collapse sequence serves every LOD level
+                    qem_levels = None
+                    if self.decimate_type == 'QEM' and not shared_lods:
+                        qem_levels = qem.simplify_mesh(original_obj.data, ratios)
                     
-                    # Move to LOD collection
-                    if self.create_collection:
-                        if lod_obj.name in context.collection.objects:
-                            context.collection.objects.unlink(lod_obj)
-                        if lod_obj.name not in lod_collection.objects:
-                            lod_collection.objects.link(lod_obj)
+                    lod_objects = []
+                    lod0_object = None
+                    previous_lod_obj = None
+                    previous_ratio = 1.0
                     
-                    # Apply decimation if not LOD0 or if LOD0 ratio < 1.0
-                    if lod_level > 0 or ratio < 1.0:
-                        # Add decimate modifier
-                        decimate_mod = lod_obj.modifiers.new(name=f"Decimate_LOD{lod_level}", type='DECIMATE')
-                        decimate_mod.decimate_type = self.decimate_type
+                    # Generate each LOD level
+                    for lod_level, ratio in enumerate(ratios):
+                        
+                        # The original always becomes LOD0, so no full resolution copy stays behind
+                        if lod_level == 0:
+                            lod_obj = original_obj
+                            lod_obj.name = self.get_lod_name(base_name, lod_level)
+                            if shared_lods:
+                                lod_obj.data = shared_lods[0]
+                            elif ratio < 1.0:
+                                # Decimate a copy, the other levels still start from the full mesh
+                                lod_obj.data = source_mesh.copy()
+                            if lod_obj.data != source_mesh:
+                                replaced_meshes.add(source_mesh)
+                        else:
+                            # Duplicate the original object (cascaded LODs start from the previous level)
+                            source_data = previous_lod_obj.data if self.use_cascade and previous_lod_obj else source_mesh
+                            lod_obj = original_obj.copy()
+                            if shared_lods:
+                                lod_obj.data = shared_lods[lod_level]
+                            else:
+                                lod_obj.data = source_data.copy()
+                            lod_obj.name = self.get_lod_name(base_name, lod_level)
+                            context.collection.objects.link(lod_obj)
                         
-                        if self.decimate_type == 'COLLAPSE':
-                            decimate_mod.ratio = ratio
-                            decimate_mod.use_collapse_triangulate = True
-                        elif self.decimate_type == 'DISSOLVE':
-                            decimate_mod.angle_limit = self.planar_angle
-                            decimate_mod.use_dissolve_boundaries = False
-                            # For planar, we still need to reduce complexity, so we apply multiple times
-                            # based on the target ratio
-                        elif self.decimate_type == 'UNSUBDIV':
-                            # Calculate iterations based on target ratio
-                            decimate_mod.iterations = max(1, int((1.0 - ratio) * 5))
+                        # Store LOD0 as parent reference
+                        if lod_level == 0:
+                            lod0_object = lod_obj
                         
-                        # Apply the modifier
-                        context.view_layer.objects.active = lod_obj
-                        bpy.ops.object.select_all(action='DESELECT')
-                        lod_obj.select_set(True)
-                        bpy.ops.object.modifier_apply(modifier=decimate_mod.name)
+                        # Move to LOD collection
+                        if self.create_collection:
+                            if lod_obj.name in context.collection.objects:
+                                context.collection.objects.unlink(lod_obj)
+                            if lod_obj.name not in lod_collection.objects:
+                                lod_collection.objects.link(lod_obj)
                         
-                        # For planar decimation, apply additional collapse decimation to reach target ratio
-                        if self.decimate_type == 'DISSOLVE':
-                            current_poly_count = len(lod_obj.data.polygons)
-                            target_poly_count = int(original_poly_count * ratio)
+                        # Cascaded LODs only remove what the previous level kept
+                        if self.use_cascade and previous_lod_obj:
+                            step_ratio = min(1.0, ratio / previous_ratio)
+                        else:
+                            step_ratio = ratio
+                        
+                        # Apply decimation if not LOD0 or if LOD0 ratio < 1.0
+                        # (shared LOD meshes were already decimated for an earlier instance)
+                        needs_decimation = (lod_level > 0 or ratio < 1.0) and not shared_lods
+                        
+                        if qem_levels and needs_decimation:
+                            mesh_snapshot.get(lod_obj.data).write_triangles(**qem_levels[lod_level])
+                        elif needs_decimation:
+                            # Add decimate modifier
+                            decimate_mod = lod_obj.modifiers.new(name=f"Decimate_LOD{lod_level}", type='DECIMATE')
+                            decimate_mod.decimate_type = self.decimate_type
                             
-                            if current_poly_count > target_poly_count:
-                                collapse_ratio = target_poly_count / current_poly_count
-                                collapse_mod = lod_obj.modifiers.new(name=f"Collapse_LOD{lod_level}", type='DECIMATE')
-                                collapse_mod.decimate_type = 'COLLAPSE'
-                                collapse_mod.ratio = collapse_ratio
-                                collapse_mod.use_collapse_triangulate = True
-                                bpy.ops.object.modifier_apply(modifier=collapse_mod.name)
-                    
-                    # Parent LODs based on target engine
-                    if self.target_engine == 'UNITY' and lod_root:
-                        # For Unity: Parent all LODs to root empty
-                        lod_obj.parent = lod_root
-                        lod_obj.matrix_parent_inverse = lod_root.matrix_world.inverted()
-                    elif lod_level > 0 and lod0_object:
-                        # For Unreal/Collection: Parent LOD1+ to LOD0
-                        lod_obj.parent = lod0_object
-                        lod_obj.matrix_parent_inverse = lod0_object.matrix_world.inverted()
-                    
-                    # Add weighted normals if requested
-                    if self.use_weighted_normals and lod_level > 0:
-                        wn_mod = lod_obj.modifiers.new(name="WeightedNormal", type='WEIGHTED_NORMAL')
-                        wn_mod.weight = 100
-                        wn_mod.mode = 'FACE_AREA'
-                        wn_mod.keep_sharp = True
-                    
-                    # Set auto smooth
-                    if self.use_auto_smooth:
-                        if bpy.app.version < (4, 1, 0):
-                            lod_obj.data.use_auto_smooth = True
-                            lod_obj.data.auto_smooth_angle = 0.523599  # 30 degrees
-                    
-                    # Shade smooth
-                    bpy.ops.object.shade_smooth()
+                            if self.decimate_type == 'COLLAPSE':
+                                decimate_mod.ratio = step_ratio
+                                decimate_mod.use_collapse_triangulate = True
+                            elif self.decimate_type == 'DISSOLVE':
+                                decimate_mod.angle_limit = self.planar_angle
+                                decimate_mod.use_dissolve_boundaries = False
+                                # For planar, we still need to reduce complexity, so we apply multiple times
+                                # based on the target ratio
+                            elif self.decimate_type == 'UNSUBDIV':
+                                # Calculate iterations based on target ratio
+                                iterations = int((1.0 - ratio) * 5)
+                                if self.use_cascade and previous_lod_obj:
+                                    iterations -= int((1.0 - previous_ratio) * 5)
+                                decimate_mod.iterations = max(1, iterations)
+                            
+                            # Apply the modifier
+                            helpers.bake_modifiers(context, lod_obj, [decimate_mod])
+                            
+                            # For planar decimation, apply additional collapse decimation to reach target ratio
+                            if self.decimate_type == 'DISSOLVE':
+                                current_poly_count = len(lod_obj.data.polygons)
+                                target_poly_count = int(original_poly_count * ratio)
+                                
+                                if current_poly_count > target_poly_count:
+                                    collapse_ratio = target_poly_count / current_poly_count
+                                    collapse_mod = lod_obj.modifiers.new(name=f"Collapse_LOD{lod_level}", type='DECIMATE')
+                                    collapse_mod.decimate_type = 'COLLAPSE'
+                                    collapse_mod.ratio = collapse_ratio
+                                    collapse_mod.use_collapse_triangulate = True
+                                    helpers.bake_modifiers(context, lod_obj, [collapse_mod])
+                        
+                        # Parent LODs based on target engine
+                        if self.target_engine == 'UNITY' and lod_root:
+                            # For Unity: Parent all LODs to root empty
+                            lod_obj.parent = lod_root
+                            lod_obj.matrix_parent_inverse = lod_root.matrix_world.inverted()
+                        elif lod_level > 0 and lod0_object:
+                            # For Unreal/Collection: Parent LOD1+ to LOD0
+                            lod_obj.parent = lod0_object
+                            lod_obj.matrix_parent_inverse = lod0_object.matrix_world.inverted()
+                        
+                        # Add weighted normals if requested
+                        if self.use_weighted_normals and lod_level > 0:
+                            wn_mod = lod_obj.modifiers.new(name="WeightedNormal", type='WEIGHTED_NORMAL')
+                            wn_mod.weight = 100
+                            wn_mod.mode = 'FACE_AREA'
+                            wn_mod.keep_sharp = True
+                        
+                        # Set auto smooth
+                        if self.use_auto_smooth:
+                            if bpy.app.version < (4, 1, 0):
+                                lod_obj.data.use_auto_smooth = True
+                                lod_obj.data.auto_smooth_angle = 0.523599  # 30 degrees
+                        
+                        # Shade smooth
+                        if not shared_lods:
+                            helpers.set_shade_smooth(lod_obj.data)
+                        
+                        lod_objects.append(lod_obj)
+                        previous_lod_obj = lod_obj
+                        previous_ratio = ratio
+                        
+                        # Report poly count
+                        new_poly_count = len(lod_obj.data.polygons)
+                        reduction = ((original_poly_count - new_poly_count) / original_poly_count) * 100
+                        self.report({'INFO'}, 
+                                   f"  LOD{lod_level}: {new_poly_count} polys ({reduction:.1f}% reduction)")
                     
-                    lod_objects.append(lod_obj)
+                    shared_lod_meshes.setdefault(shared_key, [lod_obj.data for lod_obj in lod_objects])
                     
-                    # Report poly count
-                    new_poly_count = len(lod_obj.data.polygons)
-                    reduction = ((original_poly_count - new_poly_count) / original_poly_count) * 100
-                    self.report({'INFO'}, 
-                               f"  LOD{lod_level}: {new_poly_count} polys ({reduction:.1f}% reduction)")
-                
-                # Add metadata for Unity/Unreal
-                if self.target_engine == 'UNITY':
-                    # Store LOD info in custom properties
+                    # Add metadata for Unity/Unreal (the LOD export finds its groups by it)
                     for i, lod_obj in enumerate(lod_objects):
-                        lod_obj["LOD_Level"] = i
-                        lod_obj["LOD_Group"] = base_name
+                        lod_obj[lod_groups.LEVEL_PROPERTY] = i
+                        lod_obj[lod_groups.GROUP_PROPERTY] = base_name
+                    
+                    # Transition heights for the Unity LODGroup / Unreal LOD screen sizes
+                    if plan:
+                        screen_lod.store_transitions(lod_objects, plan, screen_lod.bounding_radius(original_obj),
+                                                     self.vertical_fov)
+                        self.report({'INFO'}, f"  {len(ratios)} levels, transitions at "
+                                              + ", ".join(f"{height:.3f}" for height in plan.transition_heights()))
                 
                 processed_count += 1
                 
@@ -338,6 +445,8 @@ class MESH_OT_generate_lods(Operator):
                 self.report({'WARNING'}, f"Failed on {original_obj.name}: {str(e)}")
                 continue
         
+        bpy.data.batch_remove([mesh for mesh in replaced_meshes if not mesh.users])
+        
         self.report({'INFO'}, f"SUCCESS: Generated LODs for {processed_count} objects! (LOD1-{self.lod_count-1} parented to LOD0)")
         return {'FINISHED'}
 
@@ -353,15 +462,26 @@ class MESH_OT_generate_lods(Operator):
         # LOD settings
         box = layout.box()
         box.label(text="LOD Settings", icon='OUTLINER_OB_MESH')
-        box.prop(self, "lod_count")
-        box.prop(self, "use_progressive")
+        box.prop(self, "use_screen_size")
         
-        if self.use_progressive:
+        if self.use_screen_size:
+            box.prop(self, "lod_count", text="Max LOD Levels")
+            col = box.column(align=True)
+            col.prop(self, "pixel_error")
+            col.prop(self, "screen_resolution")
+            col.prop(self, "min_screen_height")
+            col.prop(self, "vertical_fov")
             box.prop(self, "progressive_factor", slider=True)
         else:
-            col = box.column(align=True)
-            for i in range(min(self.lod_count, 5)):
-                col.prop(self, f"lod{i}_ratio", slider=True)
+            box.prop(self, "lod_count")
+            box.prop(self, "use_progressive")
+            
+            if self.use_progressive:
+                box.prop(self, "progressive_factor", slider=True)
+            else:
+                col = box.column(align=True)
+                for i in range(min(self.lod_count, 5)):
+                    col.prop(self, f"lod{i}_ratio", slider=True)
         
         # Decimation settings
         box = layout.box()
@@ -372,6 +492,8 @@ class MESH_OT_generate_lods(Operator):
             box.prop(self, "planar_angle")
             box.label(text="Note: Planar + Collapse for target ratio", icon='INFO')
         
+        box.prop(self, "use_cascade")
+        
         # Modifiers
         box = layout.box()
         box.label(text="Modifiers", icon='MODIFIER')
@@ -0,0 +1,169 @@
+import bpy
+from bpy.types import Operator
+from bpy.props import FloatProperty, BoolProperty, IntProperty
+from ..utils import mesh_arrays, mesh_join, mesh_snapshot, profiler, uv_layers, uv_pack
+
+
+class MESH_OT_combine_meshes(Operator):
+    """Combine small static meshes into fewer objects to cut draw calls"""
+    bl_idname = "mesh.combine_meshes"
+    bl_label = "Combine Small Meshes"
+    bl_description = "Join nearby small meshes that share materials into one mesh per cluster to reduce draw calls"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    # Clustering
+    cluster_size: FloatProperty(
+        name="Cluster Size",
+        description="Edge length of the world grid cells, meshes in the same cell are joined",
+        default=5.0,
+        min=0.01,
+        max=10000.0,
+        subtype='DISTANCE'
+    )
+    
+    max_object_size: FloatProperty(
+        name="Max Object Size",
+        description="Only join objects whose bounding box diagonal is at most this long (0 = any size)",
+        default=2.0,
+        min=0.0,
+        subtype='DISTANCE'
+    )
+    
+    max_cluster_vertices: IntProperty(
+        name="Max Vertices per Mesh",
+        description="Split clusters that would exceed this many vertices (65535 keeps 16-bit index buffers)",
+        default=65535,
+        min=1000,
+        max=10000000
+    )
+    
+    # Lightmap
+    rebuild_lightmap: BoolProperty(
+        name="Rebuild Lightmap Atlas",
+        description="Repack the UV1 lightmap charts of every combined mesh into one atlas",
+        default=True
+    )
+    
+    uv1_resolution: IntProperty(
+        name="Lightmap Resolution",
+        description="Lightmap size in pixels the atlas is packed for",
+        default=1024,
+        min=64,
+        max=8192
+    )
+    
+    uv1_padding: IntProperty(
+        name="Padding (px)",
+        description="Pixels between charts in the lightmap atlas",
+        default=4,
+        min=0,
+        max=64
+    )
+    
+    remove_originals: BoolProperty(
+        name="Remove Originals",
+        description="Delete the joined objects, otherwise they are only unlinked from the scene",
+        default=True,
+        options={'HIDDEN', 'SKIP_SAVE'}
+    )
+
+    @classmethod
+    def poll(cls, context):
+        """Check if the operator can be executed"""
+        return (context.selected_objects and
+                any(obj.type == 'MESH' for obj in context.selected_objects))
+
+    def is_static_part(self, obj):
+        """Whether an object can be joined without losing anything it does on its own"""
+        if obj.modifiers or obj.parent or obj.children or obj.data.shape_keys:
+            return False
+        if mesh_arrays.has_unread_data(obj):
+            return False
+        if obj.animation_data and obj.animation_data.action:
+            return False
+        return self.max_object_size <= 0 or obj.dimensions.length <= self.max_object_size
+
+    @profiler.profiled
+    def execute(self, context):
+        """Execute the mesh combining"""
+        mesh_objects = [obj for obj in context.selected_objects if obj.type == 'MESH']
+        
+        if not mesh_objects:
+            self.report({'WARNING'}, "No mesh objects selected")
+            return {'CANCELLED'}
+        
+        draw_calls_before = mesh_join.count_draw_calls(mesh_objects)
+        candidates = [obj for obj in mesh_objects if self.is_static_part(obj)]
+        clusters = mesh_join.cluster_objects(candidates, self.cluster_size, self.max_cluster_vertices)
+        
+        if not clusters:
+            self.report({'INFO'}, f"Nothing to combine, {draw_calls_before} draw calls")
+            return {'CANCELLED'}
+        
+        combined_objects = []
+        for cluster in clusters:
+            with profiler.record(self.bl_idname, "combine", cluster):
+                collection = cluster[0].users_collection[0] if cluster[0].users_collection else context.collection
+                combined = mesh_join.join_objects(cluster, f"{cluster[0].name}_Combined", collection)
+                
+                if self.rebuild_lightmap and uv_layers.LIGHTMAP_LAYER in combined.data.uv_layers:
+                    uv_pack.pack_mesh_lightmap(combined.data, uv_layers.LIGHTMAP_LAYER,
+                                               self.uv1_resolution, self.uv1_padding)
+                combined_objects.append(combined)
+        
+        joined = [obj for cluster in clusters for obj in cluster]
+        joined_pointers = {obj.as_pointer() for obj in joined}
+        result_objects = combined_objects + [obj for obj in mesh_objects if obj.as_pointer() not in joined_pointers]
+        
+        if self.remove_originals:
+            meshes = {obj.data for obj in joined}
+            for mesh in meshes:
+                mesh_snapshot.discard(mesh)
+            bpy.data.batch_remove(joined)
+            bpy.data.batch_remove([mesh for mesh in meshes if not mesh.users])
+        else:
+            for obj in joined:
+                for collection in list(obj.users_collection):
+                    collection.objects.unlink(obj)
+        
+        # Leave the combined and untouched objects selected for the next step
+        for obj in context.selected_objects:
+            obj.select_set(False)
+        for obj in result_objects:
+            obj.select_set(True)
+        context.view_layer.objects.active = result_objects[0]
+        
+        draw_calls_after = mesh_join.count_draw_calls(result_objects)
+        self.report({'INFO'}, f"Combined {len(joined)} objects into {len(combined_objects)} meshes: "
+                              f"{draw_calls_before} -> {draw_calls_after} draw calls")
+        return {'FINISHED'}
+
+    def draw(self, context):
+        """Draw the operator properties in the UI"""
+        layout = self.layout
+        
+        # Clustering
+        box = layout.box()
+        box.label(text="Clustering", icon='GROUP')
+        box.prop(self, "cluster_size")
+        box.prop(self, "max_object_size")
+        box.prop(self, "max_cluster_vertices")
+        
+        # Lightmap
+        box = layout.box()
+        box.label(text="Lightmap (UV1)", icon='LIGHT_SUN')
+        box.prop(self, "rebuild_lightmap")
+        
+        if self.rebuild_lightmap:
+            box.prop(self, "uv1_resolution")
+            box.prop(self, "uv1_padding")
+
+
+def register():
+    """Register the operator"""
+    bpy.utils.register_class(MESH_OT_combine_meshes)
+
+
+def unregister():
+    """Unregister the operator"""
+    bpy.utils.unregister_class(MESH_OT_combine_meshes)
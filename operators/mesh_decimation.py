@@ -1,6 +1,7 @@
 import bpy
 from bpy.types import Operator
 from bpy.props import FloatProperty, BoolProperty, IntProperty, EnumProperty
+from ..utils import budget, helpers, mesh_snapshot, node_groups, profiler, qem
 
 
 class MESH_OT_auto_decimate(Operator):
@@ -11,6 +12,41 @@ class MESH_OT_auto_decimate(Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     # Decimation settings
+    target_mode: EnumProperty(
+        name="Target",
+        description="How much geometry each mesh keeps",
+        items=[
+            ('RATIO', "Fixed Ratio", "Keep the same ratio of faces on every mesh"),
+            ('BUDGET', "Triangle Budget", "Distribute a triangle budget over the selection and derive each mesh's ratio from its share")
+        ],
+        default='RATIO'
+    )
+    
+    triangle_budget: IntProperty(
+        name="Triangle Budget",
+        description="Total triangles of the whole selection after decimation, every linked duplicate counts (0 = no total limit)",
+        default=100000,
+        min=0
+    )
+    
+    max_object_triangles: IntProperty(
+        name="Max Triangles per Object",
+        description="Upper limit of triangles for any single object (0 = no limit)",
+        default=0,
+        min=0
+    )
+    
+    budget_weighting: EnumProperty(
+        name="Distribute By",
+        description="What earns an object a larger share of the budget, scaled by its 'optimizer_importance' custom property",
+        items=[
+            ('SCREEN_SIZE', "Screen Size", "Bounding sphere size, i.e. screen coverage at a given distance"),
+            ('AREA', "Surface Area", "World-space surface area"),
+            ('TRIANGLES', "Triangle Count", "Current triangle count (same ratio everywhere)")
+        ],
+        default='SCREEN_SIZE'
+    )
+    
     ratio: FloatProperty(
         name="Decimate Ratio",
         description="Ratio of faces to keep (0.1 = 10% of original)",
@@ -26,7 +62,8 @@ class MESH_OT_auto_decimate(Operator):
         items=[
             ('COLLAPSE', "Collapse", "Merge vertices together"),
             ('UNSUBDIV', "Un-Subdivide", "Remove subdivision levels"),
-            ('DISSOLVE', "Planar", "Dissolve geometry based on planar angle")
+            ('DISSOLVE', "Planar", "Dissolve geometry based on planar angle"),
+            ('QEM', "Quadric (Native)", "Built-in quadric error simplifier applied directly to the mesh. Runs in Python, for small meshes only; drops vertex groups, seams and color attributes")
         ],
         default='COLLAPSE'
     )
@@ -84,7 +121,7 @@ class MESH_OT_auto_decimate(Operator):
     
     triangulate: BoolProperty(
         name="Triangulate",
-        description="Triangulate the mesh before decimation (recommended for game engines)",
+        description="Triangulate the decimated mesh (recommended for game engines)",
         default=False
     )
 
@@ -94,6 +131,47 @@ class MESH_OT_auto_decimate(Operator):
         return (context.selected_objects and
                 any(obj.type == 'MESH' for obj in context.selected_objects))
 
+    def add_modifier_stack(self, obj, ratio):
+        """Add the decimate, triangulate + smooth and weighted normal modifiers to an object"""
+        added_modifiers = []
+        
+        # Add Decimate modifier (the quadric simplifier has already edited the mesh)
+        if self.decimate_type != 'QEM':
+            decimate_mod = obj.modifiers.new(name="Decimate", type='DECIMATE')
+            decimate_mod.decimate_type = self.decimate_type
+            
+            if self.decimate_type == 'COLLAPSE':
+                decimate_mod.ratio = ratio
+                decimate_mod.use_collapse_triangulate = True
+            elif self.decimate_type == 'DISSOLVE':
+                decimate_mod.angle_limit = self.angle_limit
+                decimate_mod.use_dissolve_boundaries = False
+            elif self.decimate_type == 'UNSUBDIV':
+                decimate_mod.iterations = int((1.0 - ratio) * 5)
+            
+            added_modifiers.append(decimate_mod)
+        
+        # One shared node group triangulates and smooths by angle (the quadric simplifier always outputs triangles)
+        triangulate = self.triangulate and self.decimate_type != 'QEM'
+        smooth_by_angle = self.use_auto_smooth and bpy.app.version >= (4, 1, 0)
+        if triangulate or smooth_by_angle:
+            smooth_mod = node_groups.add_group_modifier(
+                obj, "TriangulateSmooth", node_groups.triangulate_smooth_group(),
+                **{"Triangulate": triangulate, "Smooth by Angle": smooth_by_angle, "Angle": self.smooth_angle}
+            )
+            added_modifiers.append(smooth_mod)
+        
+        # Add Weighted Normal modifier if requested (after smoothing, so it keeps the sharp edges)
+        if self.use_weighted_normals:
+            wn_mod = obj.modifiers.new(name="WeightedNormal", type='WEIGHTED_NORMAL')
+            wn_mod.weight = 100
+            wn_mod.mode = self.weighted_mode
+            wn_mod.keep_sharp = True
+            added_modifiers.append(wn_mod)
+        
+        return added_modifiers
+
+    @profiler.profiled
     def execute(self, context):
         """Execute the decimation operation"""
         mesh_objects = [obj for obj in context.selected_objects if obj.type == 'MESH']
@@ -105,84 +183,73 @@ class MESH_OT_auto_decimate(Operator):
         processed_count = 0
         failed_objects = []
         
-        self.report({'INFO'}, f"Processing {len(mesh_objects)} objects...")
+        # Linked duplicates share one mesh, which only needs decimating once
+        mesh_groups = helpers.group_by_mesh(mesh_objects)
+        
+        self.report({'INFO'}, f"Processing {len(mesh_objects)} objects ({len(mesh_groups)} unique meshes)...")
+        
+        # One global allocation pass turns the budget into a ratio per mesh
+        if self.target_mode == 'BUDGET':
+            if self.decimate_type not in {'COLLAPSE', 'QEM'}:
+                self.report({'WARNING'}, "Triangle budgets need Collapse or Quadric decimation")
+                return {'CANCELLED'}
+            ratios = budget.budget_ratios(mesh_groups, self.triangle_budget,
+                                          self.max_object_triangles, self.budget_weighting)
+        else:
+            ratios = {mesh: self.ratio for mesh in mesh_groups}
         
-        for obj in mesh_objects:
+        for instances in mesh_groups.values():
+            obj = instances[0]
             try:
-                # Store original poly count
-                original_poly_count = len(obj.data.polygons)
-                
-                # Deselect all and select current object
-                bpy.ops.object.select_all(action='DESELECT')
-                obj.select_set(True)
-                context.view_layer.objects.active = obj
-                
-                # Triangulate first if requested
-                if self.triangulate:
-                    tri_mod = obj.modifiers.new(name="Triangulate", type='TRIANGULATE')
-                    tri_mod.quad_method = 'BEAUTY'
-                    tri_mod.ngon_method = 'BEAUTY'
-                
-                # Add Decimate modifier
-                decimate_mod = obj.modifiers.new(name="Decimate", type='DECIMATE')
-                decimate_mod.decimate_type = self.decimate_type
-                
-                if self.decimate_type == 'COLLAPSE':
-                    decimate_mod.ratio = self.ratio
-                    decimate_mod.use_collapse_triangulate = True
-                elif self.decimate_type == 'DISSOLVE':
-                    decimate_mod.angle_limit = self.angle_limit
-                    decimate_mod.use_dissolve_boundaries = False
-                elif self.decimate_type == 'UNSUBDIV':
-                    decimate_mod.iterations = int((1.0 - self.ratio) * 5)
-                
-                # Add Weighted Normal modifier if requested
-                if self.use_weighted_normals:
-                    wn_mod = obj.modifiers.new(name="WeightedNormal", type='WEIGHTED_NORMAL')
-                    wn_mod.weight = 100
-                    wn_mod.mode = self.weighted_mode
-                    wn_mod.keep_sharp = True
-                
-                # Apply modifiers if requested
-                if self.apply_modifiers:
-                    # Apply in correct order
-                    if self.triangulate:
-                        bpy.ops.object.modifier_apply(modifier="Triangulate")
+                with profiler.record(self.bl_idname, "decimate", obj=obj):
+                    ratio = ratios[obj.data]
                     
-                    bpy.ops.object.modifier_apply(modifier="Decimate")
+                    # Store original poly count
+                    original_poly_count = len(obj.data.polygons)
                     
-                    if self.use_weighted_normals:
-                        bpy.ops.object.modifier_apply(modifier="WeightedNormal")
-                
-                # Set auto smooth
-                if self.use_auto_smooth:
-                    # For Blender 4.1+, use new normals system
-                    if bpy.app.version >= (4, 1, 0):
-                        # Use modifier instead
-                        if not self.apply_modifiers and not self.use_weighted_normals:
-                            smooth_mod = obj.modifiers.new(name="SmoothByAngle", type='NODES')
+                    if self.decimate_type == 'QEM':
+                        # Native simplifier writes the result straight into the shared mesh
+                        mesh_snapshot.get(obj.data).write_triangles(**qem.simplify_mesh(obj.data, [ratio])[0])
+                    
+                    if self.apply_modifiers:
+                        # Bake the whole stack in one depsgraph evaluation and share the result
+                        added_modifiers = self.add_modifier_stack(obj, ratio)
+                        if added_modifiers:
+                            helpers.bake_modifiers(context, obj, added_modifiers, instances[1:])
                     else:
-                        # Legacy auto smooth for older Blender versions
+                        # Modifiers live on objects, so every instance needs its own stack
+                        for instance in instances:
+                            self.add_modifier_stack(instance, ratio)
+                    
+                    # Legacy auto smooth for older Blender versions (4.1+ smooths in the node group)
+                    if self.use_auto_smooth and bpy.app.version < (4, 1, 0):
                         obj.data.use_auto_smooth = True
                         obj.data.auto_smooth_angle = self.smooth_angle
-                
-                # Shade smooth
-                bpy.ops.object.shade_smooth()
-                
-                # Calculate new poly count
-                new_poly_count = len(obj.data.polygons)
-                reduction = ((original_poly_count - new_poly_count) / original_poly_count) * 100
-                
-                processed_count += 1
-                
-                self.report({'INFO'}, 
-                           f"{obj.name}: {original_poly_count} → {new_poly_count} polys ({reduction:.1f}% reduction)")
+                    
+                    # Shade smooth
+                    helpers.set_shade_smooth(obj.data)
+                    
+                    # Calculate new poly count
+                    new_poly_count = len(obj.data.polygons)
+                    reduction = ((original_poly_count - new_poly_count) / original_poly_count) * 100
+                    
+                    processed_count += len(instances)
+                    
+                    instance_note = f" [{len(instances)} instances]" if len(instances) > 1 else ""
+                    self.report({'INFO'}, 
+                               f"{obj.name}: {original_poly_count} → {new_poly_count} polys ({reduction:.1f}% reduction){instance_note}")
                 
             except Exception as e:
                 failed_objects.append(f"{obj.name}: {str(e)}")
                 self.report({'WARNING'}, f"Failed on {obj.name}: {str(e)}")
                 continue
         
+        if self.target_mode == 'BUDGET':
+            scene_triangles = sum(mesh_snapshot.get(instances[0].data).triangle_count * len(instances)
+                                  for instances in mesh_groups.values())
+            if self.apply_modifiers or self.decimate_type == 'QEM':
+                self.report({'INFO'}, f"Triangles: {scene_triangles:,} (budget {self.triangle_budget:,})")
+        
         # Final report
         if failed_objects:
             self.report({'WARNING'}, f"Completed: {processed_count}/{len(mesh_objects)} objects processed")
@@ -200,7 +267,14 @@ class MESH_OT_auto_decimate(Operator):
         box.label(text="Decimation Settings", icon='MOD_DECIM')
         box.prop(self, "decimate_type")
         
-        if self.decimate_type in ['COLLAPSE', 'UNSUBDIV']:
+        if self.decimate_type in ['COLLAPSE', 'QEM']:
+            box.prop(self, "target_mode")
+        
+        if self.target_mode == 'BUDGET' and self.decimate_type in ['COLLAPSE', 'QEM']:
+            box.prop(self, "triangle_budget")
+            box.prop(self, "max_object_triangles")
+            box.prop(self, "budget_weighting")
+        elif self.decimate_type in ['COLLAPSE', 'UNSUBDIV', 'QEM']:
             box.prop(self, "ratio", slider=True)
         
         if self.decimate_type == 'DISSOLVE':
@@ -0,0 +1,72 @@
+import os
+
+import bpy
+from bpy.types import Operator
+from bpy.props import EnumProperty, StringProperty
+from bpy_extras.io_utils import ExportHelper
+from ..utils import profiler
+
+
+class MESH_OT_export_optimization_profile(Operator, ExportHelper):
+    """Export the timing records of the last profiled optimization run"""
+    bl_idname = "mesh.export_optimization_profile"
+    bl_label = "Export Optimization Profile"
+    bl_description = "Write per-step and per-object timings of the last profiled run as JSON or CSV"
+    bl_options = {'REGISTER'}
+
+    filename_ext = ".json"
+    
+    filter_glob: StringProperty(
+        default="*.json;*.csv",
+        options={'HIDDEN'}
+    )
+    
+    export_format: EnumProperty(
+        name="Format",
+        description="File format of the profile",
+        items=[
+            ('JSON', "JSON", "Session totals and all records"),
+            ('CSV', "CSV", "One row per step or object, for spreadsheets"),
+        ],
+        default='JSON'
+    )
+
+    @classmethod
+    def poll(cls, context):
+        """Check if there is a profile to export"""
+        return profiler.last_session() is not None
+
+    def check(self, context):
+        """Keep the file extension in line with the chosen format"""
+        extension = ".csv" if self.export_format == 'CSV' else ".json"
+        filepath = bpy.path.ensure_ext(os.path.splitext(self.filepath)[0], extension)
+        if filepath != self.filepath:
+            self.filepath = filepath
+            return True
+        return False
+
+    def execute(self, context):
+        """Write the profile"""
+        session = profiler.last_session()
+        
+        try:
+            if self.export_format == 'CSV':
+                profiler.export_csv(session, self.filepath)
+            else:
+                profiler.export_json(session, self.filepath)
+        except OSError as e:
+            self.report({'ERROR'}, f"Could not write profile: {str(e)}")
+            return {'CANCELLED'}
+        
+        self.report({'INFO'}, f"Profile with {len(session.records)} records written to {self.filepath}")
+        return {'FINISHED'}
+
+
+def register():
+    """Register the operator"""
+    bpy.utils.register_class(MESH_OT_export_optimization_profile)
+
+
+def unregister():
+    """Unregister the operator"""
+    bpy.utils.unregister_class(MESH_OT_export_optimization_profile)
@@ -1,6 +1,10 @@
 import bpy
+import bmesh
+import math
+import numpy as np
 from bpy.types import Operator
-from bpy.props import FloatProperty, BoolProperty, IntProperty
+from bpy.props import FloatProperty, BoolProperty, IntProperty, EnumProperty
+from ..utils import helpers, mesh_snapshot, profiler, spatial
 
 
 class MESH_OT_smart_vertex_merge(Operator):
@@ -11,6 +15,27 @@ class MESH_OT_smart_vertex_merge(Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     # Merge settings
+    merge_engine: EnumProperty(
+        name="Merge Engine",
+        description="How vertices are merged",
+        items=[
+            ('EDIT_MODE', "Edit Mode", "Merge with mesh operators in Edit Mode, one object at a time"),
+            ('MULTI_EDIT', "Single Edit Session", "Merge all selected objects together in one multi-object Edit Mode session"),
+            ('BMESH', "Vectorized (BMesh)", "Find merge clusters with a NumPy spatial hash and weld through BMesh without entering Edit Mode")
+        ],
+        default='EDIT_MODE'
+    )
+    
+    distance_mode: EnumProperty(
+        name="Distance",
+        description="How the merge distance of each object is chosen",
+        items=[
+            ('FIXED', "Fixed", "Use the same merge distance for every object"),
+            ('ADAPTIVE', "Adaptive", "Derive each object's merge distance from its size, edge lengths and scale, so small parts are not over-welded")
+        ],
+        default='FIXED'
+    )
+    
     merge_distance: FloatProperty(
         name="Merge Distance",
         description="Maximum distance between vertices to merge",
@@ -21,6 +46,34 @@ class MESH_OT_smart_vertex_merge(Operator):
         subtype='DISTANCE'
     )
     
+    bounds_factor: FloatProperty(
+        name="Size Factor",
+        description="Adaptive distance as a fraction of the object's bounding box diagonal",
+        default=0.0001,
+        min=0.0,
+        max=0.1,
+        precision=6
+    )
+    
+    edge_factor: FloatProperty(
+        name="Edge Factor",
+        description="Upper limit of the adaptive distance as a fraction of the object's median edge length",
+        default=0.1,
+        min=0.0,
+        max=1.0,
+        precision=3
+    )
+    
+    min_merge_distance: FloatProperty(
+        name="Min Distance",
+        description="Adaptive distances never go below this world-space distance (float precision of the import)",
+        default=0.000001,
+        min=0.0,
+        max=1.0,
+        precision=7,
+        subtype='DISTANCE'
+    )
+    
     use_sharp_edge_from_normals: BoolProperty(
         name="Sharp Edges from Normals",
         description="Mark edges as sharp based on angle between faces (prevents merging across hard edges)",
@@ -76,6 +129,136 @@ class MESH_OT_smart_vertex_merge(Operator):
         return (context.selected_objects and
                 any(obj.type == 'MESH' for obj in context.selected_objects))
 
+    def distance_for(self, obj):
+        """Merge distance of an object in its mesh's own coordinates"""
+        if self.distance_mode == 'FIXED':
+            return self.merge_distance
+        
+        snapshot = mesh_snapshot.get(obj.data)
+        distance = spatial.adaptive_merge_distance(snapshot.positions, snapshot.loop_vertices, snapshot.loop_starts,
+                                                   snapshot.loop_totals, self.bounds_factor, self.edge_factor)
+        
+        # The floor is a world distance, the mesh is merged in local coordinates
+        scale = max(abs(axis) for axis in obj.matrix_world.to_scale()) or 1.0
+        return max(distance, self.min_merge_distance / scale)
+
+    def merge_in_edit_mode(self, context, obj):
+        """Merge and clean up one object with mesh operators in Edit Mode"""
+        # Select only this object
+        bpy.ops.object.select_all(action='DESELECT')
+        obj.select_set(True)
+        context.view_layer.objects.active = obj
+        
+        # Enter edit mode
+        bpy.ops.object.mode_set(mode='EDIT')
+        self.cleanup_edit_mesh(obj.name, self.distance_for(obj))
+        
+        # Return to object mode
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    def merge_in_multi_edit(self, context, mesh_objects, distance):
+        """Merge and clean up all objects in a single multi-object Edit Mode session"""
+        if context.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        
+        # Select every mesh so they all enter Edit Mode together
+        bpy.ops.object.select_all(action='DESELECT')
+        for obj in mesh_objects:
+            obj.select_set(True)
+        context.view_layer.objects.active = mesh_objects[0]
+        
+        bpy.ops.object.mode_set(mode='EDIT')
+        try:
+            self.cleanup_edit_mesh(f"{len(mesh_objects)} objects", distance)
+        finally:
+            # Return to object mode
+            bpy.ops.object.mode_set(mode='OBJECT')
+
+    def cleanup_edit_mesh(self, label, distance):
+        """Run the merge and cleanup operators on every mesh currently in Edit Mode"""
+        bpy.ops.mesh.select_all(action='SELECT')
+        
+        # Mark sharp edges from normals first (before merging)
+        if self.use_sharp_edge_from_normals:
+            try:
+                bpy.ops.mesh.edges_select_sharp(sharpness=self.sharp_edge_angle)
+                bpy.ops.mesh.mark_sharp()
+                bpy.ops.mesh.select_all(action='SELECT')
+            except Exception as sharp_error:
+                # If sharp edge detection fails, continue anyway
+                self.report({'WARNING'}, f"{label}: Sharp edge detection failed, continuing...")
+                bpy.ops.mesh.select_all(action='SELECT')
+        
+        # Merge vertices by distance
+        try:
+            # Try modern method first (Blender 2.8+)
+            bpy.ops.mesh.merge_by_distance(threshold=distance)
+        except AttributeError:
+            # Fall back to legacy method if modern method doesn't exist
+            try:
+                bpy.ops.mesh.remove_doubles(threshold=distance)
+            except Exception as merge_error:
+                raise Exception(f"Merge operation failed: {str(merge_error)}")
+        
+        # Dissolve degenerate geometry
+        if self.dissolve_degenerate:
+            bpy.ops.mesh.dissolve_degenerate(threshold=self.degenerate_threshold)
+        
+        # Delete loose geometry
+        if self.delete_loose:
+            bpy.ops.mesh.delete_loose()
+        
+        # Recalculate normals
+        if self.recalculate_normals:
+            bpy.ops.mesh.normals_make_consistent(inside=False)
+
+    def merge_with_bmesh(self, obj):
+        """Merge and clean up one object through BMesh without entering Edit Mode"""
+        mesh = obj.data
+        targets = spatial.find_merge_targets(mesh_snapshot.get(mesh).positions, self.distance_for(obj))
+        
+        bm = bmesh.new()
+        try:
+            bm.from_mesh(mesh)
+            bm.verts.ensure_lookup_table()
+            
+            # Mark sharp edges from normals first (before merging)
+            if self.use_sharp_edge_from_normals:
+                for edge in bm.edges:
+                    if edge.is_manifold and edge.calc_face_angle(0.0) > self.sharp_edge_angle:
+                        edge.smooth = False
+            
+            # Weld every vertex onto its cluster target
+            moved = np.flatnonzero(targets != np.arange(len(targets)))
+            if len(moved):
+                verts = bm.verts
+                targetmap = {verts[i]: verts[t] for i, t in zip(moved.tolist(), targets[moved].tolist())}
+                bmesh.ops.weld_verts(bm, targetmap=targetmap)
+            
+            # Dissolve degenerate geometry
+            if self.dissolve_degenerate:
+                bmesh.ops.dissolve_degenerate(bm, dist=self.degenerate_threshold, edges=bm.edges[:])
+            
+            # Delete loose geometry
+            if self.delete_loose:
+                loose_edges = [edge for edge in bm.edges if not edge.link_faces]
+                if loose_edges:
+                    bmesh.ops.delete(bm, geom=loose_edges, context='EDGES')
+                loose_verts = [vert for vert in bm.verts if not vert.link_edges]
+                if loose_verts:
+                    bmesh.ops.delete(bm, geom=loose_verts, context='VERTS')
+            
+            # Recalculate normals
+            if self.recalculate_normals:
+                bmesh.ops.recalc_face_normals(bm, faces=bm.faces[:])
+            
+            bm.to_mesh(mesh)
+        finally:
+            bm.free()
+        
+        mesh.update()
+
+    @profiler.profiled
     def execute(self, context):
         """Execute the vertex merging operation"""
         mesh_objects = [obj for obj in context.selected_objects if obj.type == 'MESH']
@@ -87,70 +270,67 @@ class MESH_OT_smart_vertex_merge(Operator):
         processed_count = 0
         total_vertices_merged = 0
         
-        self.report({'INFO'}, f"Processing {len(mesh_objects)} objects...")
+        # Linked duplicates share one mesh, which only needs merging once
+        mesh_groups = helpers.group_by_mesh(mesh_objects)
+        instance_counts = {instances[0].name: len(instances) for instances in mesh_groups.values()}
+        mesh_objects = [instances[0] for instances in mesh_groups.values()]
+        
+        self.report({'INFO'}, f"Processing {len(mesh_objects)} unique meshes...")
         
         original_mode = context.mode
         
-        for obj in mesh_objects:
+        # BMesh and adaptive distances read the mesh datablocks directly, so Edit Mode data must be flushed first
+        if (self.merge_engine == 'BMESH' or self.distance_mode == 'ADAPTIVE') and context.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        
+        # Get original vertex counts
+        original_vert_counts = {obj.name: len(obj.data.vertices) for obj in mesh_objects}
+        
+        # One Edit Mode round trip for all objects instead of one per object
+        if self.merge_engine == 'MULTI_EDIT':
+            # Adaptive distances are rounded down to powers of two, one session per distance
+            sessions = {}
+            for obj in mesh_objects:
+                distance = self.distance_for(obj)
+                if self.distance_mode == 'ADAPTIVE' and distance > 0.0:
+                    distance = 2.0 ** math.floor(math.log2(distance))
+                sessions.setdefault(distance, []).append(obj)
+            
             try:
-                # Get original vertex count
-                original_vert_count = len(obj.data.vertices)
-                
-                # Select only this object
-                bpy.ops.object.select_all(action='DESELECT')
-                obj.select_set(True)
-                context.view_layer.objects.active = obj
-                
-                # Enter edit mode
-                bpy.ops.object.mode_set(mode='EDIT')
-                bpy.ops.mesh.select_all(action='SELECT')
-                
-                # Mark sharp edges from normals first (before merging)
-                if self.use_sharp_edge_from_normals:
-                    try:
-                        bpy.ops.mesh.edges_select_sharp(sharpness=self.sharp_edge_angle)
-                        bpy.ops.mesh.mark_sharp()
-                        bpy.ops.mesh.select_all(action='SELECT')
-                    except Exception as sharp_error:
-                        # If sharp edge detection fails, continue anyway
-                        self.report({'WARNING'}, f"{obj.name}: Sharp edge detection failed, continuing...")
-                        bpy.ops.mesh.select_all(action='SELECT')
-                
-                # Merge vertices by distance
+                with profiler.record(self.bl_idname, "multi_edit_merge", mesh_objects):
+                    for distance, objects in sessions.items():
+                        self.merge_in_multi_edit(context, objects, distance)
+            except Exception as e:
+                self.report({'WARNING'}, f"Multi-object merge failed: {str(e)}")
                 try:
-                    # Try modern method first (Blender 2.8+)
-                    bpy.ops.mesh.merge_by_distance(threshold=self.merge_distance)
-                except AttributeError:
-                    # Fall back to legacy method if modern method doesn't exist
-                    try:
-                        bpy.ops.mesh.remove_doubles(threshold=self.merge_distance)
-                    except Exception as merge_error:
-                        raise Exception(f"Merge operation failed: {str(merge_error)}")
-                
-                # Dissolve degenerate geometry
-                if self.dissolve_degenerate:
-                    bpy.ops.mesh.dissolve_degenerate(threshold=self.degenerate_threshold)
-                
-                # Delete loose geometry
-                if self.delete_loose:
-                    bpy.ops.mesh.delete_loose()
+                    if context.mode != 'OBJECT':
+                        bpy.ops.object.mode_set(mode='OBJECT')
+                except:
+                    pass
+                return {'CANCELLED'}
+        
+        for obj in mesh_objects:
+            try:
+                original_vert_count = original_vert_counts[obj.name]
                 
-                # Recalculate normals
-                if self.recalculate_normals:
-                    bpy.ops.mesh.normals_make_consistent(inside=False)
+                with profiler.record(self.bl_idname, "merge", obj=obj):
+                    if self.merge_engine == 'BMESH':
+                        self.merge_with_bmesh(obj)
+                    elif self.merge_engine == 'EDIT_MODE':
+                        self.merge_in_edit_mode(context, obj)
                 
-                # Return to object mode
-                bpy.ops.object.mode_set(mode='OBJECT')
+                mesh_snapshot.discard(obj.data)
                 
                 # Calculate merged vertices
                 new_vert_count = len(obj.data.vertices)
                 merged_count = original_vert_count - new_vert_count
                 total_vertices_merged += merged_count
                 
+                instance_note = f" [{instance_counts[obj.name]} instances]" if instance_counts[obj.name] > 1 else ""
                 self.report({'INFO'}, 
-                           f"{obj.name}: {merged_count} vertices merged ({original_vert_count} → {new_vert_count})")
+                           f"{obj.name}: {merged_count} vertices merged ({original_vert_count} → {new_vert_count}){instance_note}")
                 
-                processed_count += 1
+                processed_count += instance_counts[obj.name]
                 
             except Exception as e:
                 self.report({'WARNING'}, f"Failed on {obj.name}: {str(e)}")
@@ -180,7 +360,16 @@ class MESH_OT_smart_vertex_merge(Operator):
         # Merge settings
         box = layout.box()
         box.label(text="Merge Settings", icon='AUTOMERGE_ON')
-        box.prop(self, "merge_distance")
+        box.prop(self, "merge_engine")
+        box.prop(self, "distance_mode", expand=True)
+        
+        if self.distance_mode == 'FIXED':
+            box.prop(self, "merge_distance")
+        else:
+            box.prop(self, "bounds_factor")
+            box.prop(self, "edge_factor")
+            box.prop(self, "min_merge_distance")
+        
         box.prop(self, "remove_doubles")
         
         # Sharp edge preservation
@@ -1,6 +1,6 @@
 import bpy
 from bpy.types import Panel
-from ..utils import helpers
+from ..utils import helpers, profiler, stats_cache
 
 
 class VIEW3D_PT_vr_asset_optimizer(Panel):
@@ -29,9 +29,10 @@ class VIEW3D_PT_vr_asset_optimizer(Panel):
         
         layout.separator()
         
-        # Selection info
+        # Selection info (cached, only recomputed when the selection or its geometry changes)
+        stats = stats_cache.get_selection_stats(context)
         box = layout.box()
-        mesh_count = helpers.get_selected_mesh_count(context)
+        mesh_count = stats.mesh_count
         
         if mesh_count == 0:
             box.label(text="No mesh objects selected", icon='ERROR')
@@ -39,11 +40,8 @@ class VIEW3D_PT_vr_asset_optimizer(Panel):
             col = box.column(align=True)
             col.label(text=f"Selected: {mesh_count} mesh object{'s' if mesh_count != 1 else ''}", icon='OBJECT_DATA')
             
-            poly_count = helpers.get_total_poly_count(context)
-            vert_count = helpers.get_total_vertex_count(context)
-            
-            col.label(text=f"Polygons: {helpers.format_number(poly_count)}")
-            col.label(text=f"Vertices: {helpers.format_number(vert_count)}")
+            col.label(text=f"Polygons: {helpers.format_number(stats.poly_count)}")
+            col.label(text=f"Vertices: {helpers.format_number(stats.vert_count)}")
         
         layout.separator()
         
@@ -92,9 +90,15 @@ class VIEW3D_PT_vr_asset_optimizer(Panel):
         # Dual UV Unwrap
         col.operator("mesh.dual_uv_unwrap", text="Dual UV Unwrap (UV0 + UV1)", icon='UV_DATA')
         
+        # Mesh Combine
+        col.operator("mesh.combine_meshes", text="Combine Small Meshes", icon='GROUP')
+        
         # LOD Generation
         col.operator("mesh.generate_lods", text="Generate LOD Groups", icon='OUTLINER_OB_MESH')
         
+        # LOD Group Export
+        col.operator("mesh.export_lod_groups", text="Export LOD Groups", icon='EXPORT')
+        
         layout.separator()
         
         # UV Information
@@ -104,12 +108,30 @@ class VIEW3D_PT_vr_asset_optimizer(Panel):
             
             uv_info_col = box.column(align=True)
             
-            for obj in context.selected_objects:
-                if obj.type == 'MESH' and helpers.has_uv_layers(obj):
-                    uv_count = helpers.get_uv_layer_count(obj)
-                    row = uv_info_col.row()
-                    row.label(text=f"{obj.name}: {uv_count} UV layer{'s' if uv_count != 1 else ''}", 
-                             icon='CHECKMARK')
+            for name, uv_count in stats.uv_layers:
+                row = uv_info_col.row()
+                row.label(text=f"{name}: {uv_count} UV layer{'s' if uv_count != 1 else ''}", 
+                         icon='CHECKMARK')
+        
+        layout.separator()
+        
+        # Profiling
+        box = layout.box()
+        box.label(text="Profiling", icon='TIME')
+        box.prop(props, "enable_profiling")
+        
+        session = profiler.last_session()
+        if session:
+            col = box.column(align=True)
+            col.label(text=f"Last run: {session.name} ({session.seconds:.2f}s)")
+            col.label(text=f"{session.ops_calls} operator calls, {session.mode_switches} mode switches")
+            
+            # Slowest steps first
+            for operator, step, calls, seconds, before, after in session.step_summary()[:5]:
+                col.label(text=f"• {operator.split('.')[-1]} {step}: {seconds:.2f}s "
+                               f"({helpers.format_number(before)} → {helpers.format_number(after)} tris)")
+            
+            box.operator("mesh.export_optimization_profile", text="Export Profile", icon='EXPORT')
         
         layout.separator()
         
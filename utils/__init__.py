@@ -1,10 +1,27 @@
 from . import properties
+from . import budget
 from . import helpers
+from . import lod_groups
+from . import mesh_arrays
+from . import mesh_cache
+from . import mesh_join
+from . import mesh_snapshot
+from . import node_groups
+from . import profiler
+from . import qem
+from . import screen_lod
+from . import spatial
+from . import stats_cache
+from . import uv_layers
+from . import uv_pack
 
 def register():
     """Register utilities"""
     properties.register()
+    stats_cache.register()
 
 def unregister():
     """Unregister utilities"""
+    profiler.end_session()
+    stats_cache.unregister()
     properties.unregister()
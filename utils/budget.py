@@ -0,0 +1,93 @@
+import numpy as np
+from . import mesh_arrays, mesh_snapshot
+
+
+# Custom object property scaling an object's share of the budget
+IMPORTANCE_PROPERTY = "optimizer_importance"
+
+
+def allocate(costs, weights, budget, caps=None):
+    """Split a triangle budget over objects in proportion to their weights
+
+    Every object gets lam * weight triangles, but never more than it has
+    (costs) or than its cap; whatever a capped object leaves over goes to the
+    others. One sort of the objects by cost / weight finds lam. Returns the
+    target triangle count of every object.
+    """
+    costs = np.asarray(costs, dtype=np.float64)
+    weights = np.maximum(np.asarray(weights, dtype=np.float64), 1e-12)
+    limits = costs if caps is None else np.minimum(costs, caps)
+
+    if budget is None or limits.sum() <= budget:
+        return limits
+
+    # Objects saturate in order of limit / weight, lam only grows while they do
+    order = np.argsort(limits / weights)
+    remaining_budget = float(budget)
+    remaining_weight = float(weights.sum())
+    targets = np.empty_like(limits)
+
+    for position, index in enumerate(order):
+        lam = remaining_budget / remaining_weight
+        if limits[index] > lam * weights[index]:
+            rest = order[position:]
+            targets[rest] = lam * weights[rest]
+            return targets
+        targets[index] = limits[index]
+        remaining_budget -= limits[index]
+        remaining_weight -= weights[index]
+
+    return targets
+
+
+def object_weight(obj, weighting):
+    """Share of the budget an object asks for, before its importance
+
+    SCREEN_SIZE uses the squared bounding sphere radius, i.e. the screen area
+    the object covers at a given distance; AREA the world-space surface area;
+    TRIANGLES the current triangle count, which keeps the same ratio everywhere.
+    """
+    mesh = obj.data
+    if weighting == 'TRIANGLES':
+        weight = mesh_snapshot.get(mesh).triangle_count
+    elif weighting == 'AREA':
+        weight = mesh_arrays.world_surface_area(obj)
+    else:  # SCREEN_SIZE
+        weight = (obj.dimensions.length * 0.5) ** 2
+
+    return weight * float(obj.get(IMPORTANCE_PROPERTY, 1.0))
+
+
+def _allocate_groups(mesh_groups, budget, max_object_triangles, weighting):
+    """Current and target triangles (all instances together) of every mesh group"""
+    groups = list(mesh_groups.values())
+    triangles = np.array([mesh_snapshot.get(instances[0].data).triangle_count for instances in groups], dtype=np.float64)
+    counts = np.array([len(instances) for instances in groups], dtype=np.float64)
+    weights = np.array([sum(object_weight(obj, weighting) for obj in instances) for instances in groups])
+
+    caps = counts * max_object_triangles if max_object_triangles > 0 else None
+    costs = triangles * counts
+    return groups, costs, allocate(costs, weights, budget if budget > 0 else None, caps)
+
+
+def budget_targets(mesh_groups, budget=0, max_object_triangles=0, weighting='SCREEN_SIZE'):
+    """Triangles every mesh may keep over all its instances, {mesh: triangles}
+
+    The targets of any subset of the meshes, summed up, are a budget under
+    which allocating that subset alone gives the same targets again, so a
+    selection can be split into parts that are decimated separately.
+    """
+    groups, _, targets = _allocate_groups(mesh_groups, budget, max_object_triangles, weighting)
+    return {instances[0].data: float(target) for instances, target in zip(groups, targets)}
+
+
+def budget_ratios(mesh_groups, budget=0, max_object_triangles=0, weighting='SCREEN_SIZE'):
+    """Decimation ratio of every mesh so the selection meets a triangle budget
+
+    mesh_groups maps meshes to their instances, as from helpers.group_by_mesh();
+    every instance is drawn, so it counts against the budget. A budget or
+    maximum of 0 means no limit. Returns {mesh: ratio}.
+    """
+    groups, costs, targets = _allocate_groups(mesh_groups, budget, max_object_triangles, weighting)
+    ratios = np.divide(targets, costs, out=np.ones_like(targets), where=costs > 0)
+    return {instances[0].data: float(ratio) for instances, ratio in zip(groups, np.clip(ratios, 0.0, 1.0))}
@@ -1,4 +1,7 @@
+import subprocess
+
 import bpy
+from . import mesh_snapshot
 
 
 def get_selected_mesh_count(context):
@@ -24,6 +27,19 @@ def get_total_vertex_count(context):
     return total
 
 
+def group_by_mesh(objects):
+    """Group mesh objects by their mesh datablock, keeping the selection order
+
+    Linked duplicates end up in the same group, so each unique mesh can be
+    processed once through its first object.
+    """
+    groups = {}
+    for obj in objects:
+        if obj.type == 'MESH':
+            groups.setdefault(obj.data, []).append(obj)
+    return groups
+
+
 def format_number(num):
     """Format number with thousand separators"""
     if num >= 1000000:
@@ -46,3 +62,74 @@ def get_uv_layer_count(obj):
     if obj.type == 'MESH':
         return len(obj.data.uv_layers)
     return 0
+
+
+def set_shade_smooth(mesh):
+    """Mark every face of a mesh as smooth without going through bpy.ops"""
+    mesh.polygons.foreach_set("use_smooth", [True] * len(mesh.polygons))
+    mesh.update()
+
+
+def bake_modifiers(context, obj, modifiers, instances=()):
+    """Apply modifiers by evaluating the object once through the depsgraph
+
+    Only the given modifiers are baked, any others are disabled for the
+    evaluation and stay on the object. The evaluated mesh replaces the
+    object's mesh datablock in place, so unlike bpy.ops.object.modifier_apply
+    this needs no selection or active object changes. Linked duplicates
+    passed as instances receive the same baked mesh.
+    """
+    names = {mod.name for mod in modifiers}
+    others = [mod for mod in obj.modifiers if mod.name not in names and mod.show_viewport]
+    
+    for mod in others:
+        mod.show_viewport = False
+    
+    try:
+        depsgraph = context.evaluated_depsgraph_get()
+        evaluated = obj.evaluated_get(depsgraph)
+        baked_mesh = bpy.data.meshes.new_from_object(evaluated, preserve_all_data_layers=True, depsgraph=depsgraph)
+    finally:
+        for mod in others:
+            mod.show_viewport = True
+    
+    old_mesh = obj.data
+    mesh_name = old_mesh.name
+    mesh_snapshot.discard(old_mesh)
+    obj.data = baked_mesh
+    for instance in instances:
+        instance.data = baked_mesh
+    
+    for mod in [mod for mod in obj.modifiers if mod.name in names]:
+        obj.modifiers.remove(mod)
+    
+    # Keep the original name when nothing else uses the old mesh
+    if old_mesh.users == 0:
+        bpy.data.meshes.remove(old_mesh)
+        baked_mesh.name = mesh_name
+    
+    return baked_mesh
+
+
+def start_worker(source_path, script, job_path, log_path):
+    """Start a background Blender running script on a job file, returns the process and its open log file"""
+    log_file = open(log_path, "w", encoding="utf-8")
+    try:
+        process = subprocess.Popen(
+            [bpy.app.binary_path, "--background", source_path, "--python", script, "--", job_path],
+            stdout=log_file,
+            stderr=subprocess.STDOUT
+        )
+    except Exception:
+        log_file.close()
+        raise
+    return process, log_file
+
+
+def stop_workers(workers):
+    """Kill and wait for the (process, log file) workers still running and close every log file"""
+    for process, log_file in workers:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        log_file.close()
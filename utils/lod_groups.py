@@ -0,0 +1,130 @@
+import bpy
+from mathutils import Matrix
+
+
+# Custom properties the LOD generator writes on every LOD object
+GROUP_PROPERTY = "LOD_Group"
+LEVEL_PROPERTY = "LOD_Level"
+
+# The FBX exporter writes empties with this custom property set to "LodGroup" as LOD group nodes
+FBX_TYPE_PROPERTY = "fbx_type"
+
+# File extension of every export format
+FORMAT_EXTENSIONS = {'FBX': ".fbx", 'GLB': ".glb"}
+
+# FBX settings each engine expects (see the export guidelines in the README)
+ENGINE_FBX_SETTINGS = {
+    'UNITY': {"apply_scale_options": 'FBX_SCALE_UNITS', "bake_space_transform": True},
+    'UNREAL': {"apply_scale_options": 'FBX_SCALE_NONE', "mesh_smooth_type": 'FACE'},
+}
+
+
+def find_lod_groups(view_layer, objects):
+    """LOD groups the objects belong to, {group name: [objects by LOD level]}
+
+    Any object of a group brings in the whole group. Meshes without LOD
+    levels form a group of their own, named after the object.
+    """
+    groups = {}
+    for obj in objects:
+        if obj.type != 'MESH':
+            continue
+        name = obj.get(GROUP_PROPERTY) or obj.name
+        groups.setdefault(name, [] if GROUP_PROPERTY in obj else [obj])
+
+    for obj in view_layer.objects:
+        name = obj.get(GROUP_PROPERTY)
+        if name in groups and obj.type == 'MESH':
+            groups[name].append(obj)
+
+    for members in groups.values():
+        members.sort(key=lambda obj: obj.get(LEVEL_PROPERTY, 0))
+    return groups
+
+
+def _group_root(members):
+    """Empty all LODs of a group are parented to (the Unity LOD root), or None"""
+    parent = members[0].parent
+    if parent and parent.type == 'EMPTY' and all(obj.parent == parent for obj in members):
+        return parent
+    return None
+
+
+def _add_group_root(name, members, collection):
+    """Parent the LODs of a group to a new empty at LOD0, returns the empty and how to undo it"""
+    root = bpy.data.objects.new(name, None)
+    collection.objects.link(root)
+    root.matrix_world = Matrix.Translation(members[0].matrix_world.translation)
+
+    saved = [(obj, obj.parent, obj.matrix_parent_inverse.copy(), obj.matrix_basis.copy()) for obj in members]
+    for obj in members:
+        # The parent inverse cancels the root's transform, so the world matrix becomes the basis
+        world_matrix = obj.matrix_world.copy()
+        obj.parent = root
+        obj.matrix_parent_inverse = root.matrix_world.inverted()
+        obj.matrix_basis = world_matrix
+    return root, saved
+
+
+def export_groups(context, groups, filepath, file_format, target_engine):
+    """Write LOD groups into one file, each under a LOD group root
+
+    Groups of several levels get their LODs parented to one root empty, which
+    FBX writes as a LodGroup node that Unity and Unreal both import as LODs.
+    Temporary roots, parents and selection are restored afterwards.
+    """
+    view_layer = context.view_layer
+    previous_selection = list(context.selected_objects)
+    previous_active = view_layer.objects.active
+
+    added_roots = []
+    marked_roots = []
+    export_objects = []
+
+    try:
+        for name, members in groups.items():
+            root = _group_root(members)
+            if root is None and len(members) > 1:
+                root, saved = _add_group_root(name, members, context.scene.collection)
+                added_roots.append((root, saved))
+            if root is not None:
+                if file_format == 'FBX':
+                    marked_roots.append((root, root.get(FBX_TYPE_PROPERTY)))
+                    root[FBX_TYPE_PROPERTY] = "LodGroup"
+                export_objects.append(root)
+            export_objects.extend(members)
+
+        for obj in previous_selection:
+            obj.select_set(False)
+        for obj in export_objects:
+            obj.select_set(True)
+
+        if file_format == 'FBX':
+            bpy.ops.export_scene.fbx(filepath=filepath, use_selection=True, object_types={'EMPTY', 'MESH'},
+                                     use_custom_props=True, use_mesh_modifiers=True,
+                                     **ENGINE_FBX_SETTINGS[target_engine])
+        else:  # GLB
+            bpy.ops.export_scene.gltf(filepath=filepath, export_format='GLB', use_selection=True,
+                                      export_extras=True)
+
+    finally:
+        for obj in export_objects:
+            obj.select_set(False)
+        for obj in previous_selection:
+            obj.select_set(True)
+        view_layer.objects.active = previous_active
+
+        for root, previous_type in marked_roots:
+            if previous_type is None:
+                del root[FBX_TYPE_PROPERTY]
+            else:
+                root[FBX_TYPE_PROPERTY] = previous_type
+
+        for root, saved in added_roots:
+            for obj, parent, parent_inverse, matrix_basis in saved:
+                obj.parent = parent
+                obj.matrix_parent_inverse = parent_inverse
+                obj.matrix_basis = matrix_basis
+            bpy.data.objects.remove(root, do_unlink=True)
+
+    return filepath
@@ -0,0 +1,231 @@
+import numpy as np
+
+
+# Mesh attributes read_geometry() captures, besides the UV layers
+GEOMETRY_ATTRIBUTES = {"position", "material_index", "sharp_edge", "sharp_face", "custom_normal"}
+
+
+def read_vertex_coords(mesh):
+    """Read all vertex coordinates of a mesh into an (N, 3) float32 array"""
+    coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coords)
+    return coords.reshape(-1, 3)
+
+
+def read_triangles(mesh):
+    """Read the mesh triangulation as (M, 3) vertex indices, the source polygon and the (M, 3) loops of each triangle"""
+    mesh.calc_loop_triangles()
+    count = len(mesh.loop_triangles)
+    
+    triangles = np.empty(count * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("vertices", triangles)
+    
+    polygon_indices = np.empty(count, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("polygon_index", polygon_indices)
+    
+    loops = np.empty(count * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("loops", loops)
+    
+    return triangles.reshape(-1, 3), polygon_indices, loops.reshape(-1, 3)
+
+
+def read_material_indices(mesh):
+    """Read the material index of every polygon"""
+    material_indices = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("material_index", material_indices)
+    return material_indices
+
+
+def read_sharp_edges(mesh):
+    """Read the vertex pairs of all sharp edges into a (K, 2) int32 array"""
+    edges = _read(mesh.edges, "vertices", np.int32, 2)
+    return edges[_read(mesh.edges, "use_edge_sharp", bool)]
+
+
+def write_triangles(mesh, coords, triangles, material_indices=None, uvs=None, sharp_edges=None,
+                    custom_normals=None):
+    """Replace the geometry of a mesh with a triangle soup, keeping its materials
+
+    uvs maps UV layer names to per-corner (M * 3, 2) coordinates, sharp_edges
+    are (K, 2) vertex pairs and custom_normals per-corner (M * 3, 3) vectors.
+    Everything else (vertex groups, seams, color and other attributes) is lost.
+    """
+    mesh.clear_geometry()
+    
+    mesh.vertices.add(len(coords))
+    mesh.vertices.foreach_set("co", np.ascontiguousarray(coords, dtype=np.float32).ravel())
+    
+    mesh.loops.add(len(triangles) * 3)
+    mesh.loops.foreach_set("vertex_index", np.ascontiguousarray(triangles, dtype=np.int32).ravel())
+    
+    mesh.polygons.add(len(triangles))
+    mesh.polygons.foreach_set("loop_start", np.arange(0, len(triangles) * 3, 3, dtype=np.int32))
+    
+    if material_indices is not None:
+        mesh.polygons.foreach_set("material_index", np.ascontiguousarray(material_indices, dtype=np.int32))
+    
+    for name, layer_uvs in (uvs or {}).items():
+        layer = mesh.uv_layers.new(name=name, do_init=False)
+        layer.data.foreach_set("uv", np.ascontiguousarray(layer_uvs, dtype=np.float32).ravel())
+    
+    mesh.update(calc_edges=True)
+    
+    if sharp_edges is not None and len(sharp_edges):
+        # Match the rebuilt edges to the sharp vertex pairs by an order independent key
+        edges = np.sort(_read(mesh.edges, "vertices", np.int64, 2), axis=1)
+        sharp = np.sort(np.asarray(sharp_edges, dtype=np.int64), axis=1)
+        edge_keys = edges[:, 0] * len(coords) + edges[:, 1]
+        sharp_keys = sharp[:, 0] * len(coords) + sharp[:, 1]
+        mesh.edges.foreach_set("use_edge_sharp", np.isin(edge_keys, sharp_keys))
+    
+    if custom_normals is not None:
+        mesh.normals_split_custom_set(np.asarray(custom_normals, dtype=np.float32).tolist())
+
+
+def _read(collection, attribute, dtype, width=1):
+    """foreach_get one attribute of a mesh collection into a new array"""
+    values = np.empty(len(collection) * width, dtype=dtype)
+    collection.foreach_get(attribute, values)
+    return values.reshape(-1, width) if width > 1 else values
+
+
+def has_unread_data(obj):
+    """Whether an object's mesh has data read_geometry() does not capture
+
+    That is vertex groups, seams, color attributes and any other generic
+    attribute such as creases and bevel weights.
+    """
+    mesh = obj.data
+    if obj.vertex_groups or mesh.color_attributes:
+        return True
+    
+    if _read(mesh.edges, "use_seam", bool).any():
+        return True
+    
+    uv_names = set(mesh.uv_layers.keys())
+    return any(not attribute.name.startswith(".") and attribute.name not in GEOMETRY_ATTRIBUTES
+               and attribute.name not in uv_names for attribute in mesh.attributes)
+
+
+def read_geometry(mesh):
+    """Read everything needed to rebuild a mesh exactly into a dictionary of arrays
+
+    Covers topology, material indices, smooth/sharp flags, UV layers and custom
+    split normals.
+    """
+    geometry = {
+        "co": _read(mesh.vertices, "co", np.float32, 3),
+        "edge_vertices": _read(mesh.edges, "vertices", np.int32, 2),
+        "edge_sharp": _read(mesh.edges, "use_edge_sharp", bool),
+        "loop_vertices": _read(mesh.loops, "vertex_index", np.int32),
+        "loop_edges": _read(mesh.loops, "edge_index", np.int32),
+        "loop_starts": _read(mesh.polygons, "loop_start", np.int32),
+        "material_indices": _read(mesh.polygons, "material_index", np.int32),
+        "use_smooth": _read(mesh.polygons, "use_smooth", bool),
+        "uv_names": np.array([layer.name for layer in mesh.uv_layers], dtype=str),
+    }
+    
+    for index, layer in enumerate(mesh.uv_layers):
+        geometry[f"uv_{index}"] = _read(layer.data, "uv", np.float32, 2)
+    
+    if mesh.has_custom_normals:
+        geometry["custom_normals"] = read_corner_normals(mesh)
+    
+    return geometry
+
+
+def check_geometry(geometry):
+    """Raise KeyError or ValueError unless geometry is complete and consistent for write_geometry()"""
+    vertex_count = len(geometry["co"])
+    edge_count = len(geometry["edge_vertices"])
+    loop_count = len(geometry["loop_vertices"])
+    polygon_count = len(geometry["loop_starts"])
+    
+    shapes = {
+        "co": (vertex_count, 3),
+        "edge_vertices": (edge_count, 2),
+        "edge_sharp": (edge_count,),
+        "loop_vertices": (loop_count,),
+        "loop_edges": (loop_count,),
+        "loop_starts": (polygon_count,),
+        "material_indices": (polygon_count,),
+        "use_smooth": (polygon_count,),
+    }
+    for index in range(len(geometry["uv_names"])):
+        shapes[f"uv_{index}"] = (loop_count, 2)
+    if "custom_normals" in geometry:
+        shapes["custom_normals"] = (loop_count, 3)
+    
+    for name, shape in shapes.items():
+        if geometry[name].shape != shape:
+            raise ValueError(f"{name} has shape {geometry[name].shape}, expected {shape}")
+    
+    for name, limit in (("edge_vertices", vertex_count), ("loop_vertices", vertex_count),
+                        ("loop_edges", edge_count), ("loop_starts", loop_count)):
+        values = geometry[name]
+        if values.size and (values.min() < 0 or values.max() >= limit):
+            raise ValueError(f"{name} indexes out of range")
+
+
+def read_corner_normals(mesh):
+    """Read the normal of every face corner (loop) into an (L, 3) float32 array"""
+    return _read(mesh.corner_normals, "vector", np.float32, 3)
+
+
+def write_geometry(mesh, geometry):
+    """Rebuild a mesh from a dictionary produced by read_geometry(), keeping its materials"""
+    mesh.clear_geometry()
+    
+    mesh.vertices.add(len(geometry["co"]))
+    mesh.vertices.foreach_set("co", geometry["co"].ravel())
+    
+    mesh.edges.add(len(geometry["edge_vertices"]))
+    mesh.edges.foreach_set("vertices", geometry["edge_vertices"].ravel())
+    mesh.edges.foreach_set("use_edge_sharp", geometry["edge_sharp"])
+    
+    mesh.loops.add(len(geometry["loop_vertices"]))
+    mesh.loops.foreach_set("vertex_index", geometry["loop_vertices"])
+    mesh.loops.foreach_set("edge_index", geometry["loop_edges"])
+    
+    mesh.polygons.add(len(geometry["loop_starts"]))
+    mesh.polygons.foreach_set("loop_start", geometry["loop_starts"])
+    mesh.polygons.foreach_set("material_index", geometry["material_indices"])
+    mesh.polygons.foreach_set("use_smooth", geometry["use_smooth"])
+    
+    for index, name in enumerate(geometry["uv_names"]):
+        layer = mesh.uv_layers.new(name=str(name), do_init=False)
+        layer.data.foreach_set("uv", geometry[f"uv_{index}"].ravel())
+    
+    mesh.update()
+    
+    if "custom_normals" in geometry:
+        mesh.normals_split_custom_set(geometry["custom_normals"].tolist())
+
+
+def read_polygon_loops(mesh):
+    """Read the vertex of every loop plus the loop start and size of every polygon"""
+    return (_read(mesh.loops, "vertex_index", np.int32),
+            _read(mesh.polygons, "loop_start", np.int32),
+            _read(mesh.polygons, "loop_total", np.int32))
+
+
+def read_uvs(mesh, layer_name):
+    """Read the per-loop coordinates of a UV layer into an (L, 2) float32 array"""
+    return _read(mesh.uv_layers[layer_name].data, "uv", np.float32, 2)
+
+
+def write_uvs(mesh, layer_name, uvs):
+    """Write per-loop coordinates back into a UV layer"""
+    mesh.uv_layers[layer_name].data.foreach_set("uv", np.ascontiguousarray(uvs, dtype=np.float32).ravel())
+
+
+def count_triangles(mesh):
+    """Number of triangles in the mesh triangulation, without computing it"""
+    totals = _read(mesh.polygons, "loop_total", np.int32)
+    return int(totals.sum()) - 2 * len(totals)
+
+
+def world_surface_area(obj):
+    """Surface area of an object's mesh in world space (uniform scale assumed)"""
+    sx, sy, sz = obj.matrix_world.to_scale()
+    return float(_read(obj.data.polygons, "area", np.float32).sum(dtype=np.float64)) * abs(sx * sy * sz) ** (2.0 / 3.0)
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import bpy
+import numpy as np
+from . import mesh_arrays, mesh_snapshot
+
+
+# Bump when the stored layout or the optimization results change meaning
+CACHE_VERSION = 2
+
+ADDON_PACKAGE = __package__.rpartition('.')[0]
+
+
+def cache_directory():
+    """Directory of the persistent mesh cache"""
+    try:
+        return bpy.utils.extension_path_user(ADDON_PACKAGE, path="mesh_cache", create=True)
+    except (AttributeError, ValueError):
+        # Installed as a legacy add-on rather than an extension
+        directory = os.path.join(tempfile.gettempdir(), "asset_optimizer_mesh_cache")
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+
+def mesh_hash(mesh, settings):
+    """Content hash of a mesh's geometry and the settings applied to it
+
+    Covers everything a hit restores (topology, materials, smooth and sharp
+    flags, UV layers, custom normals), so a hit never brings back stale data
+    that a disabled step would have left alone.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(json.dumps({"version": CACHE_VERSION, "settings": settings}, sort_keys=True).encode())
+
+    geometry = mesh_arrays.read_geometry(mesh)
+    for name in sorted(geometry):
+        array = geometry[name]
+        digest.update(name.encode())
+        digest.update(np.int64(array.size).tobytes())
+        digest.update("\0".join(array.tolist()).encode() if name == "uv_names" else array.tobytes())
+
+    return digest.hexdigest()
+
+
+class MeshCache:
+    """Size-bounded on-disk cache of optimized mesh geometry
+
+    Entries are .npz files named after their key. A hit refreshes the file's
+    modification time, and eviction removes the least recently used files
+    first, so parallel workers can share one directory without an index.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path(self, key):
+        """File holding the entry for key"""
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def load(self, key, mesh):
+        """Rebuild mesh from the cached entry, returns False on a miss"""
+        path = self.path(key)
+        try:
+            with np.load(path, allow_pickle=False) as stored:
+                geometry = {name: stored[name] for name in stored.files}
+            # Truncated or old entries must be rejected before the mesh is cleared
+            mesh_arrays.check_geometry(geometry)
+            mesh_arrays.write_geometry(mesh, geometry)
+            mesh_snapshot.discard(mesh)
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return False
+
+        self.hits += 1
+        return True
+
+    def store(self, key, mesh):
+        """Save the current geometry of mesh under key"""
+        path = self.path(key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+
+        with open(temp_path, "wb") as temp_file:
+            np.savez(temp_file, **mesh_arrays.read_geometry(mesh))
+        os.replace(temp_path, path)
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits its size limit
+
+        Scans the whole directory, so call it once after storing a batch of entries.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npz"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+
+    def summary(self):
+        """One-line hit/miss report"""
+        lookups = self.hits + self.misses
+        rate = (self.hits / lookups * 100) if lookups else 0.0
+        return f"Cache: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate), {self.evictions} evicted"
@@ -0,0 +1,191 @@
+import math
+
+import bpy
+import numpy as np
+from . import mesh_arrays, uv_layers, uv_pack
+
+
+def object_materials(obj):
+    """Materials an object is drawn with, one per slot (None for an empty slot)"""
+    return [slot.material for slot in obj.material_slots] or [None]
+
+
+def count_draw_calls(objects):
+    """Draw calls of objects in an engine: one per object and distinct material"""
+    return sum(len(set(object_materials(obj))) for obj in objects if obj.type == 'MESH')
+
+
+def world_bounds(obj):
+    """World-space bounding box corners (min, max) of an object"""
+    matrix = np.array(obj.matrix_world, dtype=np.float64)
+    corners = np.array(obj.bound_box, dtype=np.float64) @ matrix[:3, :3].T + matrix[:3, 3]
+    return corners.min(axis=0), corners.max(axis=0)
+
+
+def cluster_objects(objects, cell_size, max_vertices=65535):
+    """Group objects that may be joined into one mesh
+
+    Objects join when they use the same materials, both have or lack a
+    lightmap UV layer and the centre of their bounds falls into the same cell
+    of a world grid. Clusters are split to stay below max_vertices. Returns
+    the clusters with more than one object, in selection order.
+    """
+    cells = {}
+    for obj in objects:
+        minimum, maximum = world_bounds(obj)
+        cell = tuple(np.floor((minimum + maximum) * 0.5 / cell_size).astype(np.int64))
+        key = (frozenset(object_materials(obj)), uv_layers.LIGHTMAP_LAYER in obj.data.uv_layers, cell)
+        cells.setdefault(key, []).append(obj)
+
+    clusters = []
+    for members in cells.values():
+        cluster = []
+        vertex_count = 0
+        for obj in members:
+            count = len(obj.data.vertices)
+            if cluster and vertex_count + count > max_vertices:
+                clusters.append(cluster)
+                cluster = []
+                vertex_count = 0
+            cluster.append(obj)
+            vertex_count += count
+        clusters.append(cluster)
+
+    return [cluster for cluster in clusters if len(cluster) > 1]
+
+
+def _flipped_loop_order(loop_starts, loop_count):
+    """Loop orders that reverse the winding of every polygon, for per-loop data and for loop edges"""
+    loop_totals = np.diff(np.append(loop_starts, loop_count))
+    starts = np.repeat(loop_starts, loop_totals)
+    totals = np.repeat(loop_totals, loop_totals)
+    position = np.arange(loop_count) - starts
+    return starts + (totals - position) % totals, starts + totals - 1 - position
+
+
+def _part_geometry(obj, transform, materials, with_normals):
+    """Geometry of one object moved into the space of the joined mesh"""
+    mesh = obj.data
+    geometry = mesh_arrays.read_geometry(mesh)
+    rotation = transform[:3, :3]
+
+    geometry["co"] = geometry["co"] @ rotation.T + transform[:3, 3]
+
+    remap = np.array([materials.index(material) for material in object_materials(obj)], dtype=np.int32)
+    geometry["material_indices"] = remap[np.clip(geometry["material_indices"], 0, len(remap) - 1)]
+
+    uvs = {str(name): geometry.pop(f"uv_{index}") for index, name in enumerate(geometry["uv_names"])}
+
+    normals = None
+    if with_normals:
+        normals = geometry.get("custom_normals")
+        if normals is None:
+            normals = mesh_arrays.read_corner_normals(mesh)
+        normals = normals @ np.linalg.inv(rotation)
+        normals /= np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+
+    # Mirroring transforms turn faces inside out unless their winding is reversed
+    if np.linalg.det(rotation) < 0:
+        loop_order, edge_order = _flipped_loop_order(geometry["loop_starts"], len(geometry["loop_vertices"]))
+        geometry["loop_vertices"] = geometry["loop_vertices"][loop_order]
+        geometry["loop_edges"] = geometry["loop_edges"][edge_order]
+        uvs = {name: layer[loop_order] for name, layer in uvs.items()}
+        if normals is not None:
+            normals = normals[loop_order]
+
+    return geometry, uvs, normals
+
+
+def _lightmap_density(uvs, loop_starts, loop_count, world_area):
+    """Factor that scales a part's lightmap UVs to a texel density proportional to its world size"""
+    loop_totals = np.diff(np.append(loop_starts, loop_count))
+    uv_area = uv_pack.polygon_uv_area(uvs.astype(np.float64), loop_starts, loop_totals)
+    if uv_area <= 0.0 or world_area <= 0.0:
+        return 1.0
+    return math.sqrt(world_area / uv_area)
+
+
+def join_objects(objects, name, collection):
+    """Join mesh objects into one new object without bpy.ops.object.join
+
+    All geometry is read and concatenated as arrays and written into a new
+    mesh in one go. The joined object sits at the centre of the objects'
+    bounds; UV layers are matched by name, custom normals are kept. Objects
+    with mesh_arrays.has_unread_data() would lose that data and must be left out.
+    Lightmap charts are rescaled to a common texel density, so repacking the
+    lightmap layer afterwards gives every part its fair share of the atlas.
+    """
+    bounds = [world_bounds(obj) for obj in objects]
+    centre = (np.min([minimum for minimum, _ in bounds], axis=0) + np.max([maximum for _, maximum in bounds], axis=0)) * 0.5
+
+    materials = []
+    for obj in objects:
+        for material in object_materials(obj):
+            if material not in materials:
+                materials.append(material)
+
+    with_normals = any(obj.data.has_custom_normals for obj in objects)
+
+    parts = []
+    uv_names = []
+    for obj in objects:
+        transform = np.array(obj.matrix_world, dtype=np.float64)
+        transform[:3, 3] -= centre
+        geometry, uvs, normals = _part_geometry(obj, transform, materials, with_normals)
+        density = 1.0
+        if uv_layers.LIGHTMAP_LAYER in uvs:
+            density = _lightmap_density(uvs[uv_layers.LIGHTMAP_LAYER], geometry["loop_starts"],
+                                        len(geometry["loop_vertices"]), mesh_arrays.world_surface_area(obj))
+        for uv_name in uvs:
+            if uv_name not in uv_names:
+                uv_names.append(uv_name)
+        parts.append((geometry, uvs, normals, density))
+
+    # The densest part keeps its scale, so no part's charts shrink below the UV epsilon
+    largest_density = max(density for _, _, _, density in parts)
+
+    joined = {key: [] for key in ("co", "edge_vertices", "edge_sharp", "loop_vertices", "loop_edges",
+                                  "loop_starts", "material_indices", "use_smooth", "custom_normals")}
+    joined_uvs = {uv_name: [] for uv_name in uv_names}
+    vertex_offset = edge_offset = loop_offset = 0
+
+    for geometry, uvs, normals, density in parts:
+        loop_count = len(geometry["loop_vertices"])
+        joined["co"].append(geometry["co"])
+        joined["edge_vertices"].append(geometry["edge_vertices"] + vertex_offset)
+        joined["edge_sharp"].append(geometry["edge_sharp"])
+        joined["loop_vertices"].append(geometry["loop_vertices"] + vertex_offset)
+        joined["loop_edges"].append(geometry["loop_edges"] + edge_offset)
+        joined["loop_starts"].append(geometry["loop_starts"] + loop_offset)
+        joined["material_indices"].append(geometry["material_indices"])
+        joined["use_smooth"].append(geometry["use_smooth"])
+        if normals is not None:
+            joined["custom_normals"].append(normals)
+
+        for uv_name in uv_names:
+            layer = uvs.get(uv_name)
+            if layer is None:
+                layer = np.zeros((loop_count, 2), dtype=np.float32)
+            elif uv_name == uv_layers.LIGHTMAP_LAYER:
+                layer = layer * (density / largest_density)
+            joined_uvs[uv_name].append(layer)
+
+        vertex_offset += len(geometry["co"])
+        edge_offset += len(geometry["edge_vertices"])
+        loop_offset += loop_count
+
+    geometry = {key: np.concatenate(values) for key, values in joined.items() if values}
+    geometry["co"] = geometry["co"].astype(np.float32)
+    geometry["uv_names"] = np.array(uv_names, dtype=str)
+    for index, uv_name in enumerate(uv_names):
+        geometry[f"uv_{index}"] = np.concatenate(joined_uvs[uv_name]).astype(np.float32)
+
+    mesh = bpy.data.meshes.new(name)
+    for material in materials:
+        mesh.materials.append(material)
+    mesh_arrays.write_geometry(mesh, geometry)
+
+    joined_obj = bpy.data.objects.new(name, mesh)
+    joined_obj.location = centre.tolist()
+    collection.objects.link(joined_obj)
+    return joined_obj
@@ -0,0 +1,163 @@
+import numpy as np
+from . import mesh_arrays
+
+
+# Snapshots shared by the steps of a batch run, by mesh pointer (None outside a run)
+_shared = None
+
+
+def _counts(mesh):
+    """Element counts that change whenever the topology of a mesh does"""
+    return len(mesh.vertices), len(mesh.loops), len(mesh.polygons)
+
+
+class MeshSnapshot:
+    """Contiguous NumPy copy of a mesh's geometry, read once and kept up to date
+
+    Every array is read with foreach_get the first time it is used and kept
+    afterwards. Writes made through the snapshot update the mesh and the
+    arrays together, so the next step reads the new geometry without going
+    back to Blender. Changes made any other way (operators, BMesh, modifiers)
+    require discard() on the mesh.
+    """
+
+    def __init__(self, mesh):
+        self.mesh = mesh
+        self.counts = _counts(mesh)
+        self._arrays = {}
+        self._uvs = {}
+
+    def _array(self, name, read):
+        """Cached array name, read() fills in the missing ones"""
+        if name not in self._arrays:
+            self._arrays.update(read())
+        return self._arrays[name]
+
+    def _read_loops(self):
+        loop_vertices, loop_starts, loop_totals = mesh_arrays.read_polygon_loops(self.mesh)
+        return {"loop_vertices": loop_vertices, "loop_starts": loop_starts, "loop_totals": loop_totals}
+
+    def _read_triangles(self):
+        triangles, polygon_indices, loops = mesh_arrays.read_triangles(self.mesh)
+        return {"triangles": triangles, "triangle_polygons": polygon_indices, "triangle_loops": loops}
+
+    @property
+    def positions(self):
+        """(V, 3) float32 vertex coordinates"""
+        return self._array("positions", lambda: {"positions": mesh_arrays.read_vertex_coords(self.mesh)})
+
+    @property
+    def loop_vertices(self):
+        """Vertex index of every loop"""
+        return self._array("loop_vertices", self._read_loops)
+
+    @property
+    def loop_starts(self):
+        """First loop of every polygon"""
+        return self._array("loop_starts", self._read_loops)
+
+    @property
+    def loop_totals(self):
+        """Loop count of every polygon"""
+        return self._array("loop_totals", self._read_loops)
+
+    @property
+    def material_indices(self):
+        """Material index of every polygon"""
+        return self._array("material_indices",
+                           lambda: {"material_indices": mesh_arrays.read_material_indices(self.mesh)})
+
+    @property
+    def corner_normals(self):
+        """(L, 3) float32 normal of every face corner"""
+        return self._array("corner_normals", lambda: {"corner_normals": mesh_arrays.read_corner_normals(self.mesh)})
+
+    @property
+    def triangles(self):
+        """(M, 3) vertex indices of the mesh triangulation"""
+        return self._array("triangles", self._read_triangles)
+
+    @property
+    def triangle_polygons(self):
+        """Source polygon of every triangle"""
+        return self._array("triangle_polygons", self._read_triangles)
+
+    @property
+    def triangle_loops(self):
+        """(M, 3) loop of every triangle corner"""
+        return self._array("triangle_loops", self._read_triangles)
+
+    @property
+    def triangle_count(self):
+        """Number of triangles in the mesh triangulation, without computing it"""
+        if "triangles" in self._arrays:
+            return len(self._arrays["triangles"])
+        return int(self.loop_totals.sum()) - 2 * len(self.loop_totals)
+
+    def uvs(self, layer_name):
+        """(L, 2) float32 coordinates of a UV layer"""
+        if layer_name not in self._uvs:
+            self._uvs[layer_name] = mesh_arrays.read_uvs(self.mesh, layer_name)
+        return self._uvs[layer_name]
+
+    def write_uvs(self, layer_name, uvs):
+        """Write per-loop coordinates into a UV layer of the mesh and the snapshot"""
+        uvs = np.ascontiguousarray(uvs, dtype=np.float32)
+        mesh_arrays.write_uvs(self.mesh, layer_name, uvs)
+        self._uvs[layer_name] = uvs
+
+    def write_triangles(self, coords, triangles, material_indices=None, uvs=None, sharp_edges=None,
+                        custom_normals=None):
+        """Replace the geometry with a triangle soup, the snapshot takes it over as is"""
+        coords = np.ascontiguousarray(coords, dtype=np.float32)
+        triangles = np.ascontiguousarray(triangles, dtype=np.int32)
+        mesh_arrays.write_triangles(self.mesh, coords, triangles, material_indices, uvs, sharp_edges,
+                                    custom_normals)
+
+        # Known without reading back, except what Blender recomputes (normals)
+        count = len(triangles)
+        self._arrays = {
+            "positions": coords,
+            "loop_vertices": triangles.ravel(),
+            "loop_starts": np.arange(0, count * 3, 3, dtype=np.int32),
+            "loop_totals": np.full(count, 3, dtype=np.int32),
+            "triangles": triangles,
+            "triangle_polygons": np.arange(count, dtype=np.int32),
+            "triangle_loops": np.arange(count * 3, dtype=np.int32).reshape(-1, 3),
+        }
+        if material_indices is not None:
+            self._arrays["material_indices"] = np.ascontiguousarray(material_indices, dtype=np.int32)
+        self._uvs = {name: np.ascontiguousarray(layer_uvs, dtype=np.float32)
+                     for name, layer_uvs in (uvs or {}).items()}
+        self.counts = _counts(self.mesh)
+
+
+def get(mesh):
+    """Snapshot of mesh, shared with earlier steps during a batch run"""
+    if _shared is None:
+        return MeshSnapshot(mesh)
+
+    key = mesh.as_pointer()
+    snapshot = _shared.get(key)
+    # A different mesh may have been allocated at a freed mesh's address
+    if snapshot is None or snapshot.counts != _counts(mesh):
+        snapshot = _shared[key] = MeshSnapshot(mesh)
+    return snapshot
+
+
+def discard(mesh):
+    """Forget the shared snapshot of a mesh changed outside of it"""
+    if _shared is not None:
+        _shared.pop(mesh.as_pointer(), None)
+
+
+def begin_shared():
+    """Share snapshots between steps until end_shared()"""
+    global _shared
+    _shared = {}
+
+
+def end_shared():
+    """Stop sharing and release all snapshots"""
+    global _shared
+    _shared = None
@@ -0,0 +1,109 @@
+import bpy
+
+
+# Geometry nodes group shared by every decimated object
+TRIANGULATE_SMOOTH_GROUP = "AssetOptimizer Triangulate Smooth"
+
+# Bumped whenever the node tree below changes, older copies in a file are rebuilt
+GROUP_VERSION_PROPERTY = "asset_optimizer_version"
+TRIANGULATE_SMOOTH_VERSION = 2
+
+
+def _set_method(node, name, socket_name, value):
+    """Set a triangulate method, a node property before Blender 4.3 and an input socket since"""
+    if hasattr(node, name):
+        setattr(node, name, value)
+    else:
+        node.inputs[socket_name].default_value = value
+
+
+def _build_triangulate_smooth(tree):
+    """Fill tree with: optional triangulation, then smooth shading split at an edge angle
+
+    Edges that are already sharp stay sharp, the angle only adds new splits.
+    """
+    interface = tree.interface
+    interface.new_socket("Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+    interface.new_socket("Triangulate", in_out='INPUT', socket_type='NodeSocketBool')
+    interface.new_socket("Smooth by Angle", in_out='INPUT', socket_type='NodeSocketBool')
+    angle = interface.new_socket("Angle", in_out='INPUT', socket_type='NodeSocketFloat')
+    angle.subtype = 'ANGLE'
+    angle.default_value = 0.523599  # 30 degrees
+    angle.min_value = 0.0
+    angle.max_value = 3.14159
+    interface.new_socket("Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
+
+    nodes = tree.nodes
+    links = tree.links
+    group_input = nodes.new('NodeGroupInput')
+    group_output = nodes.new('NodeGroupOutput')
+
+    # The Triangulate input is the selection, so nothing is triangulated when it is off
+    triangulate = nodes.new('GeometryNodeTriangulate')
+    _set_method(triangulate, "quad_method", "Quad Method", 'BEAUTY')
+    _set_method(triangulate, "ngon_method", "N-gon Method", 'BEAUTY')
+    links.new(group_input.outputs["Geometry"], triangulate.inputs["Mesh"])
+    links.new(group_input.outputs["Triangulate"], triangulate.inputs["Selection"])
+
+    # Edges at or below the angle are smooth, sharper ones and those marked sharp are split
+    edge_angle = nodes.new('GeometryNodeInputMeshEdgeAngle')
+    compare = nodes.new('FunctionNodeCompare')
+    compare.data_type = 'FLOAT'
+    compare.operation = 'LESS_EQUAL'
+    links.new(edge_angle.outputs["Unsigned Angle"], compare.inputs[0])
+    links.new(group_input.outputs["Angle"], compare.inputs[1])
+
+    edge_smooth = nodes.new('GeometryNodeInputEdgeSmooth')
+    keep_sharp = nodes.new('FunctionNodeBooleanMath')
+    keep_sharp.operation = 'AND'
+    links.new(compare.outputs["Result"], keep_sharp.inputs[0])
+    links.new(edge_smooth.outputs["Smooth"], keep_sharp.inputs[1])
+
+    smooth_edges = nodes.new('GeometryNodeSetShadeSmooth')
+    smooth_edges.domain = 'EDGE'
+    links.new(triangulate.outputs["Mesh"], smooth_edges.inputs["Geometry"])
+    links.new(group_input.outputs["Smooth by Angle"], smooth_edges.inputs["Selection"])
+    links.new(keep_sharp.outputs["Boolean"], smooth_edges.inputs["Shade Smooth"])
+
+    smooth_faces = nodes.new('GeometryNodeSetShadeSmooth')
+    smooth_faces.domain = 'FACE'
+    smooth_faces.inputs["Shade Smooth"].default_value = True
+    links.new(smooth_edges.outputs["Geometry"], smooth_faces.inputs["Geometry"])
+    links.new(group_input.outputs["Smooth by Angle"], smooth_faces.inputs["Selection"])
+    links.new(smooth_faces.outputs["Geometry"], group_output.inputs["Geometry"])
+
+    for x, node in enumerate((group_input, triangulate, smooth_edges, smooth_faces, group_output)):
+        node.location = (x * 200.0, 0.0)
+    edge_angle.location = (0.0, -200.0)
+    compare.location = (200.0, -200.0)
+    edge_smooth.location = (200.0, -350.0)
+    keep_sharp.location = (400.0, -200.0)
+
+
+def triangulate_smooth_group():
+    """The shared triangulate + smooth-by-angle node group, built on first use"""
+    group = bpy.data.node_groups.get(TRIANGULATE_SMOOTH_GROUP)
+    if group and group.get(GROUP_VERSION_PROPERTY) == TRIANGULATE_SMOOTH_VERSION:
+        return group
+
+    tree = bpy.data.node_groups.new(TRIANGULATE_SMOOTH_GROUP, 'GeometryNodeTree')
+    _build_triangulate_smooth(tree)
+    tree[GROUP_VERSION_PROPERTY] = TRIANGULATE_SMOOTH_VERSION
+
+    # An outdated copy hands its users over and gives up the name
+    if group:
+        group.user_remap(tree)
+        bpy.data.node_groups.remove(group)
+        tree.name = TRIANGULATE_SMOOTH_GROUP
+    return tree
+
+
+def add_group_modifier(obj, name, group, **inputs):
+    """Add a geometry nodes modifier running group, with group inputs set by socket name"""
+    modifier = obj.modifiers.new(name=name, type='NODES')
+    modifier.node_group = group
+
+    for item in group.interface.items_tree:
+        if item.item_type == 'SOCKET' and item.in_out == 'INPUT' and item.name in inputs:
+            modifier[item.identifier] = inputs[item.name]
+    return modifier
@@ -0,0 +1,291 @@
+import csv
+import functools
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+import bpy
+from . import helpers, mesh_snapshot
+
+
+# Columns of a record, in export order
+FIELDS = (
+    "operator", "step", "object", "depth", "start", "seconds",
+    "triangles_before", "triangles_after",
+    "peak_memory_mb", "memory_growth_mb",
+    "mode_switches", "ops_calls",
+)
+
+# Operators counted as mode switches
+MODE_SWITCH_OPS = {"object.mode_set", "object.editmode_toggle"}
+
+
+class ProfileSession:
+    """Timing records of one profiled operator run, including nested operators"""
+
+    def __init__(self, name):
+        self.name = name
+        self.records = []
+        self.depth = 0
+        self.ops_calls = 0
+        self.mode_switches = 0
+        self.start_time = time.perf_counter()
+        self.seconds = 0.0
+
+    def ordered_records(self):
+        """Records in the order they started (they are stored as they finish)"""
+        return sorted(self.records, key=lambda record: record["start"])
+
+    def step_summary(self):
+        """(operator, step, calls, seconds, triangles before, triangles after) per step, slowest first"""
+        steps = {}
+        for record in self.records:
+            if record["object"]:
+                continue
+            key = (record["operator"], record["step"])
+            calls, seconds, before, after = steps.get(key, (0, 0.0, 0, 0))
+            steps[key] = (calls + 1, seconds + record["seconds"],
+                          before + record["triangles_before"], after + record["triangles_after"])
+
+        rows = [(operator, step, *values) for (operator, step), values in steps.items()]
+        return sorted(rows, key=lambda row: row[3], reverse=True)
+
+
+_session = None       # Session being recorded
+_last_session = None  # Last finished session, shown in the panel and exported
+
+
+def peak_memory():
+    """Peak resident memory of the Blender process in bytes (0 where unsupported)"""
+    try:
+        import resource
+    except ImportError:
+        counters = _windows_memory_counters()
+        return counters.PeakWorkingSetSize if counters else 0
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def current_memory():
+    """Resident memory of the Blender process right now in bytes (0 where unsupported)"""
+    if sys.platform == 'win32':
+        counters = _windows_memory_counters()
+        return counters.WorkingSetSize if counters else 0
+
+    try:
+        with open("/proc/self/statm", "r") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _windows_memory_counters():
+    """Process memory counters on Windows through psapi, None where unavailable"""
+    try:
+        import ctypes
+        from ctypes import wintypes
+    except ImportError:
+        return None
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    try:
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+        return counters
+    except (AttributeError, OSError):
+        return None
+
+
+def _operator_class():
+    """Class of the callable returned for bpy.ops.<module>.<operator>"""
+    return type(bpy.ops.object.mode_set)
+
+
+_original_call = None
+
+
+def _counting_call(op, *args, **kwargs):
+    """bpy.ops call wrapper that counts operator calls and mode switches"""
+    if _session is not None:
+        _session.ops_calls += 1
+        if op.idname_py() in MODE_SWITCH_OPS:
+            _session.mode_switches += 1
+    return _original_call(op, *args, **kwargs)
+
+
+def _install_op_counter():
+    """Route every bpy.ops call through _counting_call while a session is recorded"""
+    global _original_call
+    if _original_call is None:
+        op_class = _operator_class()
+        _original_call = op_class.__call__
+        op_class.__call__ = _counting_call
+
+
+def _remove_op_counter():
+    """Restore the original bpy.ops call"""
+    global _original_call
+    if _original_call is not None:
+        _operator_class().__call__ = _original_call
+        _original_call = None
+
+
+def is_enabled(context):
+    """Whether profiling is switched on for this scene"""
+    props = getattr(context.scene, "vr_asset_optimizer", None)
+    return bool(props and props.enable_profiling)
+
+
+def begin_session(name):
+    """Start recording a new session, returns False when one is already running"""
+    global _session
+    if _session is not None:
+        return False
+    _session = ProfileSession(name)
+    _install_op_counter()
+    return True
+
+
+def end_session():
+    """Finish the running session and keep it as the last one"""
+    global _session, _last_session
+    if _session is None:
+        return
+    _remove_op_counter()
+    _session.seconds = time.perf_counter() - _session.start_time
+    _last_session = _session
+    _session = None
+
+
+def last_session():
+    """The last finished session, or None"""
+    return _last_session
+
+
+def _existing(objects):
+    """Objects that were not removed in the meantime (joined or replaced by a step)"""
+    existing = []
+    for obj in objects:
+        try:
+            obj.name
+        except ReferenceError:
+            continue
+        existing.append(obj)
+    return existing
+
+
+def _triangles(objects):
+    """Triangle count of the unique meshes of objects that still exist"""
+    total = 0
+    for instances in helpers.group_by_mesh(_existing(objects)).values():
+        try:
+            total += mesh_snapshot.get(instances[0].data).triangle_count
+        except ReferenceError:
+            continue
+    return total
+
+
+@contextmanager
+def record(operator, step, objects=(), obj=None):
+    """Record wall time, triangles, memory and bpy.ops calls of the enclosed block
+
+    Does nothing unless a session is running. Records one step of an operator
+    working on objects, or a single object within it when obj is given.
+    """
+    session = _session
+    if session is None:
+        yield
+        return
+
+    if obj is not None:
+        objects = [obj]
+    objects = [item for item in objects if item.type == 'MESH']
+    entry = {
+        "operator": operator,
+        "step": step,
+        "object": obj.name if obj else "",
+        "depth": session.depth,
+        "triangles_before": _triangles(objects),
+    }
+    memory_before = peak_memory()
+    ops_before = session.ops_calls
+    modes_before = session.mode_switches
+    start_time = time.perf_counter()
+    entry["start"] = start_time - session.start_time
+    session.depth += 1
+
+    try:
+        yield
+    finally:
+        session.depth -= 1
+        entry["seconds"] = time.perf_counter() - start_time
+        entry["triangles_after"] = _triangles(objects)
+        memory_after = peak_memory()
+        entry["peak_memory_mb"] = memory_after / (1024 * 1024)
+        entry["memory_growth_mb"] = (memory_after - memory_before) / (1024 * 1024)
+        entry["ops_calls"] = session.ops_calls - ops_before
+        entry["mode_switches"] = session.mode_switches - modes_before
+        session.records.append(entry)
+
+
+def profiled(execute):
+    """Decorator recording an operator's execute() as one step when profiling is enabled
+
+    The outermost profiled operator opens the session and closes it when it
+    returns, unless it went modal; modal operators call end_session() themselves.
+    """
+    @functools.wraps(execute)
+    def wrapper(self, context):
+        if not is_enabled(context):
+            return execute(self, context)
+
+        owner = begin_session(self.bl_idname)
+        result = {'CANCELLED'}
+        try:
+            with record(self.bl_idname, "execute", list(context.selected_objects)):
+                result = execute(self, context)
+        finally:
+            if owner and 'RUNNING_MODAL' not in result:
+                end_session()
+        return result
+
+    return wrapper
+
+
+def export_json(session, filepath):
+    """Write a session with all its records as JSON"""
+    data = {
+        "session": session.name,
+        "seconds": session.seconds,
+        "ops_calls": session.ops_calls,
+        "mode_switches": session.mode_switches,
+        "records": [{field: record[field] for field in FIELDS} for record in session.ordered_records()],
+    }
+    with open(filepath, "w", encoding="utf-8") as profile_file:
+        json.dump(data, profile_file, indent=2)
+
+
+def export_csv(session, filepath):
+    """Write the records of a session as CSV, one row per step or object"""
+    with open(filepath, "w", encoding="utf-8", newline="") as profile_file:
+        writer = csv.DictWriter(profile_file, fieldnames=FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(session.ordered_records())
@@ -34,6 +34,12 @@ class VRAssetOptimizerProperties(PropertyGroup):
         default='UNITY'
     )
     
+    enable_profiling: BoolProperty(
+        name="Profile Operations",
+        description="Record time, triangles, memory, mode switches and operator calls per step and object",
+        default=False
+    )
+    
     show_advanced: BoolProperty(
         name="Show Advanced",
         description="Show advanced options",
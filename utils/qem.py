@@ -0,0 +1,309 @@
+import heapq
+
+import numpy as np
+from . import mesh_arrays, mesh_snapshot
+
+
+# Weight of the planes that keep open boundaries in place
+BOUNDARY_WEIGHT = 1000.0
+
+# Relative determinant below which the optimal position is considered unstable
+_DET_EPSILON = 1e-9
+
+
+def _plane_quadrics(planes, weights):
+    """Packed symmetric quadrics [aa ab ac ad bb bc bd cc cd dd] for (N, 4) planes"""
+    a, b, c, d = planes.T
+    packed = np.stack((a * a, a * b, a * c, a * d,
+                       b * b, b * c, b * d,
+                       c * c, c * d,
+                       d * d), axis=1)
+    return packed * weights[:, None]
+
+
+def _evaluate(q, x, y, z):
+    """Quadric error of points, works on scalars and arrays alike"""
+    return (q[0] * x * x + 2.0 * q[1] * x * y + 2.0 * q[2] * x * z + 2.0 * q[3] * x +
+            q[4] * y * y + 2.0 * q[5] * y * z + 2.0 * q[6] * y +
+            q[7] * z * z + 2.0 * q[8] * z +
+            q[9])
+
+
+def _optimal_collapse(q, pa, pb):
+    """Best position and cost for collapsing an edge with combined quadric q"""
+    q11, q12, q13, q14, q22, q23, q24, q33, q34, q44 = q
+
+    det = (q11 * (q22 * q33 - q23 * q23) -
+           q12 * (q12 * q33 - q23 * q13) +
+           q13 * (q12 * q23 - q22 * q13))
+    scale = q11 + q22 + q33
+
+    if scale > 0.0 and abs(det) > _DET_EPSILON * scale * scale * scale:
+        # Cramer's rule on A x = -b
+        bx, by, bz = -q14, -q24, -q34
+        x = (bx * (q22 * q33 - q23 * q23) -
+             q12 * (by * q33 - q23 * bz) +
+             q13 * (by * q23 - q22 * bz)) / det
+        y = (q11 * (by * q33 - q23 * bz) -
+             bx * (q12 * q33 - q23 * q13) +
+             q13 * (q12 * bz - by * q13)) / det
+        z = (q11 * (q22 * bz - by * q23) -
+             q12 * (q12 * bz - by * q13) +
+             bx * (q12 * q23 - q22 * q13)) / det
+
+        # Reject solutions that wander far away from the edge
+        mx, my, mz = (pa[0] + pb[0]) * 0.5, (pa[1] + pb[1]) * 0.5, (pa[2] + pb[2]) * 0.5
+        ex, ey, ez = pb[0] - pa[0], pb[1] - pa[1], pb[2] - pa[2]
+        if (x - mx) ** 2 + (y - my) ** 2 + (z - mz) ** 2 <= 4.0 * (ex * ex + ey * ey + ez * ez):
+            return max(0.0, _evaluate(q, x, y, z)), (x, y, z)
+
+    midpoint = ((pa[0] + pb[0]) * 0.5, (pa[1] + pb[1]) * 0.5, (pa[2] + pb[2]) * 0.5)
+    best = min((pa, pb, midpoint), key=lambda p: _evaluate(q, p[0], p[1], p[2]))
+    return max(0.0, _evaluate(q, best[0], best[1], best[2])), best
+
+
+def _normal(p0, p1, p2):
+    """Unnormalized triangle normal"""
+    ux, uy, uz = p1[0] - p0[0], p1[1] - p0[1], p1[2] - p0[2]
+    vx, vy, vz = p2[0] - p0[0], p2[1] - p0[1], p2[2] - p0[2]
+    return (uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx)
+
+
+class CollapseSequence:
+    """One quadric-error edge-collapse ordering of a triangle mesh
+
+    The sequence is computed once, down to the smallest face count that will be
+    requested. Any coarser level of detail is then produced by replaying a
+    prefix of it with simplify(), without running the simplifier again.
+
+    Only the quadric setup is vectorized, the greedy collapse loop runs in
+    Python. Tens of thousands of triangles take seconds, a million take
+    minutes, so large meshes belong to the Decimate modifier.
+    """
+
+    def __init__(self, coords, triangles, min_faces=0, preserve_boundaries=True):
+        self.coords = np.asarray(coords, dtype=np.float64)
+        self.triangles = np.asarray(triangles, dtype=np.int64)
+        self.face_count = len(self.triangles)
+
+        collapse_from = []
+        collapse_to = []
+        positions = []
+        faces_remaining = []
+
+        self._build(min_faces, preserve_boundaries, collapse_from, collapse_to, positions, faces_remaining)
+
+        self.collapse_from = np.array(collapse_from, dtype=np.int64)
+        self.collapse_to = np.array(collapse_to, dtype=np.int64)
+        self.positions = np.array(positions, dtype=np.float64).reshape(-1, 3)
+        self.faces_remaining = np.array(faces_remaining, dtype=np.int64)
+
+    def _build(self, min_faces, preserve_boundaries, collapse_from, collapse_to, positions, faces_remaining):
+        """Run the greedy collapse loop and record every collapse"""
+        coords = self.coords
+        triangles = self.triangles
+        if self.face_count == 0:
+            return
+
+        # Per-vertex quadrics from the area-weighted face planes
+        p0 = coords[triangles[:, 0]]
+        p1 = coords[triangles[:, 1]]
+        p2 = coords[triangles[:, 2]]
+        normals = np.cross(p1 - p0, p2 - p0)
+        double_areas = np.linalg.norm(normals, axis=1)
+        valid = double_areas > 0.0
+        unit_normals = np.zeros_like(normals)
+        unit_normals[valid] = normals[valid] / double_areas[valid, None]
+        planes = np.concatenate((unit_normals, -np.einsum('ij,ij->i', unit_normals, p0)[:, None]), axis=1)
+        face_quadrics = _plane_quadrics(planes, double_areas * 0.5)
+
+        quadrics = np.zeros((len(coords), 10), dtype=np.float64)
+        for corner in range(3):
+            np.add.at(quadrics, triangles[:, corner], face_quadrics)
+
+        # Edges with their owning faces, boundaries are used by one face only
+        face_edges = np.concatenate((triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]))
+        edge_faces = np.tile(np.arange(self.face_count), 3)
+        sorted_edges = np.sort(face_edges, axis=1)
+        edges, edge_index, edge_uses = np.unique(sorted_edges, axis=0, return_inverse=True, return_counts=True)
+        edge_index = edge_index.ravel()
+
+        if preserve_boundaries:
+            boundary = edge_uses[edge_index] == 1
+            start = coords[face_edges[boundary, 0]]
+            end = coords[face_edges[boundary, 1]]
+            direction = end - start
+            constraint = np.cross(direction, unit_normals[edge_faces[boundary]])
+            length = np.linalg.norm(constraint, axis=1)
+            keep = length > 0.0
+            constraint = constraint[keep] / length[keep, None]
+            start = start[keep]
+            boundary_planes = np.concatenate(
+                (constraint, -np.einsum('ij,ij->i', constraint, start)[:, None]), axis=1)
+            weights = BOUNDARY_WEIGHT * np.einsum('ij,ij->i', direction[keep], direction[keep])
+            boundary_quadrics = _plane_quadrics(boundary_planes, weights)
+            np.add.at(quadrics, face_edges[boundary, 0][keep], boundary_quadrics)
+            np.add.at(quadrics, face_edges[boundary, 1][keep], boundary_quadrics)
+
+        # From here on the loop works on plain Python data, which is far cheaper
+        # than NumPy for the handful of elements touched by each collapse
+        quadric_list = quadrics.tolist()
+        position_list = coords.tolist()
+        faces = triangles.tolist()
+        vertex_faces = [set() for _ in range(len(coords))]
+        for face_index, face in enumerate(faces):
+            for vertex in face:
+                vertex_faces[vertex].add(face_index)
+        version = [0] * len(coords)
+
+        heap = []
+        for a, b in edges.tolist():
+            q = [x + y for x, y in zip(quadric_list[a], quadric_list[b])]
+            cost, _ = _optimal_collapse(q, position_list[a], position_list[b])
+            heap.append((cost, a, b, 0, 0))
+        heapq.heapify(heap)
+
+        live_faces = self.face_count
+
+        while heap and live_faces > min_faces:
+            cost, a, b, version_a, version_b = heapq.heappop(heap)
+            if version[a] != version_a or version[b] != version_b:
+                continue
+
+            faces_a = vertex_faces[a]
+            faces_b = vertex_faces[b]
+            shared = faces_a & faces_b
+            if not shared:
+                continue
+
+            # Link condition: the edge may only share the neighbours of its own faces
+            neighbours_a = {v for f in faces_a for v in faces[f]} - {a}
+            neighbours_b = {v for f in faces_b for v in faces[f]} - {b}
+            if len(neighbours_a & neighbours_b) > len(shared):
+                continue
+
+            q = [x + y for x, y in zip(quadric_list[a], quadric_list[b])]
+            _, target = _optimal_collapse(q, position_list[a], position_list[b])
+
+            # Reject collapses that would flip a surviving face
+            flipped = False
+            for face_index in (faces_a | faces_b) - shared:
+                corners = faces[face_index]
+                before = [position_list[v] for v in corners]
+                after = [target if v == a or v == b else position_list[v] for v in corners]
+                n0 = _normal(*before)
+                n1 = _normal(*after)
+                if n0[0] * n1[0] + n0[1] * n1[1] + n0[2] * n1[2] <= 0.0:
+                    flipped = True
+                    break
+            if flipped:
+                continue
+
+            # Collapse b into a
+            for face_index in shared:
+                for vertex in faces[face_index]:
+                    if vertex != b:
+                        vertex_faces[vertex].discard(face_index)
+            for face_index in faces_b - shared:
+                face = faces[face_index]
+                face[face.index(b)] = a
+                faces_a.add(face_index)
+            vertex_faces[b] = set()
+
+            position_list[a] = target
+            quadric_list[a] = q
+            version[a] += 1
+            version[b] += 1
+            live_faces -= len(shared)
+
+            collapse_from.append(b)
+            collapse_to.append(a)
+            positions.append(target)
+            faces_remaining.append(live_faces)
+
+            # Re-queue every edge around the merged vertex
+            for neighbour in {v for f in faces_a for v in faces[f]} - {a}:
+                q = [x + y for x, y in zip(quadric_list[a], quadric_list[neighbour])]
+                cost, _ = _optimal_collapse(q, position_list[a], position_list[neighbour])
+                heapq.heappush(heap, (cost, a, neighbour, version[a], version[neighbour]))
+
+    def collapse_count(self, target_faces):
+        """Number of collapses needed to get down to target_faces (or as close as possible)"""
+        reached = np.flatnonzero(self.faces_remaining <= target_faces)
+        return int(reached[0]) + 1 if len(reached) else len(self.faces_remaining)
+
+    def simplify(self, ratio):
+        """Replay the sequence down to ratio of the original faces
+
+        Returns the compacted coordinates, triangles, for every triangle the
+        index of the input triangle it came from, and for every input vertex
+        its index in the compacted coordinates (-1 when it was removed).
+        """
+        target_faces = int(self.face_count * ratio)
+        steps = self.collapse_count(target_faces) if ratio < 1.0 else 0
+
+        # Resolve every vertex to the one it was finally collapsed into
+        parent = np.arange(len(self.coords), dtype=np.int64)
+        parent[self.collapse_from[:steps]] = self.collapse_to[:steps]
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+
+        # Each survivor takes the position of the last collapse into it
+        coords = self.coords.copy()
+        if steps:
+            reversed_targets = self.collapse_to[:steps][::-1]
+            survivors, first_in_reversed = np.unique(reversed_targets, return_index=True)
+            coords[survivors] = self.positions[steps - 1 - first_in_reversed]
+
+        triangles = parent[self.triangles]
+        alive = ((triangles[:, 0] != triangles[:, 1]) &
+                 (triangles[:, 1] != triangles[:, 2]) &
+                 (triangles[:, 2] != triangles[:, 0]))
+        source_faces = np.flatnonzero(alive)
+        triangles = triangles[alive]
+
+        used, compact = np.unique(triangles, return_inverse=True)
+        compact_index = np.full(len(self.coords), -1, dtype=np.int64)
+        compact_index[used] = np.arange(len(used))
+        return coords[used], compact.reshape(-1, 3), source_faces, compact_index[parent]
+
+
+def simplify_mesh(mesh, ratios, preserve_boundaries=True):
+    """Simplify a Blender mesh to several ratios from one collapse sequence
+
+    Returns one dictionary of write_triangles() arguments per ratio. Every
+    kept triangle corner takes its UVs and custom normal from the corner of the
+    input triangle it came from, and an edge stays sharp when both its
+    vertices survive or were collapsed into the ends of the new edge.
+    """
+    snapshot = mesh_snapshot.get(mesh)
+    coords = snapshot.positions
+    triangles = snapshot.triangles
+    material_indices = snapshot.material_indices[snapshot.triangle_polygons]
+    triangle_loops = snapshot.triangle_loops
+
+    uvs = {layer.name: snapshot.uvs(layer.name) for layer in mesh.uv_layers}
+    custom_normals = snapshot.corner_normals if mesh.has_custom_normals else None
+    sharp_edges = mesh_arrays.read_sharp_edges(mesh)
+
+    min_faces = int(len(triangles) * min(ratios))
+    sequence = CollapseSequence(coords, triangles, min_faces, preserve_boundaries)
+
+    results = []
+    for ratio in ratios:
+        lod_coords, lod_triangles, source_faces, vertex_index = sequence.simplify(ratio)
+        loops = triangle_loops[source_faces].ravel()
+        lod_sharp = vertex_index[sharp_edges]
+        lod_sharp = lod_sharp[(lod_sharp[:, 0] != lod_sharp[:, 1]) & (lod_sharp >= 0).all(axis=1)]
+        results.append({
+            "coords": lod_coords,
+            "triangles": lod_triangles,
+            "material_indices": material_indices[source_faces],
+            "uvs": {name: layer_uvs[loops] for name, layer_uvs in uvs.items()},
+            "sharp_edges": lod_sharp,
+            "custom_normals": custom_normals[loops] if custom_normals is not None else None,
+        })
+    return results
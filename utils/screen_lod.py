@@ -0,0 +1,87 @@
+import math
+from . import mesh_arrays, mesh_snapshot
+
+
+# Custom properties written on every LOD object
+LEVEL_SCREEN_SIZE = "LOD_ScreenSize"            # Unreal: screen size from which the level is shown
+TRANSITION_HEIGHT = "LOD_TransitionHeight"      # Unity: screen height below which the next level takes over
+TRANSITION_DISTANCE = "LOD_TransitionDistance"  # Camera distance of that transition
+
+# Levels below this many triangles are not worth generating
+MIN_LOD_TRIANGLES = 12
+
+
+class ScreenLODPlan:
+    """LOD ratios and screen-relative transition heights of one object"""
+
+    def __init__(self, ratios, screen_sizes, cull_height):
+        self.ratios = ratios              # Triangle ratio of every level
+        self.screen_sizes = screen_sizes  # Screen height from which each level is used, LOD0 = 1.0
+        self.cull_height = cull_height    # Screen height below which the object is not drawn
+
+    def transition_heights(self):
+        """Screen height at which each level hands over to the next (Unity LODGroup)"""
+        return self.screen_sizes[1:] + [self.cull_height]
+
+    def transition_distances(self, radius, vertical_fov):
+        """Camera distance of every transition, for a bounding sphere of radius"""
+        tangent = math.tan(vertical_fov * 0.5)
+        return [radius / (height * tangent) for height in self.transition_heights()]
+
+
+def bounding_radius(obj):
+    """World-space bounding sphere radius of an object"""
+    return obj.dimensions.length * 0.5
+
+
+def required_ratio(obj, screen_resolution, pixel_error):
+    """Triangle ratio an object needs when it fills the screen height
+
+    A triangle of area a has edges of about sqrt(a); with the bounding sphere
+    drawn h screen heights tall, one world unit spans h * resolution / 2r
+    pixels. Keeping edges below pixel_error pixels needs a ratio of
+    k(h) = h^2 * returned value, so a level with ratio k is good enough
+    up to a screen height of sqrt(k / returned value).
+    """
+    triangles = mesh_snapshot.get(obj.data).triangle_count
+    radius = bounding_radius(obj)
+    if triangles == 0 or radius <= 0.0:
+        return 1.0
+
+    triangle_area = mesh_arrays.world_surface_area(obj) / triangles
+    pixels_per_unit = screen_resolution / (2.0 * radius)
+    return triangle_area * pixels_per_unit ** 2 / pixel_error ** 2
+
+
+def plan_lods(obj, max_levels, factor, screen_resolution=1080, pixel_error=1.0, min_screen_height=0.01):
+    """LOD levels of an object from a target pixel error
+
+    LOD0 keeps what the object needs at full screen height, every further
+    level factor times the triangles of the one before. Levels are added
+    while they are still shown above min_screen_height, keep at least
+    MIN_LOD_TRIANGLES triangles and max_levels is not reached.
+    """
+    triangles = mesh_snapshot.get(obj.data).triangle_count
+    full_ratio = required_ratio(obj, screen_resolution, pixel_error)
+
+    ratios = [min(1.0, full_ratio)]
+    screen_sizes = [1.0]
+    while len(ratios) < max_levels:
+        ratio = ratios[-1] * factor
+        screen_size = math.sqrt(ratio / full_ratio) if full_ratio > 0.0 else 0.0
+        if screen_size < min_screen_height or ratio * triangles < MIN_LOD_TRIANGLES:
+            break
+        ratios.append(ratio)
+        screen_sizes.append(min(1.0, screen_size))
+
+    return ScreenLODPlan(ratios, screen_sizes, min_screen_height)
+
+
+def store_transitions(lod_objects, plan, radius, vertical_fov):
+    """Write the screen sizes and transitions of a plan onto its LOD objects"""
+    heights = plan.transition_heights()
+    distances = plan.transition_distances(radius, vertical_fov)
+    for lod_obj, screen_size, height, distance in zip(lod_objects, plan.screen_sizes, heights, distances):
+        lod_obj[LEVEL_SCREEN_SIZE] = screen_size
+        lod_obj[TRANSITION_HEIGHT] = height
+        lod_obj[TRANSITION_DISTANCE] = distance
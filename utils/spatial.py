@@ -0,0 +1,145 @@
+import numpy as np
+
+
+# Neighbour cell offsets covering half of a 3x3x3 block (plus the cell itself),
+# so every pair of adjacent cells is visited exactly once
+_HALF_NEIGHBOURHOOD = np.array(
+    [(0, 0, 0)] +
+    [(dx, dy, dz)
+     for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+     if (dx, dy, dz) > (0, 0, 0)],
+    dtype=np.int64
+)
+
+
+def _hash_cells(cells):
+    """Hash integer grid cells into a single int64 key (collisions are harmless)"""
+    return ((cells[:, 0] * 73856093) ^
+            (cells[:, 1] * 19349663) ^
+            (cells[:, 2] * 83492791))
+
+
+def connected_components(count, pairs):
+    """Label connected components of a graph given as an (N, 2) array of index pairs
+
+    Every element ends up labelled with the lowest index of its component.
+    """
+    labels = np.arange(count, dtype=np.int64)
+    if len(pairs) == 0:
+        return labels
+    
+    a = pairs[:, 0]
+    b = pairs[:, 1]
+    
+    while True:
+        label_a = labels[a]
+        label_b = labels[b]
+        differ = label_a != label_b
+        if not differ.any():
+            return labels
+        
+        # Hook the larger root onto the smaller one, then flatten the trees
+        low = np.minimum(label_a[differ], label_b[differ])
+        np.minimum.at(labels, label_a[differ], low)
+        np.minimum.at(labels, label_b[differ], low)
+        
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+
+
+def find_close_pairs(coords, distance):
+    """Find all index pairs (i < j) of points closer than distance using a spatial hash"""
+    count = len(coords)
+    if count < 2 or distance <= 0.0:
+        return np.empty((0, 2), dtype=np.int64)
+    
+    cells = np.floor(coords / distance).astype(np.int64)
+    keys = _hash_cells(cells)
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    
+    limit = distance * distance
+    found = []
+    
+    for offset in _HALF_NEIGHBOURHOOD:
+        neighbour_keys = _hash_cells(cells + offset)
+        start = np.searchsorted(sorted_keys, neighbour_keys, side='left')
+        end = np.searchsorted(sorted_keys, neighbour_keys, side='right')
+        counts = end - start
+        total = int(counts.sum())
+        if total == 0:
+            continue
+        
+        # Expand every [start, end) range into candidate pairs
+        first = np.repeat(np.arange(count, dtype=np.int64), counts)
+        run_offsets = np.repeat(np.cumsum(counts) - counts, counts)
+        second = order[np.repeat(start, counts) + np.arange(total) - run_offsets]
+        
+        keep = first != second
+        first = first[keep]
+        second = second[keep]
+        
+        delta = coords[first] - coords[second]
+        close = np.einsum('ij,ij->i', delta, delta) <= limit
+        if close.any():
+            found.append(np.stack((np.minimum(first[close], second[close]),
+                                   np.maximum(first[close], second[close])), axis=1))
+    
+    if not found:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.unique(np.concatenate(found), axis=0)
+
+
+def find_merge_targets(coords, distance):
+    """Map every point to the point it should be welded onto
+
+    Points are clustered by distance and welded onto the lowest index of their
+    cluster. Points that chain into a cluster but lie further than distance from
+    its target are left alone, so no point ever moves by more than distance.
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    count = len(coords)
+    targets = connected_components(count, find_close_pairs(coords, distance))
+    
+    delta = coords - coords[targets]
+    too_far = np.einsum('ij,ij->i', delta, delta) > distance * distance
+    targets[too_far] = np.flatnonzero(too_far)
+    return targets
+
+
+def median_edge_length(coords, loop_vertices, loop_starts, loop_totals):
+    """Median length of the polygon edges of a mesh, zero-length edges left out"""
+    if len(loop_vertices) == 0:
+        return 0.0
+    
+    # Every loop runs to the next loop of its polygon, the last one back to the first
+    following = np.arange(1, len(loop_vertices) + 1, dtype=np.int64)
+    following[loop_starts + loop_totals - 1] = loop_starts
+    
+    delta = coords[loop_vertices[following]] - coords[loop_vertices]
+    lengths = np.sqrt(np.einsum('ij,ij->i', delta, delta))
+    lengths = lengths[lengths > 0.0]
+    return float(np.median(lengths)) if len(lengths) else 0.0
+
+
+def adaptive_merge_distance(coords, loop_vertices, loop_starts, loop_totals, bounds_factor, edge_factor):
+    """Merge distance scaled to a mesh's size and edge lengths
+
+    The smaller of a fraction of the bounding box diagonal and a fraction of
+    the median edge length. Works in the mesh's own coordinates, so the result
+    does not depend on the object's scale.
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    if len(coords) < 2:
+        return 0.0
+    
+    diagonal = float(np.linalg.norm(coords.max(axis=0) - coords.min(axis=0)))
+    distance = bounds_factor * diagonal
+    
+    median_edge = median_edge_length(coords, loop_vertices, loop_starts, loop_totals)
+    if median_edge > 0.0:
+        distance = min(distance, edge_factor * median_edge)
+    return distance
@@ -0,0 +1,99 @@
+import bpy
+from bpy.app.handlers import persistent
+
+
+class SelectionStats:
+    """Mesh statistics of the current selection, gathered in a single pass"""
+
+    def __init__(self, context):
+        self.mesh_count = 0
+        self.poly_count = 0
+        self.vert_count = 0
+        self.uv_layers = []  # (object name, UV layer count) of meshes that have UVs
+        self.key = []
+        self.names = set()
+
+        for obj in context.selected_objects:
+            if obj.type != 'MESH':
+                continue
+            mesh = obj.data
+            self.mesh_count += 1
+            self.poly_count += len(mesh.polygons)
+            self.vert_count += len(mesh.vertices)
+
+            uv_count = len(mesh.uv_layers)
+            if uv_count:
+                self.uv_layers.append((obj.name, uv_count))
+
+            self.key.append((obj.as_pointer(), mesh.as_pointer()))
+            self.names.add(obj.name)
+            self.names.add(mesh.name)
+
+
+_stats = None
+_geometry_changed = False
+_selection_changed = False
+
+
+def selection_key(context):
+    """Identity of the selected meshes and their datablocks"""
+    return [(obj.as_pointer(), obj.data.as_pointer())
+            for obj in context.selected_objects if obj.type == 'MESH']
+
+
+def get_selection_stats(context):
+    """Cached statistics, recomputed only after the selection or its geometry changed"""
+    global _stats, _geometry_changed, _selection_changed
+
+    if _stats is None or _geometry_changed:
+        _stats = SelectionStats(context)
+    elif _selection_changed and selection_key(context) != _stats.key:
+        _stats = SelectionStats(context)
+
+    _geometry_changed = False
+    _selection_changed = False
+    return _stats
+
+
+def invalidate():
+    """Drop the cached statistics"""
+    global _stats
+    _stats = None
+
+
+@persistent
+def on_depsgraph_update(scene, depsgraph):
+    """Flag the cache when geometry of a selected mesh or the selection may have changed"""
+    global _geometry_changed, _selection_changed
+
+    if _stats is None:
+        return
+
+    for update in depsgraph.updates:
+        id_data = update.id.original
+        if isinstance(id_data, bpy.types.Scene):
+            # Selection changes are reported as scene updates
+            _selection_changed = True
+        elif update.is_updated_geometry and id_data.name in _stats.names:
+            _geometry_changed = True
+
+
+@persistent
+def on_load_post(*args):
+    """A new file invalidates everything"""
+    invalidate()
+
+
+def register():
+    """Install the cache invalidation handlers"""
+    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+    bpy.app.handlers.load_post.append(on_load_post)
+
+
+def unregister():
+    """Remove the cache invalidation handlers"""
+    if on_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(on_load_post)
+    if on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+    invalidate()
@@ -0,0 +1,47 @@
+from . import mesh_arrays
+
+
+TEXTURE_LAYER = "UVMap"
+LIGHTMAP_LAYER = "UVMap_Lightmap"
+
+
+def ensure_uv_layers(mesh, names, prune=True):
+    """Make the UV layers of a mesh start with exactly names, in that order
+
+    Blender can only append UV layers, so when the order is wrong every layer
+    is read with foreach_get, removed and recreated in the right order with its
+    data restored. A missing first layer takes over the data of the first stray
+    layer, so imported texture UVs such as 'map1' survive. With prune, all other
+    (stray) layers are removed, otherwise they are kept after names. Must be
+    called in Object Mode. Returns the names of the removed layers.
+    """
+    names = list(names)
+    layers = mesh.uv_layers
+    current = [layer.name for layer in layers]
+    strays = [name for name in current if name not in names]
+    
+    if current[:len(names)] == names and not (prune and strays):
+        return []
+    
+    data = {name: mesh_arrays.read_uvs(mesh, name) for name in current}
+    
+    sources = list(names)
+    if names and names[0] not in data and strays:
+        sources[0] = strays.pop(0)
+    
+    removed = strays if prune else []
+    kept = [] if prune else strays
+    
+    while len(layers):
+        layers.remove(layers[0])
+    
+    for name, source in zip(names + kept, sources + kept):
+        layers.new(name=name, do_init=False)
+        if source in data:
+            mesh_arrays.write_uvs(mesh, name, data[source])
+    
+    if len(layers):
+        layers.active_index = 0
+        layers[0].active_render = True
+    
+    return removed
@@ -0,0 +1,212 @@
+import numpy as np
+from . import mesh_snapshot
+from . import spatial
+
+
+# UVs closer than this count as the same UV vertex
+_UV_EPSILON = 1e-6
+
+# Scale step used while searching for the largest chart scale that still fits
+_SHRINK = 0.9
+
+
+def find_charts(uvs, loop_vertices, loop_polygons, polygon_count):
+    """Chart index of every polygon
+
+    Polygons belong to the same chart when they share a vertex that has the
+    same UV coordinate in both of them.
+    """
+    quantized = np.round(uvs / _UV_EPSILON).astype(np.int64)
+    keys = np.column_stack((loop_vertices, quantized))
+    _, uv_vertices = np.unique(keys, axis=0, return_inverse=True)
+    uv_vertices = uv_vertices.ravel()
+    
+    # Loops of the same UV vertex are adjacent once sorted, link their polygons
+    order = np.argsort(uv_vertices, kind='stable')
+    same = uv_vertices[order[1:]] == uv_vertices[order[:-1]]
+    pairs = np.column_stack((loop_polygons[order[:-1]][same], loop_polygons[order[1:]][same]))
+    
+    labels = spatial.connected_components(polygon_count, pairs)
+    _, charts = np.unique(labels, return_inverse=True)
+    return charts.ravel()
+
+
+class SkylinePacker:
+    """Bottom-left skyline packing of integer rectangles into a fixed-size bin"""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.skyline = [(0, 0, width)]  # (x, y, width) segments from left to right
+
+    def _fit(self, index, width):
+        """Lowest y a rectangle of width can rest at when its left edge is at segment index"""
+        x = self.skyline[index][0]
+        if x + width > self.width:
+            return None
+        
+        y = 0
+        remaining = width
+        while remaining > 0:
+            _, segment_y, segment_width = self.skyline[index]
+            y = max(y, segment_y)
+            remaining -= segment_width
+            index += 1
+        return y
+
+    def insert(self, width, height):
+        """Place a rectangle and return its (x, y) corner, or None when it does not fit"""
+        best = None
+        for index, (x, _, _) in enumerate(self.skyline):
+            y = self._fit(index, width)
+            if y is None or y + height > self.height:
+                continue
+            if best is None or (y + height, x) < best[:2]:
+                best = (y + height, x, index, y)
+        
+        if best is None:
+            return None
+        
+        top, x, index, y = best
+        right = x + width
+        
+        # Replace the covered part of the skyline by the top of the new rectangle
+        skyline = self.skyline[:index] + [(x, top, width)]
+        for segment_x, segment_y, segment_width in self.skyline[index:]:
+            segment_right = segment_x + segment_width
+            if segment_right <= right:
+                continue
+            if segment_x < right:
+                skyline.append((right, segment_y, segment_right - right))
+            else:
+                skyline.append((segment_x, segment_y, segment_width))
+        
+        # Merge neighbours at the same height
+        merged = [skyline[0]]
+        for segment in skyline[1:]:
+            if segment[1] == merged[-1][1]:
+                merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + segment[2])
+            else:
+                merged.append(segment)
+        self.skyline = merged
+        
+        return x, y
+
+
+def _place(sizes, scale, order, area, padding):
+    """Pixel corners of all charts at scale, or None when they do not fit"""
+    pixels = np.ceil(sizes * scale).astype(np.int64) + padding
+    packer = SkylinePacker(area, area)
+    corners = np.empty((len(sizes), 2), dtype=np.int64)
+    
+    for index in order:
+        corner = packer.insert(int(pixels[index, 0]), int(pixels[index, 1]))
+        if corner is None:
+            return None
+        corners[index] = corner
+    return corners
+
+
+def pack_charts(sizes, resolution, padding):
+    """Find the largest uniform scale at which charts of sizes fit the atlas
+
+    Every chart is surrounded by at least padding pixels, both to its
+    neighbours and to the atlas border. Returns the scale (pixels per UV unit)
+    and the pixel position of every chart.
+    """
+    area = resolution - padding
+    if area <= 0:
+        raise ValueError("Lightmap padding leaves no room for charts")
+    
+    # Tallest first, the usual order for skyline packing
+    order = np.lexsort((-sizes[:, 0], -sizes[:, 1]))
+    
+    total = float(np.sum(sizes[:, 0] * sizes[:, 1]))
+    largest = float(sizes.max()) if len(sizes) else 0.0
+    if total <= 0.0 or largest <= 0.0:
+        corners = _place(sizes, 0.0, order, area, padding)
+        if corners is None:
+            raise ValueError("Too many charts for the lightmap resolution")
+        return 0.0, corners + padding
+    
+    # Upper bound: the charts cannot cover more than the whole atlas
+    scale = min(np.sqrt(area * area / total), (area - padding) / largest)
+    
+    corners = _place(sizes, scale, order, area, padding)
+    while corners is None:
+        scale *= _SHRINK
+        if scale * largest < 1.0:
+            raise ValueError("Too many charts for the lightmap resolution")
+        corners = _place(sizes, scale, order, area, padding)
+    
+    # Refine between the fitting scale and the last one that did not fit
+    low, high = scale, scale / _SHRINK
+    for _ in range(4):
+        middle = (low + high) * 0.5
+        placed = _place(sizes, middle, order, area, padding)
+        if placed is None:
+            high = middle
+        else:
+            low, corners = middle, placed
+    
+    return low, corners + padding
+
+
+def polygon_uv_area(uvs, loop_starts, loop_totals):
+    """Total unsigned area of all polygons in UV space"""
+    if len(uvs) == 0:
+        return 0.0
+    
+    # Next loop of every loop, wrapping around at the end of its polygon
+    following = np.arange(1, len(uvs) + 1)
+    following[loop_starts + loop_totals - 1] = loop_starts
+    
+    cross = uvs[:, 0] * uvs[following, 1] - uvs[following, 0] * uvs[:, 1]
+    return float(np.abs(np.add.reduceat(cross, loop_starts)).sum() * 0.5)
+
+
+def pack_lightmap(uvs, loop_vertices, loop_starts, loop_totals, resolution, padding, rotate=True):
+    """Repack the charts of a UV layer into a lightmap atlas without overlaps
+
+    Charts keep their relative size, so the texel density is uniform over the
+    mesh. With rotate, tall charts are rotated by 90 degrees to pack tighter.
+    Returns the new UVs and the fraction of the atlas covered by polygons.
+    """
+    uvs = np.asarray(uvs, dtype=np.float64)
+    polygon_count = len(loop_starts)
+    if polygon_count == 0:
+        return uvs, 0.0
+    
+    loop_polygons = np.repeat(np.arange(polygon_count), loop_totals)
+    loop_charts = find_charts(uvs, loop_vertices, loop_polygons, polygon_count)[loop_polygons]
+    chart_count = int(loop_charts.max()) + 1
+    
+    minimum = np.full((chart_count, 2), np.inf)
+    maximum = np.full((chart_count, 2), -np.inf)
+    np.minimum.at(minimum, loop_charts, uvs)
+    np.maximum.at(maximum, loop_charts, uvs)
+    
+    local = uvs - minimum[loop_charts]
+    sizes = maximum - minimum
+    
+    # Lay every chart on its long side
+    rotated = sizes[:, 1] > sizes[:, 0] if rotate else np.zeros(chart_count, dtype=bool)
+    sizes[rotated] = sizes[rotated][:, ::-1]
+    loop_rotated = rotated[loop_charts]
+    local[loop_rotated] = np.column_stack((local[loop_rotated, 1],
+                                           sizes[loop_charts[loop_rotated], 1] - local[loop_rotated, 0]))
+    
+    scale, corners = pack_charts(sizes, resolution, padding)
+    packed = (local * scale + corners[loop_charts]) / resolution
+    
+    utilization = polygon_uv_area(packed, loop_starts, loop_totals)
+    return packed, utilization
+
+
+def pack_mesh_lightmap(mesh, layer_name, resolution, padding, rotate=True):
+    """Repack a UV layer of a Blender mesh in place, returns the atlas utilization"""
+    snapshot = mesh_snapshot.get(mesh)
+    packed, utilization = pack_lightmap(snapshot.uvs(layer_name), snapshot.loop_vertices,
+                                        snapshot.loop_starts, snapshot.loop_totals, resolution, padding, rotate)
+    snapshot.write_uvs(layer_name, packed)
+    return utilization